@@ -2,8 +2,9 @@
 
 """
 
-
+from __future__ import annotations
 import argparse
+from typing import TYPE_CHECKING
 
 from time import time
 from sys import exit
@@ -13,18 +14,20 @@ from .file import is_valid_dir
 
 from . import utils, argument, file
 from .sbml import read_SBML_species
-from .network import Network
-from .reasoning import Reasoning
-from .linear import Hybrid, FBA
-from .description import Description 
 from .file import load_json
 from pathlib import Path
-from .scope import Scope
 from . import logger
 
+# The modules of the searches import clingo, numpy and scipy,
+# they are only imported by the commands using them
+if TYPE_CHECKING:
+    from .network import Network
+    from .linear import Hybrid
+    from .groundcache import GroundCache
+    from .networkcache import NetworkCache
+
 #Global variable needed
 PROJECT_DIR = path.dirname(path.abspath(__file__))
-CLEAN_TEMP=True
 
 
 ####################### FUNCTIONS ##########################
@@ -141,7 +144,8 @@ def chek_inputs(sbml_file:str, input_dict:dict):
         ValueError: A reaction does not exist in network file
         ValueError: A ùetabolite does not exist in network file
     """
-    model_dict = read_SBML_species(sbml_file)
+    from .registry import REGISTRY
+    model_dict = read_SBML_species(REGISTRY.get_sbml_model(sbml_file))
     for key, list_element in input_dict.items():
         if key == "Objective":
             for reaction in list_element:
@@ -230,6 +234,19 @@ def get_objective(objective:str, input_dict:dict):
     objectives.append(objective)
     input_dict["Objective"] = objectives
     return input_dict
+
+
+def save_lp_fluxes(model:Hybrid, out_dir:str):
+    """Save the LP fluxes of hybrid or fba solutions into the npz file 
+    referenced from the result file, when this storage is used
+
+    Args:
+        model (Hybrid): Hybrid or FBA object after seed searching
+        out_dir (str): Output directory
+    """
+    flux_data = model.get_flux_data()
+    if model.flux_storage == "npz" and flux_data is not None:
+        file.save(model.flux_file, out_dir, flux_data, 'npz')
     
 
     
@@ -242,26 +259,37 @@ def get_objective(objective:str, input_dict:dict):
 
 
 #----------------------- SEED2LP ---------------------------
-def run_seed2lp(args:dict, run_mode):
-    """Launch seed searching
+def run_seed2lp(args:dict, run_mode, matrix:list=None):
+    """Launch seed searching. With an option matrix, the network is read and
+    normalized once, its facts are computed once for each accumulation value
+    and a search is run for each combination of options.
 
     Args:
         args (argparse): List or arguments
-    """
-    minimize=False
-    subset_minimal=False
-    results=dict()
-    res_option = dict()
-    user_data = dict()
-    solutions = dict()
-    net = dict()
+        run_mode (str): Search run (target, full or fba)
+        matrix (list, optional): Options changed by each search (see argument.get_option_matrix),
+                                 one dictionnary per combination. Defaults to None.
 
-    options = \
-        get_reaction_options(args['keep_import_reactions'], args['topological_injection'],
-                             args['targets_as_seeds'], args['maximize_flux'],
-                             run_mode, args['accumulation'], args['solve'])
+    Returns:
+        list: Results and timers (dict, dict) of the search for each combination, 
+              one search without option matrix
+    """
+    from .network import Network
+    from .groundcache import GroundCache
+    from .networkcache import NetworkCache
+    from .registry import REGISTRY
+    combinations = [args | combination for combination in matrix] if matrix else [args]
+    all_options = [get_reaction_options(combination['keep_import_reactions'], combination['topological_injection'],
+                                        combination['targets_as_seeds'], combination['maximize_flux'],
+                                        run_mode, combination['accumulation'], combination['solve'])
+                   for combination in combinations]
+    # Results of searches only differing by their mode are written in different files
+    if len({combination['mode'] for combination in combinations}) > 1:
+        for combination, options in zip(combinations, all_options):
+            options["short"] += f"_{combination['mode']}"
     
-    logger.get_logger(args['infile'], options["short"],args['verbose'])
+    logger.get_logger(args['infile'], all_options[0]["short"],args['verbose'])
+    REGISTRY.reset_counters()
     
     if args['temp']:
         temp = Path(args['temp']).resolve()
@@ -269,6 +297,19 @@ def run_seed2lp(args:dict, run_mode):
         temp = path.join(PROJECT_DIR,'tmp')
     file.is_valid_dir(temp)
 
+    ground_cache = None
+    network_cache = None
+    if not args.get('no_cache', False):
+        if 'ground_cache' in args and args['ground_cache']:
+            ground_cache = GroundCache(Path(args['ground_cache']).resolve(), args['ground_cache_size'])
+        elif matrix:
+            # The combinations sharing constants and facts share their ground programs
+            ground_cache = GroundCache(path.join(temp, 'ground_cache'), args.get('ground_cache_size', 512))
+        if args.get('network_cache'):
+            network_cache = NetworkCache(Path(args['network_cache']).resolve(), args['network_cache_size'])
+        else:
+            network_cache = NetworkCache(path.join(temp, 'network_cache'), args.get('network_cache_size', 256))
+
     out_dir = args['output_dir']
     file.is_valid_dir(out_dir)
 
@@ -291,12 +332,14 @@ def run_seed2lp(args:dict, run_mode):
 
     network = Network(args['infile'], run_mode, args['targets_as_seeds'], 
                     args['topological_injection'], args['keep_import_reactions'],
-                    input_dict, args['accumulation'])
+                    input_dict, args['accumulation'], flux_engine=args['flux_engine'],
+                    network_cache=network_cache)
 
     
     time_data_extraction = time() - time_data_extraction
 
 
+    user_data = dict()
     if network.targets:
         user_data['TARGETS'] = network.targets
     if network.seeds:
@@ -304,12 +347,84 @@ def run_seed2lp(args:dict, run_mode):
     if network.forbidden_seeds:
         user_data['FORBIDDEN SEEDS'] = network.forbidden_seeds
     if network.possible_seeds:
-        if args['mode'] == 'minimize' or args['mode'] == 'all':
+        if all(combination['mode'] in ('minimize', 'all') for combination in combinations):
             user_data['POSSIBLE SEEDS'] = network.possible_seeds
         else:
             logger.log.error("Possible seed can be used only with minimize mode")
             exit(1)
     
+    if not args['targets_as_seeds']:  
+        network.forbidden_seeds += network.targets
+
+
+    # The facts only depend on the accumulation and on the preprocessing,
+    # they are computed before the network is simplified
+    all_facts = dict()
+    facts_keys = list()
+    for combination in combinations:
+        # Only the reasoning uses the preprocessed facts
+        preprocess = not combination.get('no_preprocessing', False) and combination['solve'] != 'hybrid'
+        key = (combination['accumulation'], preprocess)
+        if key not in all_facts:
+            time_facts = time()
+            network.accumulation = combination['accumulation']
+            network.convert_to_facts(preprocess)
+            all_facts[key] = (network.facts, network.preprocessed_facts, network.preprocessing, time() - time_facts)
+        facts_keys.append(key)
+
+    if args['instance']:
+        file.write_instance_file(args['instance'], network.facts)
+        exit(1)
+        
+    network.simplify()
+
+    all_results = list()
+    for index, (combination, options, key) in enumerate(zip(combinations, all_options, facts_keys)):
+        if index:
+            logger.get_logger(args['infile'], options["short"], combination['verbose'])
+        network.accumulation = combination['accumulation']
+        network.facts, network.preprocessed_facts, network.preprocessing, time_facts = all_facts[key]
+        # The time of the shared steps is counted by the first search using them
+        time_extraction = time_facts if index == facts_keys.index(key) else 0
+        if not index:
+            time_extraction += time_data_extraction
+        network.result_seeds = list()
+        network.fluxes = None
+        all_results.append(search_seeds(combination, run_mode, network, options, user_data, 
+                                        time_extraction, temp, out_dir, ground_cache, network_cache))
+    return all_results
+
+
+def search_seeds(args:dict, run_mode:str, network:Network, options:dict, user_data:dict, 
+                 time_data_extraction:float, temp:str, out_dir:str,
+                 ground_cache:GroundCache=None, network_cache:NetworkCache=None):
+    """Search the seeds of a network with a combination of options, 
+    its facts being already computed
+
+    Args:
+        args (dict): Options of the search
+        run_mode (str): Search run (target, full or fba)
+        network (Network): Network constructed, facts computed
+        options (dict): Options informations (see get_reaction_options)
+        user_data (dict): Data given by the user
+        time_data_extraction (float): Time spent getting the network and its facts
+        temp (str): Temporary directory
+        out_dir (str): Output directory
+        ground_cache (GroundCache, optional): On-disk cache of ground programs. Defaults to None.
+        network_cache (NetworkCache, optional): On-disk cache of the networks. Defaults to None.
+
+    Returns:
+        dict, dict: Results and timers of the search
+    """
+    from .reasoning import Reasoning
+    from .registry import REGISTRY
+    minimize=False
+    subset_minimal=False
+    results=dict()
+    res_option = dict()
+    solutions = dict()
+    net = dict()
+
     res_option['REACTION'] = options['reaction']
     if run_mode == "target" or run_mode == 'fba':
         res_option['TARGET'] = options['target']
@@ -324,18 +439,8 @@ def run_seed2lp(args:dict, run_mode):
     
     results["USER DATA"] = user_data
     
-    if not args['targets_as_seeds']:  
-        network.forbidden_seeds += network.targets
-
-
-    network.convert_to_facts()
-
-    if args['instance']:
-        with open(args['instance'], "w") as f:
-            f.write(network.facts)
-        exit(1)
-        
-    network.simplify()
+    if network.preprocessing:
+        net["PREPROCESSING"] = network.preprocessing
 
     if args['mode'] == 'minimize' or args['mode'] == 'all':
         minimize = True
@@ -366,7 +471,8 @@ def run_seed2lp(args:dict, run_mode):
                                             args['clingo_configuration'], args['clingo_strategy'], 
                                             args['intersection'], args['union'], minimize, subset_minimal, 
                                             temp, options['short'],
-                                            args['verbose'])
+                                            args['verbose'], args['flux_workers'], ground_cache,
+                                            args['threads'], args['parallel_mode'], args['portfolio'])
                             model.search_seed()
                             solutions['REASONING'] = model.output
                             results["RESULTS"] = solutions
@@ -382,7 +488,8 @@ def run_seed2lp(args:dict, run_mode):
                                     args['clingo_configuration'], args['clingo_strategy'], 
                                     args['intersection'], args['union'], minimize, subset_minimal, 
                                     temp, options['short'],
-                                    args['verbose'])
+                                    args['verbose'], args['flux_workers'], ground_cache,
+                                    args['threads'], args['parallel_mode'], args['portfolio'])
                     model.search_seed()
                     solutions['REASONING'] = model.output
                     results["RESULTS"] = solutions
@@ -394,26 +501,33 @@ def run_seed2lp(args:dict, run_mode):
                     logger.log.error(f"Mode HYBRID aborted! No objective found")
                     solutions['HYBRID'] = "No objective found"
                 else:
+                    # clingo-lpx is only imported by the hybrid searches
+                    from .linear import Hybrid
                     model = Hybrid(run_mode, run_solve, network, args['time_limit'], args['number_solution'], 
                                 args['clingo_configuration'], args['clingo_strategy'],  
                                 args['intersection'], args['union'], minimize, subset_minimal,
                                 args['maximize_flux'], temp, 
-                                options['short'], args['verbose'])
+                                options['short'], args['verbose'],
+                                args['flux_storage'], args['nonzero_flux'])
                     model.search_seed()
                     solutions['HYBRID'] = model.output
                     results["RESULTS"] = solutions
+                    save_lp_fluxes(model, out_dir)
         case "fba":
             if not network.objectives or network.is_objective_error:
                 logger.log.error(f"Mode HYBFBARID aborted! No objective found")
                 solutions['FBA'] = "No objective found" 
             else:
+                from .linear import FBA
                 model = FBA(run_mode, network, args['time_limit'], args['number_solution'], 
                             args['clingo_configuration'], args['clingo_strategy'],
                             args['intersection'], args['union'], minimize, subset_minimal,
                             args['maximize_flux'], temp, 
-                            options['short'], args['verbose'])
+                            options['short'], args['verbose'],
+                            args['flux_storage'], args['nonzero_flux'])
                 model.search_seed()
                 solutions['FBA'] = model.output
+                save_lp_fluxes(model, out_dir)
     results["RESULTS"] = solutions
     time_seed_search = time() - time_seed_search
 
@@ -421,7 +535,7 @@ def run_seed2lp(args:dict, run_mode):
     timers = {'DATA EXTRACTION': time_data_extraction} |\
         {'TOTAL SEED SEARCH': time_seed_search,
         'TOTAL': time_data_extraction + time_seed_search
-    }
+    } | REGISTRY.get_timers()
 
     namewidth = max(map(len, timers))
     time_mess=""
@@ -431,18 +545,24 @@ def run_seed2lp(args:dict, run_mode):
     
     print(time_mess)
     logger.log.info(time_mess)
-    print("\n")    
+    print("\n")
+
+    if network_cache:
+        logger.print_log(f'Network cache: {network_cache.hits} hits, {network_cache.misses} misses\n', 'info')
+    if ground_cache:
+        logger.print_log(f'Ground cache: {ground_cache.hits} hits, {ground_cache.misses} misses\n', 'info')
 
     # Save the result into json file
     file.save(f'{network.name}_{options["short"]}_results',out_dir, results, 'json')
 
     # Save all fluxes into tsv file
     if args['check_flux']:
+        time_flux_check = time()
         network.check_fluxes(args['maximize_flux'])
+        timers['FLUX CHECK'] = time() - time_flux_check
+        logger.print_log(f'TIME FLUX CHECK: {round(timers["FLUX CHECK"], 3)}s', 'info')
         file.save(f'{network.name}_{options["short"]}_fluxes', out_dir, network.fluxes, 'tsv')
-    
-    if CLEAN_TEMP:
-        file.delete(network.instance_file)
+    REGISTRY.log_summary()
         
     return results, timers
 
@@ -456,6 +576,7 @@ def network_rendering(args:argparse):
     Args:
         args (argparse): List or arguments
     """
+    from .description import Description
     if args["keep_import_reactions"]:
         reac_status="import_rxn_"
     else:
@@ -466,7 +587,8 @@ def network_rendering(args:argparse):
                           args['output_dir'], details = args['network_details'],
                           visu = args['visualize'], 
                           visu_no_reaction = args['visualize_without_reactions'],
-                          write_file = args['write_file'],)
+                          write_file = args['write_file'],
+                          components = args['components'])
     
     if network.details:
         network.get_details()
@@ -475,6 +597,8 @@ def network_rendering(args:argparse):
         print('Rendering…')
         network.render_network()
         time_rendering = time() - time_rendering
+    if network.components:
+        network.write_components()
     if network.write_file:
         network.rewrite_sbml_file()
    
@@ -490,6 +614,8 @@ def network_flux(args:argparse):
     Args:
         args (argparse): List or arguments
     """
+    from .network import Network
+    from .registry import REGISTRY
     logger.get_logger(args['infile'], "check_fluxes", args['verbose'])
 
     network = Network(args['infile'], to_print=False)
@@ -502,6 +628,7 @@ def network_flux(args:argparse):
                              network.targets_as_seeds, maximize, network.run_mode, network.accumulation, solve)
     if args['output_dir']:
         file.save(f'{network.name}_{options["short"]}_fluxes_from_result', args['output_dir'], network.fluxes, 'tsv')
+    REGISTRY.log_summary()
 
 
 
@@ -515,15 +642,45 @@ def scope(args:argparse):
     Args:
         args (argparse): List or arguments
     """
+    from .network import Network
+    from .scope import Scope
+    from .registry import REGISTRY
     logger.get_logger(args['infile'], "scope", args['verbose'])
     network = Network(args['infile'], to_print=False)
     data = load_json(args['result_file'])
     network.convert_data_to_resmod(data)
-    scope = Scope(args['infile'], network, args['output_dir'])
+    scope = Scope(args['infile'], network, args['output_dir'], args['scope_workers'])
     scope.execute()
+    REGISTRY.log_summary()
    
 
 
+#---------------------- BATCH ---------------------------
+def batch(args:dict):
+    """Launch the seed searching on each network of a directory or a manifest file.
+    Write the results of each network into its own directory and a summary table.
+
+    Args:
+        args (dict): List or arguments
+    """
+    from .batch import Batch
+    run_mode = args['batch_mode']
+    options = \
+        get_reaction_options(args['keep_import_reactions'], args['topological_injection'],
+                             args['targets_as_seeds'], args['maximize_flux'],
+                             run_mode, args['accumulation'], args['solve'])
+    logger.get_logger(args['batch_input'], f'batch_{options["short"]}', args['verbose'])
+    try:
+        batch = Batch(run_mode, args['batch_input'], args['output_dir'], args, options["short"],
+                      args['objective_dir'], args['batch_workers'], args['network_time_limit'],
+                      args['network_memory_limit'], args['resume'])
+    except ValueError as e :
+        logger.log.error(str(e))
+        exit(1)
+    batch.execute(run_seed2lp)
+
+
+
 #------------------- CONF FILE ------------------------
 def save_conf(args:argparse):
     conf_path = path.join(PROJECT_DIR,'config.yaml')
@@ -538,6 +695,7 @@ def get_objective_targets(args:argparse):
     Args:
         args (argparse): List or arguments
     """
+    from .network import Network
     logger.get_logger(args['infile'], "objective_targets", args['verbose'])
     input_dict = get_input_datas()
     if 'objective' in args and args['objective']: # only in full network mode
@@ -565,13 +723,16 @@ def main():
 
     match args.cmd:
         case "target" | "full"| "fba":
-            run_seed2lp(cfg, args.cmd)
+            matrix = argument.get_option_matrix(cfg['option_matrix']) if cfg.get('option_matrix') else None
+            run_seed2lp(cfg, args.cmd, matrix)
         case "network":
             network_rendering(cfg)
         case "flux":
             network_flux(cfg)
         case "scope":
             scope(cfg)
+        case "batch":
+            batch(cfg)
         case "conf":
             save_conf(cfg)
         case "objective_targets":
@@ -1,6 +1,7 @@
 import argparse
 import yaml
 from sys import argv
+from itertools import product
 from os import path
 from ._version import  __version__
 from .file import existant_path, is_valid_dir
@@ -12,6 +13,11 @@ LICENSE = """
             GNU GENERAL PUBLIC LICENSE
               Version 3, 29 June 2007
  """
+# Options that can change between the searches of an option matrix, with their values
+MATRIX_OPTIONS = {"accumulation": ["true", "false"],
+                  "maximize_flux": ["true", "false"],
+                  "solve": ['reasoning', 'filter', 'guess_check', 'guess_check_div', 'hybrid', 'all'],
+                  "mode": ['minimize', 'subsetmin', 'all']}
 
 ############################################################
 ##################### COMMAND PARSER #######################
@@ -53,6 +59,20 @@ def cli_parser() -> argparse.ArgumentParser:
         help="Seed2lp result file containing results.",
         type=existant_path
     )
+    # Batch of networks
+    pp_batch_mode = argparse.ArgumentParser(add_help=False)
+    pp_batch_mode.add_argument(
+        dest="batch_mode",
+        help="Search run on each network.",
+        choices=['target', 'full', 'fba']
+    )
+    pp_batch_input = argparse.ArgumentParser(add_help=False)
+    pp_batch_input.add_argument(
+        dest="batch_input",
+        help="Directory of SBML files, or manifest file listing one SBML file per line, "\
+             "optionally followed by its targets / objective file.",
+        type=existant_path
+    )
     # Network representations
     pp_output_dir = argparse.ArgumentParser(add_help=False)
     pp_output_dir.add_argument(
@@ -167,6 +187,15 @@ def cli_parser() -> argparse.ArgumentParser:
         help="Keep import reactions found in sbml file",
         required=False
     )
+    pp_option_matrix = argparse.ArgumentParser(add_help=False)
+    pp_option_matrix.add_argument(
+        '-om', '--option-matrix', dest="option_matrix", 
+        type=matrix_option, nargs='+', default=None,
+        help="Run a search for each combination of options, the network being read once: "\
+             "OPTION=VALUE,VALUE ... with OPTION among accumulation, maximize_flux, solve and mode "\
+             "(example: -om accumulation=false,true solve=reasoning,filter)",
+        required=False
+    )
     pp_accumulation = argparse.ArgumentParser(add_help=False)
     pp_accumulation.add_argument(
         '-accu', '--accumulation', dest="accumulation", 
@@ -186,6 +215,44 @@ def cli_parser() -> argparse.ArgumentParser:
         help="Run a flux check on a resulted set of seeds using cobra.py",
         required=False
     )
+    pp_flux_workers = argparse.ArgumentParser(add_help=False)
+    pp_flux_workers.add_argument(
+        '-fw', '--flux-workers', dest="flux_workers", 
+        type=int, default=1,
+        help="Number of processes checking the flux of solutions in filter mode. By default 1",
+        required=False
+    )
+    pp_scope_workers = argparse.ArgumentParser(add_help=False)
+    pp_scope_workers.add_argument(
+        '-sw', '--scope-workers', dest="scope_workers", 
+        type=int, default=1,
+        help="Number of processes computing the scopes of the solutions. By default 1",
+        required=False
+    )
+    pp_flux_engine = argparse.ArgumentParser(add_help=False)
+    pp_flux_engine.add_argument(
+        '-fe', '--flux-engine', dest="flux_engine", 
+        type=str, default='cobra', choices=['cobra', 'lp'],
+        help="Engine checking the flux of sets of seeds in filter and guess_check modes: "
+             "cobra or lp (sparse LP solved with HiGHS). By default cobra",
+        required=False
+    )
+    pp_flux_storage = argparse.ArgumentParser(add_help=False)
+    pp_flux_storage.add_argument(
+        '-fs', '--flux-storage', dest="flux_storage", 
+        type=str, default='json', choices=['json', 'npz'],
+        help="Storage of the reaction fluxes of hybrid and fba solutions: "
+             "json (into the result file) or npz (float64 matrix into a sidecar file "
+             "referenced from the result file). By default json",
+        required=False
+    )
+    pp_nonzero_flux = argparse.ArgumentParser(add_help=False)
+    pp_nonzero_flux.add_argument(
+        '-nzf', '--nonzero-flux', dest="nonzero_flux", 
+        action='store_true',
+        help="Keep only objective and non-zero reaction fluxes of hybrid and fba solutions",
+        required=False
+    )
     pp_maximize_flux = argparse.ArgumentParser(add_help=False)
     pp_maximize_flux.add_argument(
         '-max', '--maximize-flux', dest="maximize_flux", 
@@ -218,6 +285,31 @@ def cli_parser() -> argparse.ArgumentParser:
         help="Add a time limit in minutes for finding seeds. By default 0, meaning no limit",
         required=False
     )
+    pp_threads = argparse.ArgumentParser(add_help=False)
+    pp_threads.add_argument(
+        '-th', '--threads', dest="threads", 
+        type=int, default=1,
+        help="Number of clingo solver threads for reasoning, filter and guess_check. By default 1",
+        required=False
+    )
+    pp_parallel_mode = argparse.ArgumentParser(add_help=False)
+    pp_parallel_mode.add_argument(
+        '-pm', '--parallel-mode', dest="parallel_mode", 
+        type=str, default='compete', choices=['compete', 'split'],
+        help="Parallel solving of the threads: compete (each thread solves the whole problem) \
+             or split (the search space is shared between threads). By default compete",
+        required=False
+    )
+    pp_portfolio = argparse.ArgumentParser(add_help=False)
+    pp_portfolio.add_argument(
+        '-pf', '--portfolio', dest="portfolio", 
+        type=str, nargs='?', const='tuned', default=None,
+        help="Run a different clasp configuration on each thread, replacing the clingo \
+             configuration: without value, the tuned seed2lp portfolio, \
+             otherwise a clasp portfolio file. \
+             By default one thread per configuration",
+        required=False
+    )
     pp_number_solution = argparse.ArgumentParser(add_help=False)
     pp_number_solution.add_argument(
         '-nbs', '--number-solution', dest="number_solution", 
@@ -245,6 +337,55 @@ def cli_parser() -> argparse.ArgumentParser:
         help="Temporary directory for hybrid or fba mode.",
         required=False
     )
+    pp_no_preprocessing = argparse.ArgumentParser(add_help=False)
+    pp_no_preprocessing.add_argument(
+        '-npp', '--no-preprocessing', dest="no_preprocessing", 
+        action='store_true',
+        help="Do not precompute the topological rules nor prune the reactions "
+             "out of the paths to the targets before grounding the reasoning",
+        required=False
+    )
+    pp_ground_cache = argparse.ArgumentParser(add_help=False)
+    pp_ground_cache.add_argument(
+        '-gc', '--ground-cache', dest="ground_cache", 
+        type=str, default=None,
+        help="Directory caching the ground programs (aspif) of the seed searches, "
+             "reused by the runs on the same network, encodings and constants. "
+             "By default no cache",
+        required=False
+    )
+    pp_ground_cache_size = argparse.ArgumentParser(add_help=False)
+    pp_ground_cache_size.add_argument(
+        '-gcs', '--ground-cache-size', dest="ground_cache_size", 
+        type=float, default=512,
+        help="Maximum size in megabytes of the ground cache, the least recently "
+             "used programs are deleted above. By default 512",
+        required=False
+    )
+    pp_network_cache = argparse.ArgumentParser(add_help=False)
+    pp_network_cache.add_argument(
+        '-nc', '--network-cache', dest="network_cache", 
+        type=str, default=None,
+        help="Directory caching the normalized networks and their facts, reused by the "
+             "runs on the same SBML file content and normalization options. "
+             "By default network_cache into the temporary directory",
+        required=False
+    )
+    pp_network_cache_size = argparse.ArgumentParser(add_help=False)
+    pp_network_cache_size.add_argument(
+        '-ncs', '--network-cache-size', dest="network_cache_size", 
+        type=float, default=256,
+        help="Maximum size in megabytes of the network cache, the least recently "
+             "used networks are deleted above. By default 256",
+        required=False
+    )
+    pp_no_cache = argparse.ArgumentParser(add_help=False)
+    pp_no_cache.add_argument(
+        '-noc', '--no-cache', dest="no_cache", 
+        action='store_true',
+        help="Do not use the network cache nor the ground cache",
+        required=False
+    )
     
     #-------------------------------------------------------
     #                Network description
@@ -271,6 +412,13 @@ def cli_parser() -> argparse.ArgumentParser:
         help="Render the description fo the network from lp and with cobra",
         required=False
     )
+    pp_components = argparse.ArgumentParser(add_help=False)
+    pp_components.add_argument(
+        '-scc', '--components', dest="components", 
+        action='store_true',
+        help="Write the strongly connected components of the network as facts (scc/2, sccedge/2, noinput/1)",
+        required=False
+    )
     pp_write_file = argparse.ArgumentParser(add_help=False)
     pp_write_file.add_argument(
         '-wf', '--write-file', dest="write_file", 
@@ -279,6 +427,47 @@ def cli_parser() -> argparse.ArgumentParser:
         required=False
     )
 
+    #-------------------------------------------------------
+    #                        Batch
+    #-------------------------------------------------------
+    pp_objective_dir = argparse.ArgumentParser(add_help=False)
+    pp_objective_dir.add_argument(
+        '-od', '--objective-dir', dest="objective_dir", 
+        type=existant_path, default=None,
+        help="Directory of the targets files (target mode) or objective files (first line, "\
+             "full and fba modes) of the networks, named [network]_target.txt",
+        required=False
+    )
+    pp_batch_workers = argparse.ArgumentParser(add_help=False)
+    pp_batch_workers.add_argument(
+        '-bw', '--batch-workers', dest="batch_workers", 
+        type=int, default=1,
+        help="Number of networks searched at the same time. By default 1",
+        required=False
+    )
+    pp_network_time_limit = argparse.ArgumentParser(add_help=False)
+    pp_network_time_limit.add_argument(
+        '-ntl', '--network-time-limit', dest="network_time_limit", 
+        type=float, default=0,
+        help="Time limit in minutes of the search of a network, killed after. By default 0, meaning no limit",
+        required=False
+    )
+    pp_network_memory_limit = argparse.ArgumentParser(add_help=False)
+    pp_network_memory_limit.add_argument(
+        '-nml', '--network-memory-limit', dest="network_memory_limit", 
+        type=float, default=0,
+        help="Memory limit (address space) in megabytes of the search of a network. "\
+             "By default 0, meaning no limit",
+        required=False
+    )
+    pp_resume = argparse.ArgumentParser(add_help=False)
+    pp_resume.add_argument(
+        '-r', '--resume', dest="resume", 
+        action='store_true',
+        help="Skip the networks already having a result file in the output directory",
+        required=False
+    )
+
     #-------------------------------------------------------
     #                     Config file
     #-------------------------------------------------------
@@ -312,7 +501,11 @@ def cli_parser() -> argparse.ArgumentParser:
             pp_targets_as_seeds, pp_topological_injection, pp_keep_import_reactions, 
             pp_clingo_configuration, pp_clingo_strategy, pp_time_limit, pp_number_solution, 
             pp_instance, pp_temp, pp_check_flux, pp_maximize_flux,
-            pp_config, pp_accumulation
+            pp_flux_workers, pp_flux_engine, pp_flux_storage, pp_nonzero_flux,
+            pp_ground_cache, pp_ground_cache_size, pp_no_preprocessing,
+            pp_network_cache, pp_network_cache_size, pp_no_cache,
+            pp_threads, pp_parallel_mode, pp_portfolio,
+            pp_config, pp_accumulation, pp_option_matrix
         ],
         description=
         """
@@ -337,7 +530,11 @@ def cli_parser() -> argparse.ArgumentParser:
             pp_topological_injection, pp_keep_import_reactions, 
             pp_clingo_configuration, pp_clingo_strategy, pp_time_limit, pp_number_solution, 
             pp_instance, pp_temp, pp_check_flux, pp_maximize_flux,
-            pp_config,  pp_accumulation
+            pp_flux_workers, pp_flux_engine, pp_flux_storage, pp_nonzero_flux,
+            pp_ground_cache, pp_ground_cache_size, pp_no_preprocessing,
+            pp_network_cache, pp_network_cache_size, pp_no_cache,
+            pp_threads, pp_parallel_mode, pp_portfolio,
+            pp_config,  pp_accumulation, pp_option_matrix
         ],
         description=
         #TODO
@@ -362,7 +559,8 @@ def cli_parser() -> argparse.ArgumentParser:
             pp_targets_as_seeds, pp_topological_injection, pp_keep_import_reactions, 
             pp_clingo_configuration, pp_clingo_strategy, pp_time_limit, pp_number_solution, 
             pp_instance, pp_temp, pp_check_flux, pp_maximize_flux,
-            pp_config
+            pp_flux_storage, pp_nonzero_flux, pp_config,
+            pp_network_cache, pp_network_cache_size, pp_no_cache, pp_option_matrix
         ],
         description=
         #TODO
@@ -374,6 +572,37 @@ def cli_parser() -> argparse.ArgumentParser:
         """
     )
     
+    subparsers.add_parser(
+        "batch",
+        help="Run seeds detection on a directory or a manifest of networks.",
+        parents=[
+            pp_verbose,
+            pp_batch_mode, pp_batch_input, pp_output_dir,
+            pp_objective_dir, pp_batch_workers, pp_network_time_limit, 
+            pp_network_memory_limit, pp_resume,
+            pp_seeds_file, 
+            pp_possible_seeds_file, 
+            pp_forbidden_seeds_file,
+            pp_mode, pp_solve, pp_intersection, pp_union,
+            pp_targets_as_seeds, pp_topological_injection, pp_keep_import_reactions, 
+            pp_clingo_configuration, pp_clingo_strategy, pp_time_limit, pp_number_solution, 
+            pp_temp, pp_check_flux, pp_maximize_flux,
+            pp_flux_workers, pp_flux_engine, pp_flux_storage, pp_nonzero_flux,
+            pp_ground_cache, pp_ground_cache_size, pp_no_preprocessing,
+            pp_network_cache, pp_network_cache_size, pp_no_cache,
+            pp_threads, pp_parallel_mode, pp_portfolio,
+            pp_config, pp_accumulation
+        ],
+        description=
+        #TODO
+        """
+        
+        """,
+        usage="""
+        seed2lp batch [target|full|fba] [sbml_directory|manifest_file] [output_directory] \n 
+        """
+    )
+
     subparsers.add_parser(
         "network",
         help="Give Network Details with reactions, create graph of Network, rewrite network sbml file",
@@ -382,7 +611,7 @@ def cli_parser() -> argparse.ArgumentParser:
             pp_network, pp_output_dir,
             pp_keep_import_reactions, 
             pp_visualize, pp_visualize_without_reactions,
-            pp_network_details, pp_write_file
+            pp_network_details, pp_write_file, pp_components
         ],
         description=
         #TODO
@@ -414,7 +643,7 @@ def cli_parser() -> argparse.ArgumentParser:
         "scope",
         help="From seeds determine scope of the network. ",
         parents=[
-            pp_verbose, pp_network, pp_result, pp_output_dir, pp_temp
+            pp_verbose, pp_network, pp_result, pp_output_dir, pp_temp, pp_scope_workers
         ],
         description=
         #TODO
@@ -465,6 +694,45 @@ def parse_args(args: iter = None) -> dict:
 
 
 ####################### FUNCTIONS ##########################
+def matrix_option(value:str) -> tuple:
+    """Argparse type of an option of the option matrix, written OPTION=VALUE,VALUE
+
+    Args:
+        value (str): Option and its values
+
+    Raises:
+        argparse.ArgumentTypeError: Option not in MATRIX_OPTIONS, or value not allowed
+
+    Returns:
+        tuple: Option and list of its values
+    """
+    option, _, values = value.partition("=")
+    option = option.strip().lstrip("-").replace("-", "_")
+    if option not in MATRIX_OPTIONS:
+        raise argparse.ArgumentTypeError(f"option {option} can not be in the option matrix, "\
+                                         f"choose among {', '.join(MATRIX_OPTIONS)}")
+    values = [item.strip().lower() for item in values.split(",") if item.strip()]
+    if not values or any(item not in MATRIX_OPTIONS[option] for item in values):
+        raise argparse.ArgumentTypeError(f"values of {option} in the option matrix must be among "\
+                                         f"{', '.join(MATRIX_OPTIONS[option])}")
+    if MATRIX_OPTIONS[option] == ["true", "false"]:
+        values = [item == "true" for item in values]
+    return option, values
+
+
+def get_option_matrix(matrix_options:list) -> list:
+    """Get all combinations of the options of the option matrix
+
+    Args:
+        matrix_options (list): Options and their values (see matrix_option), 
+                               or OPTION=VALUE,VALUE strings from the config file
+
+    Returns:
+        list: Options of each combination, as dictionnaries
+    """
+    matrix_options = dict(matrix_option(option) if isinstance(option, str) else option 
+                          for option in matrix_options)
+    return [dict(zip(matrix_options, values)) for values in product(*matrix_options.values())]
 
 
 def get_config(args:argparse.Namespace, project_source):
@@ -483,7 +751,27 @@ def get_config(args:argparse.Namespace, project_source):
                     "--time-limit" : "-tl",
                     "--number-solution" : "-nbs",
                     "--temp" : "-tmp",
-                    "--accumulation" : "-accu"}
+                    "--accumulation" : "-accu",
+                    "--flux-workers" : "-fw",
+                    "--flux-engine" : "-fe",
+                    "--scope-workers" : "-sw",
+                    "--flux-storage" : "-fs",
+                    "--nonzero-flux" : "-nzf",
+                    "--ground-cache" : "-gc",
+                    "--ground-cache-size" : "-gcs",
+                    "--no-preprocessing" : "-npp",
+                    "--network-cache" : "-nc",
+                    "--network-cache-size" : "-ncs",
+                    "--no-cache" : "-noc",
+                    "--objective-dir" : "-od",
+                    "--batch-workers" : "-bw",
+                    "--network-time-limit" : "-ntl",
+                    "--network-memory-limit" : "-nml",
+                    "--resume" : "-r",
+                    "--option-matrix" : "-om",
+                    "--threads" : "-th",
+                    "--parallel-mode" : "-pm",
+                    "--portfolio" : "-pf"}
     
     conf_argparse = vars(args)
     conf_file=None
@@ -502,7 +790,7 @@ def get_config(args:argparse.Namespace, project_source):
 
     # Overwrite configs with cli argument
     match args.cmd:
-        case "target" | "full" | "fba":
+        case "target" | "full" | "fba" | "batch":
             for key, value in conf_argparse.items():
                 cfg = cfg_file['seed2lp']
                 if key not in cfg:
@@ -0,0 +1,356 @@
+# Object Batch constitued of:
+#   - run_mode (str): Search run on each network (target, full or fba)
+#   - args (dict): Options of the searches, shared by all networks
+#   - short_option (str): Short name of the options, suffix of the result files
+#   - output_dir (str): Output directory, holding one directory per network
+#   - objective_dir (str): Directory of the targets / objective files, named <network>_target.txt
+#   - workers (int): Number of networks searched at the same time
+#   - time_limit (float): Time limit of the search of a network in minutes, 0 for no limit
+#   - memory_limit (float): Memory limit of the search of a network in megabytes, 0 for no limit
+#   - resume (bool): Networks already having a result file are skipped
+#   - networks (list): Name, SBML file and targets / objective file of each network
+#
+# Each network is searched by run_seed2lp into its own forked process: the
+# modules are imported once by the batch, and a search exceeding its time limit
+# is killed with the processes it started (filter, guess-check, flux workers).
+# The memory limit caps the address space of the search, an allocation above
+# it fails. Once a network ends, its status (done, skipped, timeout, memory,
+# error) is appended to the summary table of the output directory. The result
+# file written by an unfinished search is renamed .partial so that a resumed
+# batch searches the network again.
+
+import os
+import signal
+import resource
+from os import path, listdir, rename
+from glob import glob
+from time import time, sleep
+from collections import deque
+from contextlib import redirect_stdout
+from multiprocessing import Process
+from .file import is_valid_dir, existing_file, delete, save
+from .sbml import get_uncompressed_path
+from . import logger
+
+SBML_EXTENSIONS = (".xml", ".sbml")
+SUMMARY_FILE = "batch_summary.tsv"
+SUMMARY_HEADER = ["network", "status", "time", "results", "sbml_file", "targets_file"]
+# Messages of the allocation errors raised by the libraries (clingo, expat)
+MEMORY_ERRORS = ("bad_alloc", "out of memory")
+# Exit code of the search process for each status, no thread or
+# allocation being needed to report it once the memory is exhausted
+EXIT_CODES = {"done": 0, "error": 1, "memory": 2}
+# Time between two checks of the running searches, in seconds
+POLL_INTERVAL = 0.1
+
+
+class Batch:
+    def __init__(self, run_mode:str, batch_input:str, output_dir:str, args:dict, short_option:str,
+                 objective_dir:str=None, workers:int=1, time_limit:float=0, memory_limit:float=0,
+                 resume:bool=False):
+        """Initialize Object Batch
+
+        Args:
+            run_mode (str): Search run on each network (target, full or fba)
+            batch_input (str): Directory of SBML files, or manifest file listing one SBML file
+                               per line, optionally followed by its targets / objective file
+            output_dir (str): Output directory
+            args (dict): Options of the searches, shared by all networks
+            short_option (str): Short name of the options, suffix of the result files
+            objective_dir (str, optional): Directory of the targets / objective files. Defaults to None.
+            workers (int, optional): Number of networks searched at the same time. Defaults to 1.
+            time_limit (float, optional): Time limit of a network in minutes. Defaults to 0 (no limit).
+            memory_limit (float, optional): Memory limit of a network in megabytes. Defaults to 0 (no limit).
+            resume (bool, optional): Networks already having a result file are skipped. Defaults to False.
+
+        Raises:
+            ValueError: No SBML file found, or two SBML files give the same network name
+        """
+        self.run_mode = run_mode
+        self.args = args
+        self.short_option = short_option
+        self.output_dir = output_dir
+        self.objective_dir = objective_dir
+        self.workers = max(1, workers)
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.resume = resume
+        self.networks = self.get_networks(batch_input)
+
+
+    ######################## METHODS ########################
+    def get_networks(self, batch_input:str):
+        """List the networks of a directory of SBML files or of a manifest file
+
+        Args:
+            batch_input (str): Directory of SBML files or manifest file
+
+        Raises:
+            ValueError: No SBML file found, or two SBML files give the same network name
+
+        Returns:
+            list: Name, SBML file and targets / objective file (None if not found) of each network
+        """
+        entries = list()
+        if path.isdir(batch_input):
+            for name in sorted(listdir(batch_input)):
+                if get_uncompressed_path(name).endswith(SBML_EXTENSIONS):
+                    entries.append((path.join(batch_input, name), None))
+        else:
+            # Paths of the manifest are relative to its directory
+            manifest_dir = path.dirname(path.abspath(batch_input))
+            with open(batch_input) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    columns = line.split()
+                    entries.append((path.join(manifest_dir, columns[0]),
+                                    path.join(manifest_dir, columns[1]) if len(columns) > 1 else None))
+
+        networks = list()
+        names = set()
+        for sbml_file, targets_file in entries:
+            name = get_network_name(sbml_file)
+            if name in names:
+                raise ValueError(f"Batch: several SBML files for the network {name}")
+            names.add(name)
+            if targets_file is None and self.objective_dir:
+                targets_file = path.join(self.objective_dir, f"{name}_target.txt")
+                if not existing_file(targets_file):
+                    logger.log.warning(f"Batch: no targets / objective file {targets_file}")
+                    targets_file = None
+            networks.append((name, sbml_file, targets_file))
+        if not networks:
+            raise ValueError(f"Batch: no SBML file found in {batch_input}")
+        return networks
+
+
+    def get_results_files(self, name:str):
+        """Get the result files of a network written by run_seed2lp
+
+        Args:
+            name (str): Name of the network
+
+        Returns:
+            list: Paths of the result files
+        """
+        return glob(path.join(glob_escape(self.output_dir), glob_escape(name),
+                              f"*_{glob_escape(self.short_option)}_results.json"))
+
+
+    def get_network_args(self, name:str, sbml_file:str, targets_file:str):
+        """Get the options of the search of a network
+
+        Args:
+            name (str): Name of the network
+            sbml_file (str): SBML file of the network
+            targets_file (str): Targets / objective file of the network, None if not given
+
+        Returns:
+            dict: Options of run_seed2lp
+        """
+        args = dict(self.args)
+        args['infile'] = sbml_file
+        args['output_dir'] = is_valid_dir(path.join(self.output_dir, name))
+        args['instance'] = None
+        if targets_file:
+            # Targets file in target mode, objective reaction on the first line otherwise
+            if self.run_mode == "target":
+                args['targets_file'] = targets_file
+            else:
+                with open(targets_file) as f:
+                    args['objective'] = f.readline().strip()
+        return args
+
+
+    def start(self, name:str, sbml_file:str, targets_file:str, run):
+        """Start the search of a network into a new process
+
+        Args:
+            name (str): Name of the network
+            sbml_file (str): SBML file of the network
+            targets_file (str): Targets / objective file of the network
+            run (function): Search of a network (run_seed2lp)
+
+        Returns:
+            Process: Process of the search, its exit code giving the status (see EXIT_CODES)
+        """
+        args = self.get_network_args(name, sbml_file, targets_file)
+        output_file = path.join(args['output_dir'], f"{name}_{self.short_option}_output.txt")
+        process = Process(target=run_network,
+                          args=(run, args, self.run_mode, self.memory_limit, output_file))
+        process.start()
+        return process
+
+
+    def stop(self, process:Process):
+        """Kill a search and the processes it started
+
+        Args:
+            process (Process): Process of the search
+        """
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.join()
+
+
+    def end(self, name:str, sbml_file:str, targets_file:str, status:str, duration:float):
+        """Write the status of a network into the summary table. The result file
+        of an unfinished search is renamed .partial.
+
+        Args:
+            name (str): Name of the network
+            sbml_file (str): SBML file of the network
+            targets_file (str): Targets / objective file of the network
+            status (str): done, skipped, timeout, memory or error
+            duration (float): Time of the search in seconds
+        """
+        results_files = self.get_results_files(name)
+        if status not in ("done", "skipped"):
+            for results_file in results_files:
+                rename(results_file, f"{results_file}.partial")
+            results_files = list()
+        save(SUMMARY_FILE, self.output_dir,
+             [name, status, round(duration, 3), ",".join(results_files), sbml_file, targets_file or ""],
+             "tsv", is_result_temp=True)
+
+
+    def execute(self, run):
+        """Search all networks, at most workers at the same time
+
+        Args:
+            run (function): Search of a network, called as run(args, run_mode)
+
+        Returns:
+            dict: Status of each network
+        """
+        summary_path = path.join(self.output_dir, SUMMARY_FILE)
+        if existing_file(summary_path):
+            delete(summary_path)
+        save(SUMMARY_FILE, self.output_dir, SUMMARY_HEADER, "tsv", is_result_temp=True)
+        preload_dependencies()
+
+        statuses = dict()
+        pending = deque()
+        for name, sbml_file, targets_file in self.networks:
+            if self.resume and self.get_results_files(name):
+                statuses[name] = "skipped"
+                self.end(name, sbml_file, targets_file, "skipped", 0)
+            else:
+                pending.append((name, sbml_file, targets_file))
+        logger.print_log(f"Batch: {len(pending)} networks to search on {self.workers} workers, "\
+                         f"{len(statuses)} already searched", "info")
+
+        running = dict()
+        start = time()
+        while pending or running:
+            while pending and len(running) < self.workers:
+                network = pending.popleft()
+                running[network] = (self.start(*network, run), time())
+                logger.log.info(f"Batch: {network[0]} started")
+            sleep(POLL_INTERVAL)
+            for network, (process, network_start) in list(running.items()):
+                duration = time() - network_start
+                if not process.is_alive():
+                    process.join()
+                    status = get_status(process.exitcode)
+                elif self.time_limit and duration > self.time_limit * 60:
+                    self.stop(process)
+                    status = "timeout"
+                else:
+                    continue
+                del running[network]
+                statuses[network[0]] = status
+                self.end(*network, status, duration)
+                logger.print_log(f"Batch: {network[0]} {status} in {round(duration, 3)}s "\
+                                 f"({len(statuses)}/{len(self.networks)})", "info")
+
+        logger.print_log(f"Batch: {len(self.networks)} networks in {round(time() - start, 3)}s, "\
+                         + ", ".join(f"{list(statuses.values()).count(status)} {status}"
+                                     for status in sorted(set(statuses.values()))), "info")
+        return statuses
+    ########################################################
+
+
+######################## FUNCTIONS ########################
+def get_network_name(sbml_file:str):
+    """Name of a network from its SBML file, without extensions
+
+    Args:
+        sbml_file (str): SBML file path
+
+    Returns:
+        str: Name of the network
+    """
+    return path.splitext(path.basename(get_uncompressed_path(sbml_file)))[0]
+
+
+def glob_escape(pattern:str):
+    """Escape the special characters of glob into a path
+
+    Args:
+        pattern (str): Path
+
+    Returns:
+        str: Escaped path
+    """
+    return pattern.replace("[", "[[]").replace("*", "[*]").replace("?", "[?]")
+
+
+def preload_dependencies():
+    """Import the dependencies imported by the searches when needed,
+    once for all the forked searches
+    """
+    import cobra
+    import pandas
+
+
+def run_network(run, args:dict, run_mode:str, memory_limit:float, output_file:str):
+    """Search a network into a batch process, the printed messages are written into a file
+
+    Args:
+        run (function): Search of a network (run_seed2lp)
+        args (dict): Options of the search
+        run_mode (str): Search run (target, full or fba)
+        memory_limit (float): Memory limit in megabytes, 0 for no limit
+        output_file (str): File receiving the printed messages
+    """
+    # Own process group, killed with the processes started by the search
+    os.setpgrp()
+    if memory_limit:
+        limit = int(memory_limit * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    status = "done"
+    try:
+        with open(output_file, "w") as f, redirect_stdout(f):
+            run(args, run_mode)
+    except MemoryError:
+        status = "memory"
+    # Inputs not valid
+    except SystemExit:
+        status = "error"
+    except Exception as e:
+        status = "memory" if any(error in str(e) for error in MEMORY_ERRORS) else "error"
+        if status == "error":
+            logger.log.error(f"Batch: {args['infile']}: {e}")
+    exit(EXIT_CODES[status])
+
+
+def get_status(exitcode:int):
+    """Status of a search from the exit code of its process
+
+    Args:
+        exitcode (int): Exit code of the process
+
+    Returns:
+        str: done, memory or error
+    """
+    for status, code in EXIT_CODES.items():
+        if exitcode == code:
+            return status
+    # Killed without reporting, as by the out of memory killer
+    return "memory" if exitcode == -signal.SIGKILL else "error"
+########################################################
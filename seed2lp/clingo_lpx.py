@@ -1,116 +1,166 @@
 """
-Clingo lpx functions for launching command and extract results.
+Clingo lpx functions for solving with the clingo-lpx theory and extract results.
 """
 
-import subprocess 
-import json
-from resource import getrusage, RUSAGE_CHILDREN
-from .utils import repair_json
+from __future__ import annotations
+import clingo
+import numpy as np
+from typing import TYPE_CHECKING
+from fractions import Fraction
+from resource import getrusage, RUSAGE_SELF
+from time import time
 from . import logger, color
 
+# clingolpx is only imported by the hybrid searches
+if TYPE_CHECKING:
+    from clingolpx import ClingoLPXTheory
 
-def command(files:list, options:list, nb_model:int=0, time_limit:int=0) -> iter:
-    """Create the Clingo-lpx command to run for solving
+
+def command(options:list, nb_model:int=0) -> iter:
+    """Create the Clingo-lpx search options of the control used for solving
 
     Args:
-        files (list): List of ASP files used for sovling.
         options (list): Clingo options
         nb_model (int, optional): Limit number of solutions to find. Defaults to 0 meaning unlimited.
-        time_limit (int, optional): Time limit given by user in minutes. Defaults to 0 meaning unlimited.
 
     Raises:
         ValueError: If the number of model is negative, the command is not correct
 
     Returns:
-        iter: Composition of the command to run
+        iter: Options of the search, set on the control of the session
     """
-
-    CMD = ['python', '-m', 'clingolpx']
     options = list(filter(None, options))
 
-    if time_limit:
-        time_limit = int(time_limit)
-        options.append(f'--time-limit={str(time_limit)}')
     if nb_model:
         nb_model = int(nb_model)
         if nb_model < 0:
             raise ValueError("Number of model must be >= 0.")
-        options.append(f'-n {str(nb_model)}')
+        options.append(f'--models={str(nb_model)}')
     else:
-        options.append(f'-n 0')
+        options.append('--models=0')
+
+    return options
+
+
+def solve(ctrl:clingo.Control, theory:ClingoLPXTheory, time_limit:int, objectives:list=None,
+          enum_mode:str="", to_print:bool=True, reactions:dict=None, time_ground:float=0):
+    """Solve with the clingo-lpx theory registered on the clingo control of 
+    the ground program session, into the current process. Each witness is converted 
+    as soon as it is found: all witnesses are kept (and printed) only for enumeration, 
+    otherwise only the last one is kept, so that the memory used does not depend 
+    on the number of models.
 
-    options.append("--warn=none")
+    Args:
+        ctrl (clingo.Control): Control holding the ground program, set for the search
+        theory (ClingoLPXTheory): Theory registered on the control
+        time_limit (int): Time limit given by user in seconds.
+        objectives (list, optional): List of objective reactions to show on output. Defaults to None.
+        enum_mode (str, optional): Enumeration mode to detect intersection or enumeration. Defaults to "".
+        to_print (bool, optional): Print the enumerated solutions into consol. Defaults to True.
+        reactions (dict, optional): Index of each reaction into the flux arrays, shared 
+                                    between solvings. Defaults to None.
+        time_ground (float, optional): Grounding time of the program, 0 when reused. Defaults to 0.
 
-    if files:
-        cmd = [*CMD, *files, *options]
+    Returns:
+        result_data (dict), is_killed (bool)
+    """
+    if reactions is None:
+        reactions = dict()
+    is_killed=False
+    witnesses = list()
+    optimality_proven = False
+
+    def on_model(model:clingo.Model):
+        nonlocal optimality_proven
+        theory.on_model(model)
+        value = [str(symbol) for symbol in model.symbols(theory=True) if symbol.match("__lpx", 2)]
+        value.extend(str(symbol) for symbol in model.symbols(shown=True))
+        witness = {'Data': get_model_data({'Value': value}, objectives, reactions)}
+        if model.cost:
+            witness['Costs'] = model.cost
+        optimality_proven = model.optimality_proven
+        if enum_mode == "enumeration":
+            witnesses.append(witness)
+            if to_print:
+                reaction_list, seeds_list, objective_str, seeds_accu_list = witness['Data']
+                print_data(len(witnesses), objective_str, seeds_list, seeds_accu_list)
+        else:
+            witnesses[:] = [witness]
+
+    start_solve = time()
+    with ctrl.solve(on_model=on_model, async_=True) as handle:
+        if not handle.wait(time_limit):
+            logger.log.error(f'Timeout: {time_limit/60} min expired')
+            handle.cancel()
+            is_killed=True
+        solve_result = handle.get()
+    time_solve = time() - start_solve
+
+    if solve_result.unsatisfiable:
+        result = 'UNSATISFIABLE'
+    elif solve_result.satisfiable and 'Costs' in witnesses[-1] \
+            and (optimality_proven or solve_result.exhausted):
+        # The last model is optimal once the search space is exhausted
+        result = 'OPTIMUM FOUND'
+    elif solve_result.satisfiable:
+        result = 'SATISFIABLE'
     else:
-        cmd = [*CMD, *options]
+        result = 'UNKNOWN'
+    result_data = {'Witnesses': witnesses, 'Result': result}
+    if not is_killed:
+        result_data['Time'] = {'Total': time_ground + time_solve, 'Solve': time_solve}
+    return result_data, is_killed
 
-    return cmd
 
+def reset_peak_memory() -> float:
+    """Reset the peak memory of the process when the system allows it (Linux),
+    so that the next peak only depends on the next allocations
 
-def solve(cmd:list, time_limit:int):
-    """Launch the Clingo-lpx command
+    Returns:
+        float: Peak memory of the process in GB once reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    return get_peak_memory()
 
-    Args:
-        cmd (list): Clingo-lpx command
-        time_limit (int): Time limit given by user in minutes.
+
+def get_peak_memory() -> float:
+    """Get the peak memory (resident set size) of the process
 
     Returns:
-        proc_output (str), err_output (str), error_code (int), memory (float), is_killed (bool)
+        float: Peak memory in GB
     """
-    
-    cmd.append(f'--outf=2')
-    is_killed=False
     try:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if time_limit:
-            process.wait(timeout=time_limit+60)
-    except subprocess.TimeoutExpired:
-        logger.log.error(f'Timeout: {time_limit/60} min expired')
-        process.kill()
-        process.wait()
-        is_killed=True
-
-    proc_output, err_output = process.communicate()
-    memory=getrusage(RUSAGE_CHILDREN).ru_maxrss / (1024 * 1024)
-    error_code=process.returncode
-    if is_killed:
-        error_code=0
-    if error_code==1:
-        logger.log.error(f'Timeout: {time_limit/60} min expired')
-    return str(proc_output, 'UTF-8'), err_output, error_code, round(memory,3), is_killed
-
-
-
-def result_convert(proc_output:str, objectives:list=None, enum_mode:str="", 
-                   is_killed:bool=False, to_print:bool=True):
-    """Convert the output result into constructed and limited output (JSON type)
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / (1024 * 1024)
+    except OSError:
+        pass
+    return getrusage(RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+
+
+def result_convert(result_data:dict, enum_mode:str="", to_print:bool=True):
+    """Convert the witnesses found into constructed and limited output (JSON type)
 
     Args:
-        proc_output (str):  Output from the solver
-        objectives (list, optional):  List of objective reactions to show on output. Defaults to None.
+        result_data (dict):  Output from the solver, witnesses already converted
         enum_mode (str, optional): Enumeration mode to detect intersection or enumeration. Defaults to "".
-        is_killed (bool, optional): Detects if the process was killed. Defaults to False.
-        to_print (bool, optional): Print the solution into consol. Defaults to True.
+        to_print (bool, optional): Print the last solution into consol. Defaults to True.
 
     Returns:
         result (dict), unsatisfiable (bool), has_optimum (bool), time (dict), costs (list)
     """
     result={}
-    seed_accu={}
     time={}
     has_optimum = False
     unsatisfiable = True
-    model_number=1
-    seeds_list=list()
-    reaction_list=list()
     costs=None
-    if proc_output:
-        if is_killed:
-            proc_output=repair_json(proc_output, True)
-        result_data = json.loads(proc_output)
-
+    if result_data:
         if 'Result' in result_data:
             if result_data['Result'] == 'SATISFIABLE':
                 unsatisfiable = False
@@ -121,60 +171,66 @@ def result_convert(proc_output:str, objectives:list=None, enum_mode:str="",
             unsatisfiable = False
         if 'Time' in result_data:
             time = result_data['Time']
-        
-        if 'Call' in result_data:
-            if 'Witnesses' in result_data['Call'][0]:
-                #Case minimize finding optimum or case intersection
-                if (has_optimum and enum_mode != "enumeration") or enum_mode == "cautious":
-                    model = result_data['Call'][0]['Witnesses'][-1]
-                    reaction_list, seeds_list, objective_str, seeds_accu_list = \
-                            get_model_data(model, objectives)
-                    nb_seed=len(seeds_list)
-                    nb_seed_accu=len(seeds_accu_list)
-                    result[f'model_{model_number}']=["size", nb_seed] + \
-                                            ["Set of seeds", seeds_list.copy()] + \
-                                            ['reaction_flux', reaction_list.copy()] 
-                    if nb_seed_accu or nb_seed_accu>0:
-                        seed_accu["size"] = nb_seed_accu
-                        seed_accu["Set of seeds"] = seeds_accu_list.copy()
-                        result[f'model_{model_number}']=result[f'model_{model_number}'] +\
-                                                                ["accumulation avoid with seeds", seed_accu]
-                    if "Costs" in model:
-                        costs = model["Costs"]
-                    if to_print:
-                        print_data(model_number, objective_str, seeds_list, seeds_accu_list)
-                elif not unsatisfiable:
-                    for model in result_data['Call'][0]['Witnesses']:
-                        reaction_list, seeds_list, objective_str, seeds_accu_list = \
-                            get_model_data(model, objectives)
-                        nb_seed=len(seeds_list)
-                        nb_seed_accu=len(seeds_accu_list)
-                        print_data(model_number, objective_str, seeds_list, seeds_accu_list)
-                        result[f'model_{model_number}']=["size", nb_seed] + \
-                                                ["Set of seeds", seeds_list.copy()] + \
-                                                ['reaction_flux', reaction_list.copy()] 
-                        if nb_seed_accu or nb_seed_accu>0:
-                            seed_accu["size"] = nb_seed_accu
-                            seed_accu["Set of seeds"] = seeds_accu_list.copy()
-                            result[f'model_{model_number}']=result[f'model_{model_number}'] +\
-                                                                    ["accumulation avoid with seeds", seed_accu]
-                        model_number+=1
+
+        witnesses = result_data.get('Witnesses', list())
+        #Case minimize finding optimum or case intersection
+        if (has_optimum and enum_mode != "enumeration") or enum_mode == "cautious":
+            if witnesses:
+                model = witnesses[-1]
+                result['model_1'] = get_model_result(*model['Data'])
+                if "Costs" in model:
+                    costs = model["Costs"]
+                if to_print:
+                    _, seeds_list, objective_str, seeds_accu_list = model['Data']
+                    print_data(1, objective_str, seeds_list, seeds_accu_list)
+        elif not unsatisfiable:
+            for model_number, model in enumerate(witnesses, 1):
+                result[f'model_{model_number}'] = get_model_result(*model['Data'])
 
     return result, unsatisfiable, has_optimum, time, costs
 
 
-def get_model_data(model:dict, objectives:list=None):
-    """Get clingo results and convert into lists
+def get_model_result(flux:np.ndarray, seeds_list:list, objective_str:str, seeds_accu_list:list):
+    """Format the data of a model for the output
+
+    Args:
+        flux (ndarray): Flux of the reactions, given by their index
+        seeds_list (list): Seeds list 
+        objective_str (str): Reaction name and flux
+        seeds_accu_list (list): Seeds used for accumulation list 
+
+    Returns:
+        list: Size, set of seeds, reaction flux and seeds avoiding accumulation of the model
+    """
+    model = ["size", len(seeds_list)] + \
+            ["Set of seeds", seeds_list.copy()] + \
+            ['reaction_flux', flux] 
+    if seeds_accu_list:
+        seed_accu = {"size": len(seeds_accu_list), 
+                     "Set of seeds": seeds_accu_list.copy()}
+        model = model + ["accumulation avoid with seeds", seed_accu]
+    return model
+
+
+def get_model_data(model:dict, objectives:list=None, reactions:dict=None):
+    """Get clingo results and convert into lists, the fluxes into an array
+    indexed by the reactions
 
     Args:
         model (dict): output of clingo
         objectives (list, optional): List of objective reactions to show on output. Defaults to None.
+        reactions (dict, optional): Index of each reaction into the flux array, completed 
+                                    with the new reactions. Defaults to None.
 
     Returns:
-        reaction_list (list), seeds_list (list), objective_str (str), seeds_accu_list (list)
+        flux (ndarray), seeds_list (list), objective_str (str), seeds_accu_list (list)
     """
+    if objectives is None:
+        objectives = list()
+    if reactions is None:
+        reactions = dict()
     objective_str=''
-    reaction_list=list()
+    reaction_flux=dict()
     seeds_list=list()
     seeds_accu_list=list()
     for answer in model['Value']:
@@ -188,21 +244,18 @@ def get_model_data(model:dict, objectives:list=None):
             seeds_accu_list.append(seed_accu)
         else:
             answer = answer.replace('__lpx(','',1).replace(')','',1)
-            reaction = answer.split(',')[0].replace('"','',2)
-            flux = answer.split(',')[1].replace('"','',2).replace(')','',1)
-            if '/' in flux:
-                numerator=int(flux.split('/')[0])
-                denominator=int(flux.split('/')[1])
-                flux=round(float(numerator/denominator),10)
-            else:
-                flux=round(float(flux),10)
+            reaction, flux = answer.rsplit(',', 1)
+            reaction = reaction.replace('"','',2)
+            flux=round(float(Fraction(flux.strip('")'))),10)
             if reaction in objectives:
                 objective_str+=f'"{reaction}" = {flux}\n'
-            reaction_list.append((reaction,flux))
-    
+            reaction_flux[reactions.setdefault(reaction, len(reactions))] = flux
+
+    flux_array = np.zeros(len(reactions))
+    flux_array[list(reaction_flux.keys())] = list(reaction_flux.values())
     seeds_list=list(sorted(seeds_list))
     seeds_accu_list=list(sorted(seeds_accu_list))
-    return reaction_list, seeds_list, objective_str, seeds_accu_list
+    return flux_array, seeds_list, objective_str, seeds_accu_list
 
 def print_data(model_number:int, objective_str:str, seeds_list:list, 
                seeds_accu_list:list):
@@ -0,0 +1,92 @@
+# Decomposition of the metabolite graph into strongly connected components (SCC).
+# The graph links the reactants of each reaction to its products, a reversible
+# reaction linking its products to its reactants too. It is stored as a sparse
+# adjacency matrix (CSR) over the metabolites sorted by name, computed from the
+# stoichiometry of the network core. The components are computed in linear time
+# by scipy.
+#
+# Outputs, as facts:
+#   - scc(A,M): metabolite M is into the component A, named by its smallest metabolite
+#   - sccedge(A,B): a metabolite of component A is linked to a metabolite of component B
+#   - noinput(A): no metabolite of another component is linked to component A (root)
+
+import numpy as np
+from .core import NetworkCore
+from .utils import quoted
+
+
+def get_graph(core:NetworkCore):
+    """Get the adjacency matrix of the metabolites from the core of the network:
+    a metabolite is linked to another when a reaction consumes the first one
+    and produces the second one
+
+    Args:
+        core (NetworkCore): Indexed arrays of the normalized network
+
+    Returns:
+        list, csr_array: Metabolites sorted by name, adjacency matrix
+    """
+    order = np.argsort(core.metabolite_ranks)
+    nodes = [core.metabolites[row] for row in order]
+    # Rows of the metabolites sorted by name, structure only
+    reactants = core.reactants[order].astype(np.int32)
+    products = core.products[order].astype(np.int32)
+    reactants.data[:] = 1
+    products.data[:] = 1
+    graph = reactants @ products.T
+    # A reversible reaction also links its products to its reactants
+    graph = graph + products[:, core.reversible] @ reactants[:, core.reversible].T
+    return nodes, graph.tocsr()
+
+
+def get_components(core:NetworkCore):
+    """Decompose the metabolite graph into strongly connected components
+
+    Args:
+        core (NetworkCore): Indexed arrays of the normalized network
+
+    Returns:
+        dict: Metabolites of each component ("scc"), links between the components
+              ("sccedge") and components without input ("noinput"),
+              the components being named by their smallest metabolite
+    """
+    from scipy.sparse.csgraph import connected_components
+    nodes, graph = get_graph(core)
+    number, labels = connected_components(graph, directed=True, connection='strong')
+    # The nodes are sorted by name: the name of a component is its smallest node index
+    names = np.full(number, len(nodes), dtype=np.int64)
+    np.minimum.at(names, labels, np.arange(len(nodes)))
+
+    graph = graph.tocoo()
+    sources, targets = labels[graph.row], labels[graph.col]
+    between = sources != targets
+    links = np.unique(np.stack([sources[between], targets[between]], axis=1), axis=0)
+    has_input = np.zeros(number, dtype=bool)
+    has_input[links[:, 1]] = True
+
+    components = {"scc": dict(), "sccedge": list(), "noinput": list()}
+    for node, label in enumerate(labels):
+        components["scc"].setdefault(nodes[names[label]], list()).append(nodes[node])
+    components["sccedge"] = [(nodes[names[source]], nodes[names[target]]) for source, target in links]
+    components["noinput"] = [nodes[names[label]] for label in np.flatnonzero(~has_input)]
+    return components
+
+
+def convert_to_facts(components:dict):
+    """Convert the strongly connected components into ASP facts
+
+    Args:
+        components (dict): Components from get_components()
+
+    Returns:
+        str: Components converted into ASP facts (scc/2, sccedge/2, noinput/1)
+    """
+    facts = ""
+    for name, metabolites in sorted(components["scc"].items()):
+        for metabolite in metabolites:
+            facts += f'scc({quoted(name)},{quoted(metabolite)}).\n'
+    for source, target in sorted(components["sccedge"]):
+        facts += f'sccedge({quoted(source)},{quoted(target)}).\n'
+    for name in sorted(components["noinput"]):
+        facts += f'noinput({quoted(name)}).\n'
+    return facts
@@ -0,0 +1,255 @@
+# Object NetworkCore constitued of:
+#   - metabolites (list): Metabolite IDs, the index of a metabolite is its row
+#   - metabolite_index (dict): Index of each metabolite ID
+#   - metabolite_types (ndarray): Type code of each metabolite (see METABOLITE_TYPES)
+#   - metabolite_ranks (ndarray): Rank of each metabolite into the metabolites sorted by ID
+#   - reactions (list): Reaction IDs, the index of a reaction is its column
+#   - reaction_index (dict): Index of each reaction ID
+#   - reactants (csc_array): Stoichiometry of the reactants (metabolites x reactions)
+#   - products (csc_array): Stoichiometry of the products (metabolites x reactions)
+#   - lbounds (ndarray): Lower bound of each reaction
+#   - ubounds (ndarray): Upper bound of each reaction
+#   - reversible (ndarray): Reversibility of each reaction
+#   - exchange (ndarray): Exchange flag of each reaction
+#   - transport (ndarray): Transport flag of each reaction
+#   - meta_modified (ndarray): Reactants and products switched for each reaction
+#
+# Indexed view of the normalized network, built once the reactions are read
+# and corrected. The IDs are interned: each metabolite and reaction name is
+# stored once, the reactions are columns of sparse matrices and their
+# properties NumPy arrays. It is kept when the Network is simplified and
+# used for the facts, the topology, the components and the LP flux model.
+# Reactants and products are separated so that a metabolite on both sides
+# of a reaction is kept.
+# The core is exported to and restored from plain arrays (get_arrays /
+# set_arrays) to be stored into the network cache.
+
+import numpy as np
+from scipy.sparse import csc_array
+from . import logger
+
+METABOLITE_TYPES = ("other", "transport", "exchange", "")
+
+
+class NetworkCore:
+    def __init__(self, reactions:list=None):
+        """Initialize Object NetworkCore
+
+        Args:
+            reactions (list, optional): List of normalized reactions (object Reaction) of the network.
+                                        Defaults to None, an empty core to be set from arrays.
+        """
+        if reactions is None:
+            reactions = list()
+        self.metabolites = list()
+        self.metabolite_index = dict()
+        self.reactions = list()
+        self.reaction_index = dict()
+        types = list()
+        matrices = {"reactant": (list(), list(), list()), "product": (list(), list(), list())}
+        number = len(reactions)
+        self.lbounds = np.zeros(number)
+        self.ubounds = np.zeros(number)
+        self.reversible = np.zeros(number, dtype=bool)
+        self.exchange = np.zeros(number, dtype=bool)
+        self.transport = np.zeros(number, dtype=bool)
+        self.meta_modified = np.zeros(number, dtype=bool)
+
+        for column, reaction in enumerate(reactions):
+            self.reaction_index[reaction.name] = column
+            self.reactions.append(reaction.name)
+            self.lbounds[column] = float(reaction.lbound)
+            self.ubounds[column] = float(reaction.ubound)
+            self.reversible[column] = reaction.reversible
+            self.exchange[column] = reaction.is_exchange
+            self.transport[column] = reaction.is_transport
+            self.meta_modified[column] = reaction.is_meta_modified
+            for side, metabolites in (("reactant", reaction.reactants), ("product", reaction.products)):
+                rows, columns, values = matrices[side]
+                for metabolite in metabolites:
+                    row = self.metabolite_index.get(metabolite.name)
+                    if row is None:
+                        row = len(self.metabolites)
+                        self.metabolite_index[metabolite.name] = row
+                        self.metabolites.append(metabolite.name)
+                        types.append(METABOLITE_TYPES.index(metabolite.type))
+                    rows.append(row)
+                    columns.append(column)
+                    values.append(metabolite.stoichiometry)
+
+        shape = (len(self.metabolites), number)
+        self.reactants = csc_array((matrices["reactant"][2], matrices["reactant"][:2]), shape=shape)
+        self.products = csc_array((matrices["product"][2], matrices["product"][:2]), shape=shape)
+        self.reactants.sort_indices()
+        self.products.sort_indices()
+        self.metabolite_types = np.array(types, dtype=np.int8)
+        self.metabolite_ranks = np.empty(len(self.metabolites), dtype=np.int64)
+        self.metabolite_ranks[np.argsort(np.array(self.metabolites, dtype=str), kind="stable")] \
+            = np.arange(len(self.metabolites))
+
+
+    ######################## GETTER ########################
+    def get_arrays(self):
+        """Export the core as plain arrays, without Python objects
+
+        Returns:
+            dict: Arrays of the core, by name
+        """
+        arrays = {"metabolites": encode_text("\n".join(self.metabolites)),
+                  "reactions": encode_text("\n".join(self.reactions)),
+                  "metabolite_types": self.metabolite_types,
+                  "metabolite_ranks": self.metabolite_ranks}
+        for side, matrix in (("reactants", self.reactants), ("products", self.products)):
+            arrays[f"{side}_data"] = matrix.data
+            arrays[f"{side}_indices"] = matrix.indices
+            arrays[f"{side}_indptr"] = matrix.indptr
+        for name in ("lbounds", "ubounds", "reversible", "exchange", "transport", "meta_modified"):
+            arrays[name] = getattr(self, name)
+        return arrays
+    ########################################################
+
+    ######################## SETTER ########################
+    def set_arrays(self, arrays:dict):
+        """Restore the core from the arrays exported by get_arrays()
+
+        Args:
+            arrays (dict): Arrays of the core, by name
+        """
+        metabolites, reactions = decode_text(arrays["metabolites"]), decode_text(arrays["reactions"])
+        self.metabolites = metabolites.split("\n") if metabolites else list()
+        self.metabolite_index = {name: row for row, name in enumerate(self.metabolites)}
+        self.reactions = reactions.split("\n") if reactions else list()
+        self.reaction_index = {name: column for column, name in enumerate(self.reactions)}
+        self.metabolite_types = arrays["metabolite_types"]
+        self.metabolite_ranks = arrays["metabolite_ranks"]
+        shape = (len(self.metabolites), len(self.reactions))
+        self.reactants = csc_array((arrays["reactants_data"], arrays["reactants_indices"],
+                                    arrays["reactants_indptr"]), shape=shape)
+        self.products = csc_array((arrays["products_data"], arrays["products_indices"],
+                                   arrays["products_indptr"]), shape=shape)
+        for name in ("lbounds", "ubounds", "reversible", "exchange", "transport", "meta_modified"):
+            setattr(self, name, arrays[name])
+    ########################################################
+
+    ######################## METHODS ########################
+    def get_metabolites(self, column:int, side:str):
+        """Get the metabolites of one side of a reaction, sorted by ID
+
+        Args:
+            column (int): Index of the reaction
+            side (str): reactant or product
+
+        Returns:
+            ndarray, ndarray: Indices and stoichiometries of the metabolites
+        """
+        matrix = self.reactants if side == "reactant" else self.products
+        start, end = matrix.indptr[column], matrix.indptr[column + 1]
+        rows, values = matrix.indices[start:end], matrix.data[start:end]
+        order = np.argsort(self.metabolite_ranks[rows], kind="stable")
+        return rows[order], values[order]
+
+
+    def get_stoichiometry(self):
+        """Get the stoichiometric matrix, products positive and reactants negative
+
+        Returns:
+            csc_array: Stoichiometric matrix (metabolites x reactions)
+        """
+        return self.products - self.reactants
+
+
+    def get_directions(self, keep_import_reactions:bool):
+        """Get the directions of the reactions as written into the facts, a reversible
+        reaction being splitted into its reverse (rev_R) and forward (R) directions
+
+        Args:
+            keep_import_reactions (bool): Import reactions are not removed
+
+        Returns:
+            list: (column, name, is_reversed, is_removed, reactant side, product side) of each direction
+        """
+        directions = list()
+        has_reactants = np.diff(self.reactants.indptr) > 0
+        has_products = np.diff(self.products.indptr) > 0
+        for column, name in enumerate(self.reactions):
+            if self.reversible[column]:
+                directions.append((column, f'rev_{name}', True,
+                                   not keep_import_reactions and not has_products[column],
+                                   "product", "reactant"))
+            directions.append((column, name, False,
+                               not keep_import_reactions and not has_reactants[column],
+                               "reactant", "product"))
+        return directions
+
+
+    def convert_to_facts(self, keep_import_reactions:bool, use_topological_injections:bool, kept:set=None):
+        """Convert the network into ASP facts. Import reactions are removed by writing
+        them with the prefix rm_.
+
+        Args:
+            keep_import_reactions (bool): Import reactions are not removed
+            use_topological_injections (bool): Metabolite of import reaction are seeds
+            kept (set, optional): Names of the reaction directions kept after pruning,
+                                  None to keep all of them. Defaults to None.
+
+        Returns:
+            str: Network converted into ASP facts
+        """
+        facts = list()
+        for column, name, is_reversed, is_removed, reactant_side, product_side in \
+          self.get_directions(keep_import_reactions):
+            reactants = self.get_metabolites(column, reactant_side)
+            products = self.get_metabolites(column, product_side)
+            is_import_reaction = len(reactants[0]) == 0
+            # A pruned reaction only keeps the seeds it injects
+            if kept is None or name in kept:
+                if not is_reversed and self.reversible[column]:
+                    facts.append(f'reversible("{name}","rev_{name}").\n')
+                # only one metabolite involved exchange reaction are tagued as exchange
+                if self.exchange[column]:
+                    facts.append(f'exchange("{name}").\n')
+                prefix = "rm_" if is_removed else ""
+                facts.append(f'{prefix}reaction("{name}").\n')
+                ubound = -self.lbounds[column] if is_reversed else self.ubounds[column]
+                facts.append(f'{prefix}bounds("{name}","{"{:.10f}".format(0.0)}","{"{:.10f}".format(ubound)}").\n')
+                if self.transport[column]:
+                    facts.append(f'{prefix}transport("{prefix}{name}","{self.metabolites[reactants[0][0]]}",'\
+                                 f'"{self.metabolites[products[0][0]]}").\n')
+                for predicate, (rows, values) in ((f"{prefix}reactant", reactants), (f"{prefix}product", products)):
+                    for row, value in zip(rows, values):
+                        facts.append(f'{predicate}("{self.metabolites[row]}","{"{:.10f}".format(value)}",'\
+                                     f'"{name}","{METABOLITE_TYPES[self.metabolite_types[row]]}").\n')
+                if is_removed:
+                    logger.log.info(f"Reaction {self.reactions[column]} artificially removed into lp facts with a prefix 'rm_'")
+            # this reaction is a generator of seed
+            if use_topological_injections and is_import_reaction:
+                for row in products[0]:
+                    facts.append(f'seed("{self.metabolites[row]}","{METABOLITE_TYPES[self.metabolite_types[row]]}").\n')
+        return "".join(facts)
+    ########################################################
+
+
+######################## FUNCTIONS ########################
+def encode_text(text:str):
+    """Encode a text into an array of UTF-8 bytes, stored without padding
+
+    Args:
+        text (str): Text to encode
+
+    Returns:
+        ndarray: UTF-8 bytes of the text
+    """
+    return np.frombuffer(text.encode(), dtype=np.uint8)
+
+
+def decode_text(array):
+    """Decode a text encoded by encode_text()
+
+    Args:
+        array (ndarray): UTF-8 bytes of the text
+
+    Returns:
+        str: Decoded text
+    """
+    return array.tobytes().decode()
+########################################################
@@ -2,21 +2,20 @@
 #     - file (str): Path of input network file (sbml)
 #     - out_dir (str): Output directory
 #     - details (bool): Reaction Details performed if True. 
+#     - components (bool): Strongly connected components written as facts if True.
 
-import pandas as pd
 import re
 from os import path
 from seed2lp.network import Network     
-from . import flux, logger, color
+from . import flux, logger, color, components
+from .registry import REGISTRY
 import warnings
 import difflib
 import seed2lp.sbml as SBML
 import copy
+from time import time
 
 
-SRC_DIR = path.dirname(path.abspath(__file__))
-ASP_SRC_ENUM_CC = path.join(SRC_DIR, 'asp/enum-cc.lp')
-
 BISEAU_VIZ = """
 #defined reactant/4.
 #defined product/4.
@@ -38,7 +37,7 @@ obj_property(edge,arrowhead,vee).
 class Description(Network):
     def __init__(self, file:str, keep_import_reactions:bool, out_dir:str, 
                  details:bool=False, visu:bool=False, visu_no_reaction:bool=False,
-                 write_file:bool=False):
+                 write_file:bool=False, components:bool=False):
         """Initialize Object Description, herit from Network
 
         Args:
@@ -49,6 +48,8 @@ class Description(Network):
             visu (bool, optional): Graph of Network performed if True. Defaults to False.
             visu_no_reaction (bool, optional): Graph of Network without the reaction performed if True. Defaults to False.
             write_file (bool, optional): Write corrected network into SBML file if True. Defaults to False.
+            components (bool, optional): Write the strongly connected components of the network 
+                                         as facts if True. Defaults to False.
         """
         super().__init__(file, keep_import_reactions=keep_import_reactions, write_sbml=write_file)
         self.out_dir = out_dir
@@ -56,6 +57,7 @@ class Description(Network):
         self.visu = visu
         self.visu_no_reaction = visu_no_reaction
         self.write_file = write_file
+        self.components = components
         self.convert_to_facts()
         if self.keep_import_reactions:
             self.short_option="import_rxn"
@@ -102,6 +104,7 @@ class Description(Network):
     def details_from_lp(self):
         """Get the network description from lp facts and save it
         """
+        import pandas as pd
         logger.log.info("Start Getting Details from LP file")
         reactions_composition_df = pd.DataFrame(columns=['reaction', 'metabolite', 'type_metabolite', 'stoichiometry'])
         reaction_df = pd.DataFrame(columns=['reaction', 'low_bound', 'up_bound','is_forward', 'is_reverse', 'is_low_set'])
@@ -259,7 +262,7 @@ class Description(Network):
         """
         logger.log.info("Start Getting Details from Cobra file")
         warnings.filterwarnings("error")
-        model = flux.get_model(self.file)
+        model = REGISTRY.get_cobra_model(self.file)
         if not self.keep_import_reactions:
             flux.stop_flux(model)
         full_details=""
@@ -333,6 +336,26 @@ class Description(Network):
                 print(f'-> Aborted! file :{out_file_visu_no_reaction}\n')
 
 
+    def write_components(self):
+        """Decompose the network into strongly connected components 
+        and write them into a facts file (scc/2, sccedge/2, noinput/1)
+        """
+        print(f"\n\n{color.cyan_dark}############################################")  
+        print("############################################")  
+        print("                 COMPONENTS ") 
+        print("############################################") 
+        print(f"############################################\n{color.reset}") 
+        time_components = time()
+        network_components = components.get_components(self.core)
+        out_file = path.join(self.out_dir, f"{self.name}_{self.short_option}_scc.lp")
+        with open(out_file, 'w') as f:
+            f.write(components.convert_to_facts(network_components))
+        time_components = time() - time_components
+        print(f'{len(network_components["scc"])} components, {len(network_components["sccedge"])} links '\
+              f'and {len(network_components["noinput"])} roots found in {round(time_components, 3)}s')
+        print(f'-> Components written in {out_file}\n')
+
+
     def rewrite_sbml_file(self):
         """SBML file is written from corrected network
         """
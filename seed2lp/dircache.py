@@ -0,0 +1,104 @@
+# Object DirCache constitued of:
+#   - directory (str): Directory of the cached files
+#   - max_size (int): Maximum size of the cache in bytes
+#   - extension (str): Extension of the cached files
+#   - name (str): Name of the cache in the log messages
+#   - hits (int): Number of files loaded from the cache
+#   - misses (int): Number of files not found and added to the cache
+#
+# Size bounded directory of files named after their key, shared by the
+# ground cache and the network cache which compute the keys and the content
+# of the files.
+# Files are evicted by least recent use (modification time, updated at each
+# hit) once the cache is bigger than its maximum size.
+
+from os import path, listdir, replace, utime, remove, getpid, stat
+from .file import is_valid_dir
+from . import logger
+
+class DirCache:
+    def __init__(self, directory:str, max_size_mb:float, extension:str, name:str):
+        """Initialize Object DirCache
+
+        Args:
+            directory (str): Directory of the cached files
+            max_size_mb (float): Maximum size of the cache in megabytes
+            extension (str): Extension of the cached files
+            name (str): Name of the cache in the log messages
+        """
+        self.directory = directory
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.extension = extension
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        is_valid_dir(self.directory)
+
+
+    ######################## METHODS ########################
+    def get_path(self, key:str):
+        """Get the path of the cached file of a key
+
+        Args:
+            key (str): Key of the cached file
+
+        Returns:
+            str: Path of the cached file
+        """
+        return path.join(self.directory, f'{key}.{self.extension}')
+
+
+    def mark_used(self, file_path:str):
+        """Mark a cached file as recently used and count the hit
+
+        Args:
+            file_path (str): Path of the cached file
+        """
+        utime(file_path)
+        self.hits += 1
+
+
+    def write(self, key:str, write_file):
+        """Write the cached file of a key then evict the least recently used files
+
+        Args:
+            key (str): Key of the cached file
+            write_file (function): Writes the content of the file, given the path to write
+
+        Returns:
+            str: Path of the cached file
+        """
+        file_path = self.get_path(key)
+        # Written under a temporary name so that concurrent runs never read a partial file
+        temp_path = f'{file_path}.{getpid()}.tmp'
+        write_file(temp_path)
+        replace(temp_path, file_path)
+        self.evict()
+        return file_path
+
+
+    def evict(self):
+        """Delete the least recently used files while the cache
+        is bigger than its maximum size. The most recent one is always kept.
+        Files evicted at the same time by another process sharing the directory are ignored.
+        """
+        files = list()
+        for name in listdir(self.directory):
+            if name.endswith(f'.{self.extension}'):
+                file = path.join(self.directory, name)
+                try:
+                    file_stat = stat(file)
+                except FileNotFoundError:
+                    continue
+                files.append((file_stat.st_mtime, file_stat.st_size, file))
+        files.sort()
+        size = sum(file_size for _, file_size, _ in files)
+        while size > self.max_size and len(files) > 1:
+            _, file_size, file = files.pop(0)
+            size -= file_size
+            try:
+                remove(file)
+            except FileNotFoundError:
+                continue
+            logger.print_log(f'{self.name}: {path.basename(file)} evicted', 'debug')
+    ########################################################
@@ -56,13 +56,13 @@ def existing_file(filepath):
     
 
 def save(filename:str, directory:str, results, type:str, is_result_temp=False):
-    """Save data into file dependinf on type (json / tsv)
+    """Save data into file dependinf on type (json / tsv / txt / npz)
 
     Args:
         filename (str): Filename of saved file
         directory (str): Output directory where to save file
-        results: Results data in dictionnary (json) or datatrame (tsv)
-        type (str): Type of output fils (json or tsv or txt)
+        results: Results data in dictionnary (json), datatrame (tsv) or dictionnary of arrays (npz)
+        type (str): Type of output fils (json or tsv or txt or npz)
     """
 
     out_file_path = path.join(directory,filename)
@@ -91,6 +91,10 @@ def save(filename:str, directory:str, results, type:str, is_result_temp=False):
                     out_file_path += '.txt'
                 with open(out_file_path, "w") as f:
                     f.write("\n".join(results))
+            # Dictionnary of arrays is given
+            case 'npz':
+                from numpy import savez_compressed
+                savez_compressed(out_file_path, **results)
     except  Exception as e:
         logger.log.error(f"while saving file: {e}")
     
@@ -1,9 +1,13 @@
-import cobra
+from __future__ import annotations
 from re import sub
-from cobra.core import Model
+from typing import TYPE_CHECKING
 import warnings
 from . import logger, color
 
+# cobra is only imported by the runs using it
+if TYPE_CHECKING:
+    from cobra.core import Model
+
 def get_model(model_file:str):
     """Get cobra model
 
@@ -13,6 +17,7 @@ def get_model(model_file:str):
     Returns:
         Model: The model generated from cobra
     """
+    import cobra
     model = cobra.io.read_sbml_model(model_file)
     return model
 
@@ -247,6 +252,8 @@ def calculate(model:Model, list_objective:list, list_seeds:list,
                 logger.log.info("... OK")
             else:
                 logger.log.info("... KO")
+        if ok_result:
+            break
 
     result = {'id' : species,
             'objective_flux_seeds': objective_flux_seeds,
@@ -0,0 +1,96 @@
+# Object FluxCache constitued of:
+#   - results (dict): Flux check result (OK, flux) of each set of seeds already tested
+#   - ko_index (dict): For each metabolite, bitset of the rejected sets of seeds containing it
+#   - ko_number (int): Number of rejected sets of seeds indexed
+#   - cuts (list): Sets of metabolites of which at least one seed is needed to have flux
+#   - hits (int): Number of sets of seeds answered without flux calculation
+#   - misses (int): Number of sets of seeds needing a flux calculation
+#
+# Opening import for more seeds can only grow the feasible flux region:
+# every subset of a rejected set of seeds is also rejected, and so is every
+# set of seeds having none of the metabolites of a cut. Cuts only answer
+# the flux checks: they are never given to the solver as constraints, the
+# solutions do not depend on the flux engine finding them.
+
+class FluxCache:
+    def __init__(self):
+        """Initialize Object FluxCache
+        """
+        self.results = dict()
+        self.ko_index = dict()
+        self.ko_number = 0
+        self.cuts = list()
+        self.hits = 0
+        self.misses = 0
+
+
+    ######################## METHODS ########################
+    def reset_counters(self):
+        """Reset hits and misses counters, the cached results are kept
+        """
+        self.hits = 0
+        self.misses = 0
+
+
+    def has_ko_superset(self, seeds:frozenset):
+        """Check if a rejected set of seeds containing all given seeds is known.
+        The rejected sets containing each seed are intersected as bitsets.
+
+        Args:
+            seeds (frozenset): Set of seeds to test
+
+        Returns:
+            bool: True if a known rejected set of seeds includes the given one
+        """
+        entries = (1 << self.ko_number) - 1
+        for seed in seeds:
+            entries &= self.ko_index.get(seed, 0)
+            if not entries:
+                return False
+        return entries != 0
+
+
+    def get(self, seeds:frozenset):
+        """Get the flux check result of a set of seeds if it is known or can be deduced
+
+        Args:
+            seeds (frozenset): Set of seeds to test
+
+        Returns:
+            tuple: (OK, flux) or None if a flux calculation is needed.
+                   The flux is None when the result is deduced from a rejected superset or a cut.
+        """
+        if seeds in self.results:
+            self.hits += 1
+            return self.results[seeds]
+        if self.has_ko_superset(seeds) or any(cut.isdisjoint(seeds) for cut in self.cuts):
+            self.hits += 1
+            return False, None
+        self.misses += 1
+        return None
+
+
+    def add(self, seeds:frozenset, ok:bool, objective_flux:float):
+        """Store the flux check result of a set of seeds
+
+        Args:
+            seeds (frozenset): Set of seeds tested
+            ok (bool): The objective reaction has flux
+            objective_flux (float): Flux of the objective reaction
+        """
+        self.results[seeds] = (ok, objective_flux)
+        if not ok and not self.has_ko_superset(seeds):
+            bit = 1 << self.ko_number
+            for seed in seeds:
+                self.ko_index[seed] = self.ko_index.get(seed, 0) | bit
+            self.ko_number += 1
+
+
+    def add_cut(self, cut:list):
+        """Store a cut, the sets of seeds having none of its metabolites are rejected
+
+        Args:
+            cut (list): Metabolites of which at least one must be a seed to have flux
+        """
+        self.cuts.append(frozenset(cut))
+    ########################################################
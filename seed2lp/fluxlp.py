@@ -0,0 +1,317 @@
+# Object FluxLP constitued of:
+#   - metabolites (dict): Index of each metabolite (row of the stoichiometric matrix)
+#   - reactions (dict): Index of each reaction (column of the stoichiometric matrix)
+#   - stoichiometry (csr_array): Sparse stoichiometric matrix, reactions followed by one sink per metabolite
+#   - lbounds (ndarray): Lower bounds of all columns, import flux shut down and sinks closed
+#   - ubounds (ndarray): Upper bounds of all columns, import flux shut down and sinks closed
+#   - exchanges (dict): Exchange reaction opened for each exchanged metabolite,
+#                       as (index, has no reactants) tuple
+#   - objectives (list): Objective reactions as (index, sign) tuples
+#   - highs (Highs): LP kept alive between checks, rebuilt in each process
+#   - current_lbounds (ndarray): Lower bounds currently set into the LP
+#   - current_ubounds (ndarray): Upper bounds currently set into the LP
+#   - current_objective (int): Index of the objective reaction currently set into the LP
+#   - check_stats (list): Simplex iterations and solving time of each check
+#   - cuts (int): Number of rejected sets of seeds explained by a cut
+#
+# The matrix is built once from the core of the normalized network,
+# then each set of seeds only changes the bounds that differ from the
+# previous check, and the LP is solved again by the dual simplex starting
+# from the previous basis.
+# Bounds are treated like cobra does in flux.stop_flux and flux.calculate,
+# on the normalized orientation of the reactions (opening or shutting import
+# does not depend on the orientation).
+#
+# Opening more seeds only widens bounds: when the LP with every metabolite
+# opened except a set C has no flux, any set of seeds without metabolite
+# of C has no flux either. C is taken from the metabolites whose bound
+# limits the objective (reduced cost, or Farkas ray when infeasible).
+
+import numpy as np
+from scipy.sparse import hstack, identity
+from time import time
+from .core import NetworkCore
+from . import logger
+
+MAX_BOUND = 1000.0
+
+class FluxLP:
+    def __init__(self, core:NetworkCore, objectives:list):
+        """Initialize Object FluxLP
+
+        Args:
+            core (NetworkCore): Indexed arrays of the normalized network
+            objectives (list): List of objective reaction names
+        """
+        self.metabolites = dict(core.metabolite_index)
+        self.reactions = dict(core.reaction_index)
+        self.exchanges = dict()
+        self.objectives = list()
+
+        lbounds = core.lbounds.copy()
+        ubounds = core.ubounds.copy()
+        no_reactants = np.diff(core.reactants.indptr) == 0
+        no_products = np.diff(core.products.indptr) == 0
+        # Shut down the import flux
+        shut = core.exchange & no_reactants & (ubounds > 0)
+        lbounds[shut & (lbounds > 0)] = 0.0
+        ubounds[shut] = 0.0
+        shut = core.exchange & no_products & (lbounds < 0)
+        ubounds[shut & (ubounds < 0)] = 0.0
+        lbounds[shut] = 0.0
+        # As cobra, the last exchange reaction of a metabolite is the one opened
+        for index in np.flatnonzero(core.exchange):
+            for matrix in (core.reactants, core.products):
+                for row in matrix.indices[matrix.indptr[index]:matrix.indptr[index + 1]]:
+                    self.exchanges[core.metabolites[row]] = (int(index), bool(no_reactants[index]))
+
+        # One closed sink per metabolite, opened when the metabolite is a seed
+        # without exchange reaction
+        nb_metabolites = len(self.metabolites)
+        sinks = -identity(nb_metabolites, format="csc")
+        self.stoichiometry = hstack([core.get_stoichiometry(), sinks], format="csr")
+        self.lbounds = np.concatenate([lbounds, np.zeros(nb_metabolites)])
+        self.ubounds = np.concatenate([ubounds, np.zeros(nb_metabolites)])
+        self.zeros = np.zeros(nb_metabolites)
+
+        for objective in objectives:
+            index = self.reactions.get(objective)
+            # Reactants and products of the reaction are switched into the network:
+            # the objective is the opposite of the column flux
+            sign = -1.0 if index is not None and core.meta_modified[index] else 1.0
+            self.objectives.append((index, sign))
+
+        self.highs = None
+        self.current_lbounds = None
+        self.current_ubounds = None
+        self.current_objective = None
+        self.check_stats = list()
+        self.cuts = 0
+
+
+    def __getstate__(self):
+        # The HiGHS instance can not be sent through multiprocessing queues
+        state = self.__dict__.copy()
+        state['highs'] = None
+        return state
+
+
+    ######################## METHODS ########################
+    def reset_counters(self):
+        """Reset the statistics of the checks, the LP is kept
+        """
+        self.check_stats = list()
+        self.cuts = 0
+
+
+    def get_highs(self):
+        """Get the LP solver instance, built at first call with the import flux shut down
+
+        Returns:
+            Highs: HiGHS instance holding the LP
+        """
+        import highspy
+        if self.highs is None:
+            matrix = self.stoichiometry.tocsc()
+            lp = highspy.HighsLp()
+            lp.num_col_ = matrix.shape[1]
+            lp.num_row_ = matrix.shape[0]
+            lp.col_cost_ = np.zeros(matrix.shape[1])
+            lp.col_lower_ = self.lbounds
+            lp.col_upper_ = self.ubounds
+            lp.row_lower_ = self.zeros
+            lp.row_upper_ = self.zeros
+            lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+            lp.a_matrix_.start_ = matrix.indptr
+            lp.a_matrix_.index_ = matrix.indices
+            lp.a_matrix_.value_ = matrix.data
+            lp.sense_ = highspy.ObjSense.kMaximize
+
+            highs = highspy.Highs()
+            highs.setOptionValue("output_flag", False)
+            highs.setOptionValue("solver", "simplex")
+            # Dual simplex: the previous basis stays dual feasible when only bounds change
+            highs.setOptionValue("simplex_strategy", 1)
+            highs.passModel(lp)
+            self.highs = highs
+            self.current_lbounds = self.lbounds.copy()
+            self.current_ubounds = self.ubounds.copy()
+            self.current_objective = None
+        return self.highs
+
+
+    def set_bounds(self, lbounds, ubounds):
+        """Change into the LP only the bounds different from the previous check
+
+        Args:
+            lbounds (ndarray): Lower bounds of all columns
+            ubounds (ndarray): Upper bounds of all columns
+        """
+        highs = self.get_highs()
+        changed = np.flatnonzero((lbounds != self.current_lbounds) | (ubounds != self.current_ubounds))
+        if len(changed):
+            highs.changeColsBounds(len(changed), changed.astype(np.int32), 
+                                   lbounds[changed], ubounds[changed])
+            self.current_lbounds = lbounds
+            self.current_ubounds = ubounds
+
+
+    def set_objective(self, index:int, sign:float):
+        """Set the reaction to maximize into the LP
+
+        Args:
+            index (int): Index of the objective reaction
+            sign (float): -1 if the objective is the opposite of the column flux
+        """
+        highs = self.get_highs()
+        if self.current_objective is not None:
+            highs.changeColCost(self.current_objective, 0.0)
+        highs.changeColCost(index, sign)
+        self.current_objective = index
+
+
+    def get_seeds_bounds(self, seeds:list):
+        """Open the import flux of the seeds: exchange reactions are opened
+        to the maximum flux and a sink is opened for the other seeds
+
+        Args:
+            seeds (list): Set of seeds
+
+        Returns:
+            ndarray, ndarray: Lower and upper bounds of all columns
+        """
+        lbounds = self.lbounds.copy()
+        ubounds = self.ubounds.copy()
+        nb_reactions = len(self.reactions)
+        for seed in seeds:
+            if seed in self.exchanges:
+                index, no_reactants = self.exchanges[seed]
+                if no_reactants:
+                    ubounds[index] = MAX_BOUND
+                    if lbounds[index] >= 0:
+                        lbounds[index] = -MAX_BOUND
+                else:
+                    lbounds[index] = -MAX_BOUND
+                    if ubounds[index] <= 0:
+                        ubounds[index] = MAX_BOUND
+            elif seed in self.metabolites:
+                index = nb_reactions + self.metabolites[seed]
+                lbounds[index] = -MAX_BOUND
+                ubounds[index] = MAX_BOUND
+        return lbounds, ubounds
+
+
+    def get_seed_column(self, metabolite:str):
+        """Get the column opened when the metabolite is a seed
+
+        Args:
+            metabolite (str): Metabolite name
+
+        Returns:
+            int: Index of the exchange reaction or of the sink of the metabolite
+        """
+        if metabolite in self.exchanges:
+            return self.exchanges[metabolite][0]
+        return len(self.reactions) + self.metabolites[metabolite]
+
+
+    def solve(self, lbounds, ubounds, limiting:set=None):
+        """Maximize the objective reactions with the given bounds, as cobra
+        the first objective reaction having flux stops the calculation
+
+        Args:
+            lbounds (ndarray): Lower bounds of all columns
+            ubounds (ndarray): Upper bounds of all columns
+            limiting (set, optional): Filled with the columns whose bounds limit
+                                      the objectives. Defaults to None.
+
+        Returns:
+            bool, float, int: Return if an objective reaction has flux (True) or not (False),
+                              the flux of the first objective reaction having flux 
+                              (of the last one otherwise) and the simplex iterations
+        """
+        import highspy
+        self.set_bounds(lbounds, ubounds)
+        highs = self.get_highs()
+        objective_flux = None
+        iterations = 0
+        for index, sign in self.objectives:
+            objective_flux = 0.0
+            if index is not None:
+                if index != self.current_objective:
+                    self.set_objective(index, sign)
+                highs.run()
+                iterations += highs.getInfo().simplex_iteration_count
+                status = highs.getModelStatus()
+                # Infeasible or unbounded problems have no flux, as with cobra
+                if status == highspy.HighsModelStatus.kOptimal:
+                    objective_flux = sign * highs.getSolution().col_value[index]
+                    reduced_costs = np.array(highs.getSolution().col_dual)
+                elif status == highspy.HighsModelStatus.kInfeasible:
+                    _, has_ray, ray = highs.getDualRay()
+                    reduced_costs = self.stoichiometry.T @ ray if has_ray else None
+                else:
+                    reduced_costs = None
+                if limiting is not None and reduced_costs is not None:
+                    limiting.update(np.flatnonzero(np.abs(reduced_costs) > 1e-9))
+            if objective_flux > 10e-5:
+                return True, objective_flux, iterations
+        return False, objective_flux, iterations
+
+
+    def check(self, seeds:list):
+        """Maximize each objective reaction with the import flux of the seeds opened.
+        The LP is solved again from the basis of the previous check.
+
+        Args:
+            seeds (list): Set of seeds to test
+
+        Returns:
+            bool, float: Return if an objective reaction has flux (True) or not (False)
+                         and the flux of the first objective reaction having flux
+        """
+        start = time()
+        ok, objective_flux, iterations = self.solve(*self.get_seeds_bounds(seeds))
+        check_time = time() - start
+        self.check_stats.append((iterations, check_time))
+        logger.log.debug(f"LP check: {iterations} simplex iterations, {check_time:.4f}s")
+        return ok, objective_flux
+
+
+    def explain_ko(self, seeds:list):
+        """Explain why a set of seeds has no flux: find metabolites such that 
+        at least one of them must be a seed for any set of seeds to have flux.
+
+        Args:
+            seeds (list): Rejected set of seeds
+
+        Returns:
+            list: Metabolites of the cut, None if no cut is found
+        """
+        limiting = set()
+        ok, _, _ = self.solve(*self.get_seeds_bounds(seeds), limiting)
+        if ok:
+            return None
+        opened = set(seeds)
+        cut = [metabolite for metabolite in self.metabolites 
+               if metabolite not in opened and self.get_seed_column(metabolite) in limiting]
+        # The cut is kept only if opening all other metabolites gives no flux
+        others = set(self.metabolites).difference(cut)
+        ok, _, _ = self.solve(*self.get_seeds_bounds(others))
+        if ok:
+            return None
+        self.cuts += 1
+        return sorted(cut)
+
+
+    def get_counters(self):
+        """Summarize the statistics of the checks done since the last reset
+
+        Returns:
+            dict: Number of checks, simplex iterations, solving time and cuts
+        """
+        return {'checks': len(self.check_stats),
+                'iterations': sum(stat[0] for stat in self.check_stats),
+                'time': round(sum(stat[1] for stat in self.check_stats), 3),
+                'cuts': self.cuts}
+    ########################################################
@@ -0,0 +1,88 @@
+# Object GroundCache, herit from DirCache, no added properties:
+#   the cached files are the ground programs (aspif files), hits count the ground
+#   programs loaded from the cache and misses the ones grounded and added to it.
+#
+# The ground program only depends on the instance facts, the encoding files
+# and the clingo constants: they are hashed into the key of the aspif file.
+# Runs on the same network with other solving options (solve mode, time limit,
+# number of solutions...) load the aspif file instead of grounding again.
+
+import clingo
+from hashlib import sha256
+from os import path
+from .dircache import DirCache
+
+class GroundCache(DirCache):
+    def __init__(self, directory:str, max_size_mb:float=512):
+        """Initialize Object GroundCache
+
+        Args:
+            directory (str): Directory of the cached ground programs
+            max_size_mb (float, optional): Maximum size of the cache in megabytes. Defaults to 512.
+        """
+        super().__init__(directory, max_size_mb, 'aspif', 'Ground cache')
+
+
+    ######################## METHODS ########################
+    def get_key(self, asp_files:list, constants:list, facts:str=""):
+        """Hash the instance facts, the content of the ASP files and the clingo constants
+
+        Args:
+            asp_files (list): Encoding files, in grounding order
+            constants (list): Clingo constants (-c name=value)
+            facts (str, optional): Facts of the instance. Defaults to "".
+
+        Returns:
+            str: Key of the ground program
+        """
+        key = sha256()
+        key.update(sha256(facts.encode()).digest())
+        for file in asp_files:
+            with open(file, 'rb') as f:
+                key.update(sha256(f.read()).digest())
+        key.update(' '.join(constants).encode())
+        return key.hexdigest()
+
+
+    def get(self, key:str):
+        """Get the cached ground program of a key, marked as recently used
+
+        Args:
+            key (str): Key of the ground program
+
+        Returns:
+            str: Path of the aspif file, None if not cached
+        """
+        aspif_path = self.get_path(key)
+        if not path.isfile(aspif_path):
+            self.misses += 1
+            return None
+        self.mark_used(aspif_path)
+        return aspif_path
+
+
+    def add(self, key:str, asp_files:list, options:list, facts:str=""):
+        """Ground the instance facts and the ASP files and write the ground program 
+        in aspif format. The program is only written, not passed to a solver.
+
+        Args:
+            key (str): Key of the ground program
+            asp_files (list): Encoding files, in grounding order
+            options (list): Clingo options of the control
+            facts (str, optional): Facts of the instance. Defaults to "".
+
+        Returns:
+            str: Path of the aspif file
+        """
+        def write_aspif(temp_path:str):
+            ctrl = clingo.Control(options)
+            ctrl.register_backend(clingo.BackendType.Aspif, temp_path, True)
+            ctrl.add("base", [], facts)
+            for file in asp_files:
+                ctrl.load(file)
+            ctrl.ground([("base", [])])
+            # The aspif file is completed at the end of the step
+            ctrl.solve()
+            del ctrl
+        return self.write(key, write_aspif)
+    ########################################################
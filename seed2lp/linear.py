@@ -1,13 +1,24 @@
 # Object Hybrid, herit from Solver, added properties:
 #    - temp_dir (str): temporary directory for saving instance file and clingo outputs
-#    - instance_file (str): Path of instance file for solving
 #               1 -> Atom output
 #               2 -> Json output
+#    - flux_storage (str): Storage of the reaction fluxes of solutions:
+#               json -> list of reaction and flux into the result file
+#               npz -> matrix into a sidecar npz file, referenced from the result file
+#    - nonzero_flux (bool): Keep only objective and non-zero reaction fluxes
+#    - reactions (dict): Index of each reaction into the flux arrays of all solvings
+#    - flux_models (list): Name of the solutions stored into the npz file
+#    - flux_rows (list): Flux array of the solutions stored into the npz file
+#    - flux_file (str): Filename of the npz file
+#    - sessions (dict): Ground program session of each set of clingo constants,
+#               the program is grounded once for the searches using the same files
 
 # Object FBA, herit from Hybrid, no property added
 
+import numpy as np
 from seed2lp.network import Network
 from seed2lp.solver import Solver
+from seed2lp.session import GroundSession
 from . import clingo_lpx, color, logger
 
 
@@ -22,7 +33,8 @@ class Hybrid(Solver):
                  minimize:bool=False, subset_minimal:bool=False, 
                  maximize_flux:bool=False,
                  temp_dir:str=None, short_option:str=None, 
-                 verbose:bool=False):
+                 verbose:bool=False, flux_storage:str="json",
+                 nonzero_flux:bool=False):
         """Initialize Object Hybrid, herit from Solver
 
         Args:
@@ -42,6 +54,9 @@ class Hybrid(Solver):
             temp_dir (str, optional): Temporary directory for saving instance file and clingo outputs. Defaults to None.
             short_option (str, optional): Short way to write option on filename. Defaults to None.
             verbose (bool, optional): Set debug mode. Defaults to False.
+            flux_storage (str, optional): Storage of the reaction fluxes of solutions (json or npz). 
+                                          Defaults to "json".
+            nonzero_flux (bool, optional): Keep only objective and non-zero reaction fluxes. Defaults to False.
         """
         super().__init__(run_mode, network, time_limit_minute, number_solution, clingo_configuration, 
                          clingo_strategy, intersection, union, minimize, subset_minimal, temp_dir, short_option, run_solve, verbose)
@@ -50,9 +65,16 @@ class Hybrid(Solver):
         self.maximize_flux = maximize_flux
         self.temp_dir = temp_dir
         self.short_option = short_option
+        self.flux_storage = flux_storage
+        self.nonzero_flux = nonzero_flux
+        self.reactions = dict()
+        self.flux_models = list()
+        self.flux_rows = list()
+        self.flux_file = f'{self.network.name}_{self.short_option}_lp_fluxes.npz'
+        self.sessions = dict()
         self.get_init_message()
         self._init_clingo_constant()
-        self._set_instance_file()
+        self._set_instance()
         
 
     ######################## METHODS ########################
@@ -87,7 +109,7 @@ class Hybrid(Solver):
             self.get_message('optimum error')
             self.get_message('end')
             return
-        files = [self.network.instance_file, self.asp.ASP_SRC_SEED_SOLVING, self.asp.ASP_SRC_FLUX]
+        files = [self.asp.ASP_SRC_SEED_SOLVING, self.asp.ASP_SRC_FLUX]
         if self.maximize_flux:
             files.append(self.asp.ASP_SRC_MAXIMIZE_FLUX)
         if self.subset_minimal:
@@ -173,23 +195,71 @@ class Hybrid(Solver):
         self.network.add_result_seeds('HYBRID', search_mode, model_name, len, seeds, flux_dict)
 
 
-    def get_objectives_flux(self, flux_list):
-        """From a list of all reaction and associated LP flux, find objective reactions
+    def get_objectives_flux(self, flux):
+        """From the array of LP flux of all reactions, find objective reactions
         and create a dictionnary to stock the LP flux
 
         Args:
-            flux_list (list): List of all reaction name and associated LP flux
+            flux (ndarray): LP flux of all reactions, given by their index
 
         Returns:
             Dict: A dictionnary of Objective reaction with it associated flux
         """
         obj_flux_dict = dict()
-        for line in flux_list:
-            reaction = line[0]
-            if reaction in self.network.objectives:
-                obj_flux_dict[reaction] = line[1]
+        for reaction in self.network.objectives:
+            index = self.reactions.get(reaction)
+            if index is not None and index < len(flux):
+                obj_flux_dict[reaction] = float(flux[index])
         return obj_flux_dict
-        
+
+
+    def get_reaction_flux(self, output_type:str, model_name:str, flux):
+        """Convert the array of LP flux of a solution into its output:
+        a list of reactions and flux, or a reference to the row of the npz file
+
+        Args:
+            output_type (str): Output type of the solving
+            model_name (str): model name
+            flux (ndarray): LP flux of all reactions, given by their index
+
+        Returns:
+            list | dict: List of reaction and flux, or reference to the npz file
+        """
+        if self.flux_storage == "npz":
+            self.flux_models.append(f'{output_type}/{model_name}')
+            self.flux_rows.append(flux)
+            return {"file": self.flux_file, 
+                    "row": len(self.flux_rows) - 1,
+                    "objective_flux": list(self.get_objectives_flux(flux).items())}
+        reaction_flux = list()
+        for reaction, index in self.reactions.items():
+            if index < len(flux) and (not self.nonzero_flux or flux[index] != 0 
+                                      or reaction in self.network.objectives):
+                reaction_flux.append((reaction, float(flux[index])))
+        return reaction_flux
+
+
+    def get_flux_data(self):
+        """Build the data of the npz file: reactions, solutions and float64 matrix 
+        of the LP flux (one row per solution)
+
+        Returns:
+            dict: Arrays saved into the npz file, None if no flux is stored
+        """
+        if not self.flux_rows:
+            return None
+        flux = np.zeros((len(self.flux_rows), len(self.reactions)))
+        for row, flux_row in enumerate(self.flux_rows):
+            flux[row, :len(flux_row)] = flux_row
+        reactions = np.array(list(self.reactions), dtype=str)
+        if self.nonzero_flux:
+            kept = np.any(flux != 0, axis=0) | np.isin(reactions, self.network.objectives)
+            flux = flux[:, kept]
+            reactions = reactions[kept]
+        return {'reactions': reactions,
+                'models': np.array(self.flux_models, dtype=str),
+                'flux': flux}
+
 
 
     def solve(self, asp_files:list=[], search_mode:str=""):
@@ -216,18 +286,8 @@ class Hybrid(Solver):
 
         match search_mode:
             case "minimize-one-model":
-                cmd = clingo_lpx.command(files=asp_files, options=full_option,
-                                         time_limit=self.time_limit)
-                cmd_str = ' '.join(cmd)
-                proc_output, err, error_code, \
-                    memory, is_killed = clingo_lpx.solve(cmd, self.time_limit)
-                self.get_message("command")
-                logger.print_log(f'{cmd_str}', 'debug')
-                
-                self.get_error(error_code, err)
-                output_full_list, unsatisfiable, self.optimum_found, full_timers, opt = clingo_lpx.result_convert(proc_output,
-                                                                                           self.network.objectives, 
-                                                                                           "", is_killed, False)
+                result_data, memory = self.solve_clingo_lpx(asp_files, full_option)
+                output_full_list, unsatisfiable, self.optimum_found, full_timers, opt = clingo_lpx.result_convert(result_data, "", False)
                 if unsatisfiable:
                     logger.print_log('Unsatisfiable problem', "error") 
 
@@ -253,16 +313,8 @@ class Hybrid(Solver):
                     logger.print_log('Optimum not found', "error") 
 
             case "minimize-enumeration":
-                cmd = clingo_lpx.command(files=asp_files, options=full_option, nb_model= self.number_solution,
-                                         time_limit=self.time_limit)
-                cmd_str = ' '.join(cmd)
-                proc_output, err, error_code, \
-                    memory, is_killed = clingo_lpx.solve(cmd, self.time_limit)
-                self.get_message("command")
-                logger.print_log(f'{cmd_str}', 'debug')
-                self.get_error(error_code, err)
-                solution_list, unsatisfiable, _, full_timers, _ = clingo_lpx.result_convert(proc_output,
-                                                                            self.network.objectives, "enumeration", is_killed)
+                result_data, memory = self.solve_clingo_lpx(asp_files, full_option, "enumeration", self.number_solution)
+                solution_list, unsatisfiable, _, full_timers, _ = clingo_lpx.result_convert(result_data, "enumeration")
                 if unsatisfiable:
                     logger.print_log('Unsatisfiable problem', "error") 
                 else:
@@ -272,16 +324,8 @@ class Hybrid(Solver):
                         self.add_result_seeds(search_mode, model_name, solution[1], solution[3], obj_flux_dict)
 
             case "submin-enumeration":
-                cmd = clingo_lpx.command(files=asp_files, options=full_option, nb_model= self.number_solution,
-                                         time_limit=self.time_limit)
-                cmd_str = ' '.join(cmd)
-                proc_output, err, error_code, \
-                    memory, is_killed = clingo_lpx.solve(cmd, self.time_limit)
-                self.get_message("command")
-                logger.print_log(f'{cmd_str}', 'debug')
-                self.get_error(error_code, err)
-                solution_list, unsatisfiable, _, full_timers,_ = clingo_lpx.result_convert(proc_output,
-                                                                            self.network.objectives, "enumeration", is_killed)
+                result_data, memory = self.solve_clingo_lpx(asp_files, full_option, "enumeration", self.number_solution)
+                solution_list, unsatisfiable, _, full_timers,_ = clingo_lpx.result_convert(result_data, "enumeration")
                 if unsatisfiable:
                     logger.print_log('Unsatisfiable problem', "error") 
                 else:
@@ -291,16 +335,8 @@ class Hybrid(Solver):
                         self.add_result_seeds(search_mode, model_name, solution[1], solution[3], obj_flux_dict)
 
             case "minimize-intersection":
-                cmd = clingo_lpx.command(files=asp_files, options=full_option,
-                                         time_limit=self.time_limit)
-                cmd_str = ' '.join(cmd)
-                proc_output, err, error_code, \
-                    memory, is_killed = clingo_lpx.solve(cmd, self.time_limit)
-                self.get_message("command")
-                logger.print_log(f'{cmd_str}', 'debug')
-                self.get_error(error_code, err)
-                output_full_list, unsatisfiable, _, full_timers = clingo_lpx.result_convert(proc_output,
-                                                                                self.network.objectives, 'cautious', is_killed)
+                result_data, memory = self.solve_clingo_lpx(asp_files, full_option, 'cautious')
+                output_full_list, unsatisfiable, _, full_timers, _ = clingo_lpx.result_convert(result_data, 'cautious')
                 if unsatisfiable:
                     logger.print_log('Unsatisfiable problem', "error") 
                 elif output_full_list:
@@ -312,17 +348,8 @@ class Hybrid(Solver):
 
 
             case "submin-intersection": 
-                cmd = clingo_lpx.command(files=asp_files, options=full_option,
-                                         time_limit=self.time_limit)
-                cmd_str = ' '.join(cmd)
-                proc_output, err, error_code, \
-                    memory, is_killed = clingo_lpx.solve(files=asp_files, options=full_option,
-                                         time_limit=self.time_limit)
-                self.get_message("command")
-                logger.print_log(f'{cmd_str}', 'debug')
-                self.get_error(error_code, err)
-                output_full_list, unsatisfiable, _, full_timers = clingo_lpx.result_convert(proc_output,
-                                                                                self.network.objectives, 'cautious', is_killed)
+                result_data, memory = self.solve_clingo_lpx(asp_files, full_option, 'cautious')
+                output_full_list, unsatisfiable, _, full_timers, _ = clingo_lpx.result_convert(result_data, 'cautious')
                 if unsatisfiable:
                     logger.print_log('Unsatisfiable problem', "error") 
                 elif output_full_list:
@@ -337,27 +364,58 @@ class Hybrid(Solver):
         else:
             timer["Grounding time"] = "Time out"
             timer["Solving time"] = "Time out"
+        for model_name, solution in solution_list.items():
+            solution[5] = self.get_reaction_flux(output_type, model_name, solution[5])
         results ["Timer"] = timer       
         results ["Memory (GB)"] = memory 
         results['solutions']= solution_list
         self.output[output_type] = results
 
 
-    def get_error(self,error_code:int, err:bytes):
-        """Get and print error
+    def solve_clingo_lpx(self, asp_files:list, full_option:list, enum_mode:str="", nb_model:int=0):
+        """Solve with the clingo-lpx theory into the current process
 
         Args:
-            error_code (int): Code error from Python process
-            err (bytes): Error text from python process
+            asp_files (list): List of ASP files used for sovling.
+            full_option (list): All Clingo option
+            enum_mode (str, optional): Enumeration mode, all witnesses are kept only for "enumeration". 
+                                       Defaults to "".
+            nb_model (int, optional): Limit number of solutions to find. Defaults to 0 meaning unlimited.
 
-        Raises:
-            ValueError: Raise an error and stop the program when value of code < 0
+        Returns:
+            result_data (dict), memory (float): Output of the solver and memory used
+        """
+        session = self.get_session()
+        # The constants and the configuration are already options of the session
+        options = [option for option in clingo_lpx.command(full_option, nb_model) 
+                   if option not in session.options]
+        # Memory needed by the grounding and the solving, not by the whole process
+        memory = clingo_lpx.reset_peak_memory()
+        ctrl = session.get_control(asp_files, options)
+        time_ground = session.grounding_time
+        self.get_message("command")
+        logger.print_log(session.get_command(options), 'debug')
+        result_data, _ = clingo_lpx.solve(ctrl, session.theory, self.time_limit, 
+                                          self.network.objectives, enum_mode, 
+                                          reactions=self.reactions, time_ground=time_ground)
+        memory = clingo_lpx.get_peak_memory() - memory
+        return result_data, round(memory, 3)
+
+
+    def get_session(self):
+        """Get the ground program session of the current clingo constants,
+        created at first call
+
+        Returns:
+            GroundSession: Session shared by all the searches using these constants
         """
-        if error_code and error_code<0:
-            print(f'error_code = {error_code}')
-            raise ValueError(err.decode())
-        elif err:
-            logger.print_log(err.decode(), 'debug')
+        options = self.clingo_constant + [self.clingo_configuration, self.clingo_strategy]
+        key = tuple(options)
+        if key not in self.sessions:
+            from clingolpx import ClingoLPXTheory
+            self.sessions[key] = GroundSession(options, facts=self.instance, 
+                                               theory_class=ClingoLPXTheory)
+        return self.sessions[key]
 
      ######################################################## 
 
@@ -373,7 +431,8 @@ class FBA(Hybrid):
                  minimize:bool=False, subset_minimal:bool=False, 
                  maximize_flux:bool=False, 
                  temp_dir:str=None, short_option:str=None,
-                 verbose:bool=False):
+                 verbose:bool=False, flux_storage:str="json",
+                 nonzero_flux:bool=False):
         """Initialize Object Hybrid, herit from Solver
 
         Args:
@@ -392,6 +451,9 @@ class FBA(Hybrid):
             temp_dir (str, optional): Temporary directory for saving instance file and clingo outputs. Defaults to None.
             short_option (str, optional): Short way to write option on filename. Defaults to None.
             verbose (bool, optional): Set debug mode. Defaults to False.
+            flux_storage (str, optional): Storage of the reaction fluxes of solutions (json or npz). 
+                                          Defaults to "json".
+            nonzero_flux (bool, optional): Keep only objective and non-zero reaction fluxes. Defaults to False.
         """
         super().__init__(run_mode, None, network, 
                          time_limit_minute, number_solution, 
@@ -399,7 +461,7 @@ class FBA(Hybrid):
                          intersection, union, minimize,
                          subset_minimal, maximize_flux, 
                          temp_dir, short_option, 
-                         verbose)
+                         verbose, flux_storage, nonzero_flux)
 
     ######################## METHODS ########################
 
@@ -31,30 +31,3 @@ class Metabolite:
     def _set_stoichiometry(self, stoichiometry:float):
         self.stoichiometry = stoichiometry
     ########################################################
-
-
-    ######################## METHODS ########################
-    def convert_to_facts(self, metabolite_type:str, reaction_name:str=None):
-        """Convert metabolite into ASP facts : an atom reactant or product, associated to a reaction 
-        and having a stoichiometry value
-
-        Args:
-            metabolite_type (str): Type of metabolite (exchange, transport, other)
-            reaction_name (str, optional): Name of the reaction associated to the metabolite. Defaults to None.
-
-        Returns:
-            facts (str): The ASP atom created
-        """
-        facts = ""
-        match metabolite_type:
-            case "reactant"|"product":
-                
-                facts += f'{metabolite_type}("{self.name}","{"{:.10f}".format(self.stoichiometry)}","{reaction_name}","{self.type}").\n'
-            case "seed":
-                facts += f'{metabolite_type}("{self.name}","{self.type}").\n'
-            case _:
-                facts += f'{metabolite_type}("{self.name}","{"{:.10f}".format(self.stoichiometry)}","{reaction_name}","{self.type}").\n'
-        return facts
-
-
-    ########################################################
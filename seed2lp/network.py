@@ -2,24 +2,39 @@
 #   - file (str): Path of input network file (sbml)
 #   - run_mode (str): Running command used (full or target)
 #   - name (str): Species name/ID from file name
+#   - sbml_model (dict): Species, parameters, reactions and objectives streamed from the SBML file,
+#                        shared through the registry
 #   - targets_as_seeds (bool): Targets can't be seeds and are noted as forbidden
 #   - use_topological_injections (bool): Metabolite of import reaction are seeds
 #   - keep_import_reactions (bool): Import reactions are removed
 #   - reactions (list): List of reactions (object Reaction)
+#   - messages (tuple): Warning and info messages of the normalization
+#   - core (NetworkCore): Indexed arrays of the normalized network, kept after simplification
 #   - targets (list): List of target (object Metabolite)
 #   - seeds (list): List of seed given by the user (object Metabolite)
 #   - possible_seeds (list): List of possible seeds given by the user (object Metabolite)
 #   - forbiddend_seed (list): List of forbidden seeds (object Metabolite)
+#   - network_facts (str): Facts of the reactions, without the user inputs, stored into the network cache
 #   - facts (str): Conversion sbml into asp facts
-#   - fluxes (list): List of flux check on all set of seeds
+#   - preprocessed_facts (str): Facts for the reasoning with the precomputed topological rules 
+#                               and without the pruned reactions, empty when not preprocessed
+#   - preprocessing (dict): Sizes of the network and facts before and after preprocessing
+#   - fluxes (DataFrame): Flux check on all set of seeds (see check_fluxes)
+#   - flux_engine (str): Engine checking the flux of sets of seeds (cobra or lp)
+#   - flux_model (Model | FluxLP): Cobra model or sparse LP built once and reused to check sets of seeds
+#   - flux_cache (FluxCache): Flux check results of already tested sets of seeds
 
 import os
-import pandas as pd
 from .reaction import Reaction
 import seed2lp.sbml as SBML
 from .utils import quoted
 from . import flux
 from .resmod import Resmod
+from .fluxcache import FluxCache
+from .topology import Topology
+from .core import NetworkCore, encode_text, decode_text
+from .networkcache import NetworkCache
+from .registry import REGISTRY
 from time import time
 from . import color
 from . import logger
@@ -44,7 +59,7 @@ is not used"""
 class Network:
     def __init__(self, file:str, run_mode:str=None, targets_as_seeds:bool=False, use_topological_injections:bool=False, 
                  keep_import_reactions:bool=True, input_dict:dict=None, accumulation:bool=False, to_print:bool=True, 
-                 write_sbml:bool=False):
+                 write_sbml:bool=False, flux_engine:str="cobra", network_cache:NetworkCache=None):
         """Initialize Object Network
 
         Args:
@@ -56,6 +71,10 @@ class Network:
             accumulation (bool, optional): Is accumulation authorized. Defaults to False.
             to_print (bool, optional): Write messages into console if True. Defaults to True.
             write_sbml (bool, optional): Is a writing SBML file mode or not. Defaults to False.
+            flux_engine (str, optional): Engine checking the flux of sets of seeds (cobra or lp). 
+                                        Defaults to "cobra".
+            network_cache (NetworkCache, optional): Cache of the normalized networks, not used when 
+                                                    writing SBML file. Defaults to None.
         """
         self.file = file
         self.run_mode = run_mode
@@ -63,10 +82,13 @@ class Network:
         self._set_file_extension(file)
         self._set_name()
 
-        self.sbml, self.sbml_first_line = SBML.get_root(self.file)
-        self.model = SBML.get_model(self.sbml)
-        self.fbc = SBML.get_fbc(self.sbml)
-        self.parameters = SBML.get_listOfParameters(self.model)
+        self.sbml_model = REGISTRY.get_sbml_model(self.file)
+        self.fbc = self.sbml_model["fbc"]
+        # The parameters are completed when the SBML file is rewritten
+        self.parameters = dict(self.sbml_model["parameters"])
+        # The whole tree is only needed to rewrite the SBML file
+        self.sbml, self.sbml_first_line = SBML.get_root(self.file) if write_sbml else (None, "")
+        self.model = SBML.get_model(self.sbml) if write_sbml else None
 
         self.targets_as_seeds = targets_as_seeds
         self.use_topological_injections = use_topological_injections
@@ -89,20 +111,39 @@ class Network:
         self.possible_seeds = list()
         self.is_subseed = False
         self.forbidden_seeds = list()
+        self.messages = ("", "")
+        self.network_facts = ""
         self.facts = ""
-        self.meta_exchange_list = list()
-        self.meta_transport_list = list()
+        self.preprocessed_facts = ""
+        self.preprocessing = dict()
+        self.exchanged_metabolites = set()
+        self.transported_metabolites = set()
+        self.core = None
         # metabolite of import reaction having multiple metabolite such as None -> A+B
         self.meta_multiple_import_list = list()
         self.accumulation = accumulation
 
-        self.instance_file=str()
-
         if self.run_mode is not None:
             self.init_with_inputs(input_dict)
-        self.get_network(to_print, write_sbml)
+        if network_cache is not None and not write_sbml:
+            self.get_cached_network(network_cache, to_print)
+        else:
+            self.get_network(to_print, write_sbml)
         self.result_seeds=list()
-        self.fluxes = pd.DataFrame()
+        self.fluxes = None
+        self.flux_engine = flux_engine
+        self.flux_model = None
+        self.flux_cache = FluxCache()
+
+
+    def __getstate__(self):
+        # The cobra model is not sent back through multiprocessing queues,
+        # each process keeps (or rebuilds) its own one.
+        # The LP model is kept as it can not be rebuilt once the network simplified
+        state = self.__dict__.copy()
+        if self.flux_engine == "cobra":
+            state['flux_model'] = None
+        return state
 
 
     ######################## GETTER ########################
@@ -118,11 +159,11 @@ class Network:
 
     ######################## SETTER ########################
     def _set_file_extension(self, file:str):
-        ext = os.path.splitext(file)[1]
+        ext = os.path.splitext(SBML.get_uncompressed_path(file))[1]
         self.file_extension = ext
 
     def _set_name(self):
-        n = f'{os.path.splitext(os.path.basename(self.file))[0]}'
+        n = f'{os.path.splitext(os.path.basename(SBML.get_uncompressed_path(self.file)))[0]}'
         self.name = n
         print(f"Network name: {n}")
 
@@ -139,9 +180,9 @@ class Network:
         """
         logger.log.info("Finding list of reactants from opbjective reaction...")
         for obj in self.objectives:
-            reactants = SBML.get_listOfReactants_from_name(self.model, obj)
+            reactants = SBML.get_reaction(self.sbml_model, obj)["reactants"]
             for reactant in reactants:
-                react_name = reactant.attrib.get('species')
+                react_name = reactant[0]
                 if react_name not in self.targets:
                     self.targets.append(react_name)
         logger.log.info("... DONE")
@@ -150,19 +191,13 @@ class Network:
         """Get Boundaries of a reaction
 
         Args:
-            reaction (etree line): Reaction from etree package
+            reaction (dict): Reaction read from SBML file (see sbml.read_model)
 
         Returns:
             lbound (float), ubound (float): lower and uppper boundaries value
         """
-        lower_bound = self.parameters[reaction.attrib.get('{'+self.fbc+'}lowerFluxBound')] \
-                    if type(reaction.attrib.get('{'+self.fbc+'}lowerFluxBound')) is not float \
-                    else '"'+reaction.attrib.get('{'+self.fbc+'}lowerFluxBound')+'"'
-        lbound = round(float(lower_bound),10)
-        upper_bound = self.parameters[reaction.attrib.get('{'+self.fbc+'}upperFluxBound')] \
-                    if type(reaction.attrib.get('{'+self.fbc+'}upperFluxBound')) is not float \
-                    else '"'+reaction.attrib.get('{'+self.fbc+'}upperFluxBound')+'"'
-        ubound = round(float(upper_bound),10)
+        lbound = round(float(self.parameters[reaction["lowerFluxBound"]]),10)
+        ubound = round(float(self.parameters[reaction["upperFluxBound"]]),10)
         return lbound, ubound
 
     def find_objectives(self, input_dict:dict):
@@ -178,7 +213,7 @@ class Network:
             ValueError: No objective reaction found or none has coefficient 1
         """
         logger.print_log("\n Finding objective ...", "info")
-        objectives = SBML.get_listOfFluxObjectives(self.model, self.fbc)
+        objectives = self.sbml_model["objectives"]
         obj_found = None
         is_reactant_found = False
         for obj in objectives:
@@ -187,7 +222,7 @@ class Network:
                 #For now works with only one objective
                 if coef == 1:
                     obj_found = obj[0]
-                    reaction = obj[2]
+                    reaction = SBML.get_reaction(self.sbml_model, obj_found)
                     lbound, ubound = self.get_boundaries(reaction)
             # multiple objectives found with coefficient 1
             else:
@@ -336,13 +371,13 @@ class Network:
             to_print (bool, optional): _description_. Defaults to True.
             write_sbml (bool, optional): Is a writing SBML file mode or not. Defaults to False.
         """
-        reactions_list = SBML.get_listOfReactions(self.model)
+        reactions_list = self.sbml_model["reactions"]
         warning_message = ""
         info_message = ""
         for r in reactions_list:
-            reaction = Reaction(r.attrib.get("id"))
+            reaction = Reaction(r["id"])
             reaction.is_exchange=False
-            source_reversible = False if r.attrib.get('reversible') == 'false' else True           
+            source_reversible = False if r["reversible"] == 'false' else True           
             # Treating reverserbility separately, lower bound can stay to 0
             reaction.lbound, reaction.ubound = self.get_boundaries(r)
 
@@ -354,8 +389,8 @@ class Network:
                 # Not added not reaction list of the network
                 continue
 
-            reactants = SBML.get_listOfReactants(r)
-            products = SBML.get_listOfProducts(r)
+            reactants = r["reactants"]
+            products = r["products"]
 
             # uses the definition of boundaries as cobra
             # a reaction is in boundaries (so exchange reaction)
@@ -426,15 +461,10 @@ class Network:
             # Cases: [-1000,10], [-10,1000], ...
             else:
                 reaction.reversible = True
-            react_exchange_list,react_transport_list = reaction.add_metabolites_from_list(reactants,"reactant", 
-                                                                self.meta_exchange_list, self.meta_transport_list)
-            self.meta_exchange_list.extend(y for y in react_exchange_list if y not in self.meta_exchange_list)
-            self.meta_transport_list.extend(y for y in react_transport_list if y not in self.meta_transport_list)
-            
-            prod_exchange_list, prod_transpor_list = reaction.add_metabolites_from_list(products,"product", 
-                                                                self.meta_exchange_list, self.meta_transport_list) 
-            self.meta_exchange_list.extend(y for y in prod_exchange_list if y not in self.meta_exchange_list)
-            self.meta_transport_list.extend(y for y in prod_transpor_list if y not in self.meta_transport_list)
+            reaction.add_metabolites_from_list(reactants,"reactant", 
+                                               self.exchanged_metabolites, self.transported_metabolites)
+            reaction.add_metabolites_from_list(products,"product", 
+                                               self.exchanged_metabolites, self.transported_metabolites)
 
             reaction.is_reversible_modified = source_reversible != reaction.reversible
 
@@ -447,15 +477,10 @@ class Network:
         # Because of the order of reaction, the metabolites can be found as exchanged
         # after another reaction, it is needed to correct that
         for reaction in self.reactions:
-            for metabolite in reaction.products:
-                if metabolite.name in self.meta_exchange_list and not metabolite.type == "exchange":
-                    metabolite.type = "exchange"
-                if metabolite.name in self.meta_transport_list and not metabolite.type == "transport":
-                    metabolite.type = "transport"
-            for metabolite in reaction.reactants:
-                if metabolite.name in self.meta_exchange_list and not metabolite.type == "exchange":
+            for metabolite in reaction.reactants + reaction.products:
+                if metabolite.name in self.exchanged_metabolites:
                     metabolite.type = "exchange"
-                if metabolite.name in self.meta_transport_list and not metabolite.type == "transport":
+                elif metabolite.name in self.transported_metabolites:
                     metabolite.type = "transport"
             # Change boundaries for rewritting sbml
             # this part is not needed for the ASP writing because we need the original value of boundaries
@@ -465,6 +490,18 @@ class Network:
                     reaction.ubound=0
                 if len(reaction.products) == 0:
                     reaction.lbound=0
+        self.core = NetworkCore(self.reactions)
+        self.messages = (warning_message, info_message)
+        self.write_network_messages(to_print)
+
+
+    def write_network_messages(self, to_print:bool=True):
+        """Write the messages of the network normalization
+
+        Args:
+            to_print (bool, optional): Write messages into console if True. Defaults to True.
+        """
+        warning_message, info_message = self.messages
         if (to_print):
             if warning_message:
                 logger.log.warning(warning_message)
@@ -475,19 +512,63 @@ class Network:
             logger.log.info(info_message)
             print("____________________________________________\n")
 
+
+    def get_cached_network(self, network_cache:NetworkCache, to_print:bool=True):
+        """Get the normalized network and the facts of its reactions from the cache,
+        or normalize the network and add it into the cache.
+        The list of reactions (object Reaction) and the modified reactions needed to 
+        rewrite the SBML file are not cached, they are empty when loaded from the cache.
+
+        Args:
+            network_cache (NetworkCache): Cache of the normalized networks
+            to_print (bool, optional): Write messages into console if True. Defaults to True.
+        """
+        key = network_cache.get_key(self.file, self.keep_import_reactions, 
+                                    self.use_topological_injections, self.targets_as_seeds)
+        arrays = network_cache.get(key)
+        if arrays is not None:
+            logger.log.info(f"Network loaded from cache {network_cache.get_path(key)}")
+            self.core = NetworkCore()
+            self.core.set_arrays(arrays)
+            self.network_facts = decode_text(arrays["network_facts"])
+            self.messages = (decode_text(arrays["warning_message"]), decode_text(arrays["info_message"]))
+            self.write_network_messages(to_print)
+            return
+        self.get_network(to_print)
+        self.network_facts = self.core.convert_to_facts(self.keep_import_reactions, 
+                                                        self.use_topological_injections)
+        arrays = self.core.get_arrays()
+        arrays["network_facts"] = encode_text(self.network_facts)
+        arrays["warning_message"] = encode_text(self.messages[0])
+        arrays["info_message"] = encode_text(self.messages[1])
+        network_cache.add(key, arrays)
+
     
-    def convert_to_facts(self):
+    def convert_to_facts(self, preprocess:bool=False):
         """Convert the corected Network into ASP facts
+
+        Args:
+            preprocess (bool, optional): Also compute the preprocessed facts used by the 
+                                         reasoning. Defaults to False.
         """
         logger.log.info("Converting Network into ASP facts ...")
-        facts = ""
-        # Upper bound does not change on forward reaction
-        
-        for reaction in self.reactions:
-            facts += reaction.convert_to_facts(self.keep_import_reactions, 
-                                                  self.use_topological_injections)
-                
+        if not self.network_facts:
+            self.network_facts = self.core.convert_to_facts(self.keep_import_reactions, 
+                                                            self.use_topological_injections)
+        self.facts = self.network_facts + self.get_input_facts()
+        self.preprocessed_facts = ""
+        if preprocess:
+            self.preprocess()
+        logger.log.info("... DONE")
+
 
+    def get_input_facts(self):
+        """Convert the objectives and user inputs into ASP facts
+
+        Returns:
+            str: Inputs converted into ASP facts
+        """
+        facts = ""
         for objective in self.objectives:
             facts += '\nobjective("'+objective+'").'
         for seed in self.seeds:
@@ -498,15 +579,84 @@ class Network:
             facts += f'\nforbidden({quoted(forbidden)}).'
         for possible in self.possible_seeds:
             facts += f'\np_seed({quoted(possible)}).'
-            
-        self.facts = facts
-        logger.log.info("... DONE")
+        return facts
+
+
+    def preprocess(self):
+        """Compute the topological rules not depending on the chosen seeds
+        (see Topology) and write them as facts for the reasoning.
+        In target mode with accumulation allowed, the reactions having no product 
+        on a path to a target can not change the activation of the targets: they
+        are pruned from the facts.
+        Possible seeds given by the user change these rules (subseed), the
+        network is then not preprocessed.
+        """
+        if self.run_mode not in ["target", "full"] or self.is_subseed:
+            return
+        time_preprocess = time()
+        topology = Topology(self.core, self.keep_import_reactions)
+        transported = topology.get_transported()
+        never_consumed = topology.get_never_consumed()
+        initial = set(self.seeds)
+        can_reach = set()
+        kept = None
+        precomputed = dict()
+        if self.run_mode == "full":
+            seed_external = topology.get_seed_external(transported)
+            initial |= seed_external
+            precomputed["seed_external"] = seed_external
+            precomputed["impossible_seed"] = never_consumed
+        else:
+            can_reach = topology.get_can_reach(self.targets)
+            precomputed["can_reach"] = can_reach
+            if self.accumulation:
+                kept = topology.get_reaching_reactions(can_reach)
+        precomputed["transported_meta"] = transported
+        precomputed["authorized_accu"] = never_consumed
+        precomputed["activated_initial"] = topology.get_activated(initial)
+
+        facts = ""
+        metabolites = set(topology.metabolites)
+        if kept is not None:
+            metabolites = set()
+            for reaction in kept:
+                metabolites |= topology.reactions[reaction][0] | topology.reactions[reaction][1]
+            # Metabolites of pruned reactions that can still be seeds
+            for metabolite in (can_reach | initial) & set(topology.metabolites) - metabolites:
+                for meta_type in sorted(topology.metabolites[metabolite]):
+                    facts += f'metabolite({quoted(metabolite)},{quoted(meta_type)}).\n'
+                metabolites.add(metabolite)
+        facts += self.core.convert_to_facts(self.keep_import_reactions, 
+                                            self.use_topological_injections, kept)
+        for predicate, atoms in precomputed.items():
+            if predicate == "activated_initial":
+                atoms = atoms & (metabolites | initial)
+            elif predicate != "can_reach":
+                atoms = atoms & metabolites
+            for atom in sorted(atoms):
+                facts += f'{predicate}({quoted(atom)}).\n'
+        self.preprocessed_facts = facts + self.get_input_facts()
+
+        self.preprocessing = {"reactions": len(topology.reactions),
+                              "kept reactions": len(topology.reactions) if kept is None else len(kept),
+                              "facts size": len(self.facts),
+                              "preprocessed facts size": len(self.preprocessed_facts),
+                              "time": round(time() - time_preprocess, 3)}
+        logger.print_log(f"Preprocessing: {self.preprocessing['kept reactions']}/{self.preprocessing['reactions']} "\
+                         f"reactions kept, facts {round(len(self.facts)/1024, 1)} kB -> "\
+                         f"{round(len(self.preprocessed_facts)/1024, 1)} kB "\
+                         f"in {self.preprocessing['time']}s", "info")
+
 
     def simplify(self):
-        """Lighten the Network Object, only facts needed
+        """Lighten the Network Object, only facts and core needed
+        The LP flux model is built before, once for all the searches
         """
+        if self.flux_engine == "lp" and self.objectives:
+            self.get_flux_model()
         self.model = None
         self.sbml = None
+        self.sbml_model = None
         self.reactions = None
         self.seeds = None
         self.forbidden_seeds = None
@@ -597,6 +747,7 @@ class Network:
         Args:
             maximize (bool): Determine if Maximize option is used
         """
+        import pandas as pd
         dtypes = {'species':'str',
                   'biomass_reaction':'str',
                   'solver_type':'str',
@@ -624,7 +775,7 @@ class Network:
         if self.objectives:
             if self.result_seeds:
                 logger.log.info("Check fluxes Starting")
-                model = flux.get_model(self.file)
+                model = REGISTRY.get_cobra_model(self.file)
                 fluxes_init = flux.get_init(model, self.objectives)
                 if not self.keep_import_reactions:
                     fluxes_no_import = flux.stop_flux(model, self.objectives)
@@ -778,7 +929,11 @@ class Network:
                         seeds_list = data["RESULTS"][solver_type][search_info]["solutions"][solution][3]
                         obj_flux_lp = dict()
                         if solver_type == "FBA" or solver_type == "HYBRID":
-                            for flux in data["RESULTS"][solver_type][search_info]["solutions"][solution][5]:
+                            reaction_flux = data["RESULTS"][solver_type][search_info]["solutions"][solution][5]
+                            # Fluxes stored into a npz file: objective fluxes are kept into the result file
+                            if isinstance(reaction_flux, dict):
+                                reaction_flux = reaction_flux["objective_flux"]
+                            for flux in reaction_flux:
                                 reaction = flux[0]
                                 if reaction in self.objectives:
                                     obj_flux_lp[reaction] = flux[1]
@@ -827,8 +982,31 @@ class Network:
 
 
 
+    def get_flux_model(self):
+        """Get the cobra model or the sparse LP used to check sets of seeds.
+        The cobra model is taken from the registry and the import flux shut down only once,
+        each check is then done into a rollback scope of this model.
+        With the lp engine, the stoichiometric matrix is taken from the core
+        of the network and each check only changes the bounds.
+
+        Returns:
+            Model | FluxLP: Cobra model or sparse LP without import flux
+        """
+        if self.flux_model is None and self.flux_engine == "lp":
+            from .fluxlp import FluxLP
+            logger.log.info("Building sparse LP for flux check ...")
+            self.flux_model = FluxLP(self.core, self.objectives)
+        elif self.flux_model is None:
+            logger.log.info("Loading cobra model for flux check ...")
+            model = REGISTRY.get_cobra_model(self.file)
+            flux.stop_flux(model, show_messages=False)
+            self.flux_model = model
+        return self.flux_model
+
+
     def check_seeds(self, seeds:list):
         """Check flux into objective reaction for a set of seeds.
+        Already tested sets of seeds are answered from the flux cache.
 
         Args:
             seeds (list): Set of seeds to test
@@ -836,10 +1014,48 @@ class Network:
         Returns:
             bool: Return if the objective reaction has flux (True) or not (False)
         """
+        key = frozenset(seeds)
+        cached = self.flux_cache.get(key)
+        if cached is not None:
+            return cached
+        ok, objective_flux = self.calculate_seeds_flux(seeds)
+        self.flux_cache.add(key, ok, objective_flux)
+        return ok, objective_flux
 
-        model = flux.get_model(self.file)
-        flux.get_init(model, self.objectives, False)
-        flux.stop_flux(model, self.objectives, False)
+
+    def explain_ko(self, seeds:list):
+        """Get the metabolites of which at least one must be a seed
+        for a set of seeds to have flux. Only available with the lp engine.
+        The cut is stored into the flux cache, which rejects without flux
+        calculation the next sets of seeds having none of its metabolites.
+
+        Args:
+            seeds (list): Rejected set of seeds
+
+        Returns:
+            list: Metabolites of the cut, None if no cut is found
+        """
+        if self.flux_engine != "lp":
+            return None
+        cut = self.get_flux_model().explain_ko(seeds)
+        if cut is not None:
+            self.flux_cache.add_cut(cut)
+        return cut
+
+
+    def calculate_seeds_flux(self, seeds:list):
+        """Calculate with cobra or the sparse LP the flux into objective reaction for a set of seeds.
+
+        Args:
+            seeds (list): Set of seeds to test
+
+        Returns:
+            bool, float: Return if the objective reaction has flux (True) or not (False)
+                         and the objective flux
+        """
+        model = self.get_flux_model()
+        if self.flux_engine == "lp":
+            return model.check(seeds)
 
         result = Resmod(None, self.objectives, 
                         None, None, None, len(seeds), seeds, None, None)
@@ -0,0 +1,93 @@
+# Object NetworkCache, herit from DirCache, no added properties:
+#   the cached files are the normalized networks (npz files), hits count the networks
+#   loaded from the cache and misses the ones normalized and added to it.
+#
+# The normalized network only depends on the content of the SBML file and
+# on the options changing the normalization or the facts (keep import reactions,
+# topological injections, targets as seeds): they are hashed into the key of
+# the npz file. The file stores the arrays of the NetworkCore, the facts of the
+# reactions and the normalization messages, without any Python object, and is
+# loaded instead of normalizing the network again.
+
+import numpy as np
+from zipfile import BadZipFile
+from hashlib import sha256
+from os import path
+from .dircache import DirCache
+from . import logger
+
+# Changed when the content of the npz files changes, older files are not used anymore
+CACHE_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+
+class NetworkCache(DirCache):
+    def __init__(self, directory:str, max_size_mb:float=256):
+        """Initialize Object NetworkCache
+
+        Args:
+            directory (str): Directory of the cached networks
+            max_size_mb (float, optional): Maximum size of the cache in megabytes. Defaults to 256.
+        """
+        super().__init__(directory, max_size_mb, 'npz', 'Network cache')
+
+
+    ######################## METHODS ########################
+    def get_key(self, file:str, keep_import_reactions:bool, use_topological_injections:bool,
+                targets_as_seeds:bool):
+        """Hash the content of the SBML file and the normalization options
+
+        Args:
+            file (str): SBML file path
+            keep_import_reactions (bool): Import reactions are not removed
+            use_topological_injections (bool): Metabolite of import reaction are seeds
+            targets_as_seeds (bool): Targets can be seeds
+
+        Returns:
+            str: Key of the network
+        """
+        key = sha256()
+        with open(file, 'rb') as f:
+            while chunk := f.read(CHUNK_SIZE):
+                key.update(chunk)
+        key.update(f'{CACHE_VERSION} {keep_import_reactions} {use_topological_injections} '\
+                   f'{targets_as_seeds}'.encode())
+        return key.hexdigest()
+
+
+    def get(self, key:str):
+        """Get the cached network of a key, marked as recently used
+
+        Args:
+            key (str): Key of the network
+
+        Returns:
+            dict: Arrays of the network, None if not cached
+        """
+        npz_path = self.get_path(key)
+        if path.isfile(npz_path):
+            try:
+                with np.load(npz_path, allow_pickle=False) as npz:
+                    arrays = {name: npz[name] for name in npz.files}
+                self.mark_used(npz_path)
+                return arrays
+            except (OSError, ValueError, BadZipFile) as e:
+                logger.print_log(f'Network cache: {path.basename(npz_path)} not readable ({e})', 'debug')
+        self.misses += 1
+        return None
+
+
+    def add(self, key:str, arrays:dict):
+        """Write the arrays of a network into the cache
+
+        Args:
+            key (str): Key of the network
+            arrays (dict): Arrays of the network, by name
+
+        Returns:
+            str: Path of the npz file
+        """
+        def write_npz(temp_path:str):
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **arrays)
+        return self.write(key, write_npz)
+    ########################################################
@@ -0,0 +1,140 @@
+# Object FluxPropagator constitued of:
+#   - network (Network): Network checking the flux of the sets of seeds
+#   - exclude_accepted (bool): Exclude accepted sets of seeds and their supersets
+#   - on_reject (function): Called with the number of rejected sets of seeds after each rejection
+#   - seed_literals (dict): Solver literals of the seed atoms of each metabolite
+#   - accepted (dict): Objective flux of each accepted set of seeds
+#   - accepted_literals (dict): True seed literals of each accepted set of seeds
+#   - clauses (list): Clauses excluding already checked sets of seeds and their supersets
+#   - added (dict): Number of clauses of the list already added into each solver thread
+#   - number_rejected (int): Number of rejected sets of seeds
+#   - lock (Lock): Flux checks are not done concurrently by solver threads
+#
+# Clingo propagator checking the flux of each candidate (total assignment)
+# during a single solve call. A rejected set of seeds is excluded directly
+# into the solver, so that learnt clauses and heuristics are kept between
+# candidates, without adding and grounding a new program part.
+
+import clingo
+from threading import Lock
+from . import logger
+
+class FluxPropagator:
+    def __init__(self, network, exclude_accepted:bool=True, on_reject=None):
+        """Initialize Object FluxPropagator
+
+        Args:
+            network (Network): Network checking the flux of the sets of seeds
+            exclude_accepted (bool, optional): Exclude accepted sets of seeds and their supersets
+                                               from the next candidates. Defaults to True.
+            on_reject (function, optional): Called with the number of rejected sets of seeds
+                                            after each rejection. Defaults to None.
+        """
+        self.network = network
+        self.exclude_accepted = exclude_accepted
+        self.on_reject = on_reject
+        self.seed_literals = dict()
+        self.accepted = dict()
+        self.accepted_literals = dict()
+        self.clauses = list()
+        self.added = dict()
+        self.number_rejected = 0
+        self.lock = Lock()
+
+
+    ######################## METHODS ########################
+    def init(self, init:clingo.PropagateInit):
+        """Get the solver literals of the seed atoms
+
+        Args:
+            init (clingo.PropagateInit): Clingo initialization object
+        """
+        for atom in init.symbolic_atoms.by_signature("seed", 2):
+            metabolite = atom.symbol.arguments[0].string
+            literal = init.solver_literal(atom.literal)
+            self.seed_literals.setdefault(metabolite, list()).append(literal)
+        init.check_mode = clingo.PropagatorCheckMode.Total
+
+
+    def add_clauses(self, control:clingo.PropagateControl):
+        """Add into the solver thread the exclusion clauses it does not have yet
+
+        Args:
+            control (clingo.PropagateControl): Clingo propagation object
+
+        Returns:
+            bool: False if a clause is conflicting, the check must stop
+        """
+        thread = control.thread_id
+        while self.added.get(thread, 0) < len(self.clauses):
+            clause = self.clauses[self.added.get(thread, 0)]
+            self.added[thread] = self.added.get(thread, 0) + 1
+            if not control.add_clause(clause, lock=True):
+                return False
+        return True
+
+
+    def exclude(self, seeds:list):
+        """Exclude an accepted set of seeds and its supersets from the next candidates,
+        once reported as a model. Excluded when checked, a candidate not reported by its
+        solver thread (another thread committing a model first) would be lost.
+
+        Args:
+            seeds (list): Set of seeds of the model
+        """
+        if not self.exclude_accepted:
+            return
+        with self.lock:
+            literals = self.accepted_literals.get(frozenset(seeds))
+            if literals:
+                self.clauses.append([-lit for lit in literals])
+
+
+    def check(self, control:clingo.PropagateControl):
+        """Check the flux of the candidate set of seeds. When rejected, the set of seeds
+        and its supersets are excluded. A cut found by the network only answers its next
+        flux checks (see Network.explain_ko): as a solver constraint it would change the
+        minimal sets of seeds, and the solutions would depend on the flux engine.
+
+        Args:
+            control (clingo.PropagateControl): Clingo propagation object
+        """
+        # Only candidates are checked, the check can also be called back
+        # on a partial assignment once clauses are added
+        assignment = control.assignment
+        if any(assignment.value(lit) is None for lits in self.seed_literals.values() for lit in lits):
+            return
+        with self.lock:
+            if not self.add_clauses(control):
+                return
+            seeds = list()
+            literals = list()
+            for metabolite, metabolite_literals in self.seed_literals.items():
+                true_literals = [lit for lit in metabolite_literals if assignment.is_true(lit)]
+                if true_literals:
+                    seeds.append(metabolite)
+                    literals.extend(true_literals)
+            key = frozenset(seeds)
+            if key in self.accepted:
+                return
+
+            ok, objective_flux = self.network.check_seeds(seeds)
+            if ok:
+                logger.print_log(f'CHECK Solution {len(seeds)} seeds -> OK\n', 'debug')
+                self.accepted[key] = objective_flux
+                self.accepted_literals[key] = literals
+                return
+
+            logger.print_log(f'CHECK Solution {len(seeds)} seeds -> KO\n', 'debug')
+            self.number_rejected += 1
+            if self.on_reject:
+                self.on_reject(self.number_rejected)
+            # exclude solution and its superset
+            self.clauses.append([-lit for lit in literals])
+            # the next candidates having none of the metabolites limiting the flux are
+            # rejected without flux calculation
+            cut = self.network.explain_ko(seeds)
+            if cut is not None:
+                logger.print_log(f'Cut: one of {len(cut)} metabolites needed as seed', 'debug')
+            self.add_clauses(control)
+    ########################################################
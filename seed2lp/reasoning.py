@@ -1,20 +1,32 @@
 # Object Reasoning, herit from Solver, added properties:
-#    - grounded (str): All rules grounded before solving to save time
+#    - flux_workers (int): Number of processes checking the flux in filter mode
+#    - sessions (dict): Ground program of each set of clingo constants, 
+#                       shared by all the searches
+#    - ground_cache (GroundCache): On-disk cache of ground programs, None when not used
+#    - threads (int): Number of solver threads
+#    - parallel_mode (str): Parallel solving of the threads: compete or split
+#    - portfolio (str): Clasp portfolio file, one configuration per thread, None when not used
+#    - portfolio_names (list): Name of the configuration of each solver thread
+#    - clingo_parallel (str): Parallel mode command option
+#    - model_threads (list): Solver thread of each model found by the current search
 
-import clyngor
 import clingo
 from time import time
 from .network import Network
 from .solver import Solver
 import random
-from multiprocessing import Process, Queue
+from multiprocessing import Process, Queue, Pool
+from collections import deque
 from .file import save, delete, load_tsv, existing_file
+from .propagator import FluxPropagator
+from .session import GroundSession, get_portfolio_names
+from .groundcache import GroundCache
 from os import path
 from . import color, logger
 
 
-#TODO: CLEAN GROUND MODE IF NOT USED
-GROUND = False
+# Network used by the flux check workers of the filter mode
+_flux_network = None
 
 
 ###################################################################
@@ -27,7 +39,8 @@ class Reasoning(Solver):
                  intersection:bool=False, union:bool=False, 
                  minimize:bool=False, subset_minimal:bool=False, 
                  temp_dir:str=None, short_option:str=None, 
-                 verbose:bool=False):
+                 verbose:bool=False, flux_workers:int=1, ground_cache:GroundCache=None,
+                 threads:int=1, parallel_mode:str="compete", portfolio:str=None):
         """Initialize Object Reasoning, herit from Solver
 
         Args:
@@ -44,12 +57,27 @@ class Reasoning(Solver):
             temp_dir (str, optional): Temporary directory for saving instance file and clingo outputs. Defaults to None.
             short_option (str, optional): Short way to write option on filename. Defaults to None.
             verbose (bool, optional): Set debug mode. Defaults to False.
+            flux_workers (int, optional): Number of processes checking the flux in filter mode. Defaults to 1.
+            ground_cache (GroundCache, optional): On-disk cache of ground programs. Defaults to None.
+            threads (int, optional): Number of solver threads. Defaults to 1.
+            parallel_mode (str, optional): Parallel solving of the threads: compete or split. 
+                                           Defaults to "compete".
+            portfolio (str, optional): Clasp portfolio file, "tuned" for the seed2lp one. 
+                                       Defaults to None.
         """
         super().__init__(run_mode, network, time_limit_minute, number_solution, clingo_configuration, 
                          clingo_strategy, intersection, union, minimize, subset_minimal, 
                          temp_dir, short_option, run_solve, verbose)
 
         self.is_linear = False
+        self.flux_workers = flux_workers
+        self.sessions = dict()
+        self.ground_cache = ground_cache
+        self.threads = threads
+        self.parallel_mode = parallel_mode
+        self.portfolio = portfolio
+        self.portfolio_names = list()
+        self.model_threads = list()
         title_mess = "\n############################################\n" \
             "############################################\n" \
             f"                   {color.bold}REASONING{color.cyan_light}\n"\
@@ -57,7 +85,8 @@ class Reasoning(Solver):
             "############################################\n"
         logger.print_log(title_mess, "info", color.cyan_light) 
         self._set_clingo_constant()
-        self._set_instance_file()
+        self._set_clingo_parallel()
+        self._set_instance(self.network.preprocessed_facts)
         self._set_temp_result_file()
 
 
@@ -67,8 +96,32 @@ class Reasoning(Solver):
         """Prepare ASP constant command for resolution
         """
         self.init_const()
+        # The topological rules are given as facts by the preprocessed network
+        if self.network.preprocessed_facts:
+            self.clingo_constant.append('-c')
+            self.clingo_constant.append('precomputed=1')
         logger.print_log(f"Time limit: {self.time_limit_minute} minutes", "info")
         logger.print_log( f"Solution number limit: {self.number_solution}", "info")
+
+
+    def _set_clingo_parallel(self):
+        """Prepare parallel solving command options. A portfolio replaces the clingo
+        configuration, with one thread per configuration when the number of threads is not given.
+        """
+        self.clingo_parallel = ""
+        if self.portfolio:
+            if self.portfolio == "tuned":
+                self.portfolio = self.asp.CLINGO_PORTFOLIO
+            self.portfolio_names = get_portfolio_names(self.portfolio)
+            self.clingo_configuration = f"--configuration={self.portfolio}"
+            if self.threads <= 1:
+                self.threads = len(self.portfolio_names)
+        if self.threads > 1:
+            self.clingo_parallel = f"--parallel-mode={self.threads},{self.parallel_mode}"
+            message = f"Threads: {self.threads} ({self.parallel_mode})"
+            if self.portfolio:
+                message += f", portfolio {self.portfolio}"
+            logger.print_log(message, "info")
     ########################################################  
 
 
@@ -84,13 +137,11 @@ class Reasoning(Solver):
     def search_seed(self):  
         """Launch seed searching 
         """
-        files = [self.network.instance_file, self.asp.ASP_SRC_SEED_SOLVING]
+        files = [self.asp.ASP_SRC_SEED_SOLVING]
         timer=dict()
         # Subset minimal mode: By default the sub_seeds search from possible seed given is deactivated
         if self.subset_minimal:
             self.get_message('subsetmin')
-            if GROUND: 
-                timer = self.reasoning_ground(files)
             if self.run_solve == "reasoning" or self.run_solve ==  "all":
                 self.get_message('classic')
                 self.search_subsetmin(timer, files, 'classic')
@@ -117,9 +168,6 @@ class Reasoning(Solver):
                 self.clingo_constant.append('subseed=1')                
             files.append(self.asp.ASP_SRC_MINIMIZE)
 
-            if GROUND: 
-                timer = self.reasoning_ground(files)
-
             if self.run_solve == "reasoning" or self.run_solve ==  "all":
                 self.get_message('classic')
                 self.search_minimize(timer, files, 'classic')
@@ -144,29 +192,33 @@ class Reasoning(Solver):
 
 
     
-    def reasoning_ground(self, asp_files:list):
-        """Ground the ASP files to create all facts from rules
+    def get_session(self, symbolic:bool=False):
+        """Get the ground program session of the current clingo constants,
+        created at first call
 
         Args:
-            asp_files (list): List of ASP files, included th network asp file saved in temp directory
+            symbolic (bool, optional): The search grounds its own program part on the 
+                                       atoms of the program, which is then not loaded 
+                                       from the ground cache. Defaults to False.
+
+        Returns:
+            GroundSession: Session shared by all the searches using these constants
         """
-        timer = dict()
-        logger.print_log('GROUNDING...', 'info')
-        time_ground = time()
-        const_option = ""
-        const_option = ' '.join(self.clingo_constant)
-        self.grounded = clyngor.grounded_program(asp_files, options=const_option)
-        time_ground = time() - time_ground
-        timer["Grounding time"] = round(time_ground, 3)
-        return timer
-    
+        options = self.clingo_constant + [self.clingo_configuration, self.clingo_strategy, 
+                                          self.clingo_parallel]
+        cache = None if symbolic else self.ground_cache
+        key = tuple(options) + (cache is None,)
+        if key not in self.sessions:
+            self.sessions[key] = GroundSession(options, cache, self.instance)
+        return self.sessions[key]
+
 
         
-    def write_one_model_solution(self, one_model:dict):
+    def write_one_model_solution(self, one_model:list):
         """Construct the outpu for minimize one model solution (finding optimum step)
 
         Args:
-            one_model (dict): Solution of finding opimum step
+            one_model (list): Seeds of the solution of finding opimum step
 
         Returns:
             solution_list (dict): Constructed output
@@ -183,8 +235,7 @@ class Reasoning(Solver):
                 logger.print_log((f"Number of producible targets: {- self.opt_prod_tgt}"), 'info')
             logger.print_log(f"Minimal size of seed set is {self.opt_size}\n", 'info')
             if self.opt_size > 0:
-                seeds = [args[0] for args in one_model.get('seed', ())]
-                seeds=list(sorted(seeds))
+                seeds=list(sorted(one_model))
             else:
                 seeds = []
                 if self.network.keep_import_reactions:
@@ -269,19 +320,26 @@ class Reasoning(Solver):
         results = dict()
         one_model = None
         number_rejected = None
+        cache_counters = None
+        lp_counters = None
         solution_list = dict()
+        self.model_threads = list()
         full_option, mode_message, model_type, output_type = self.get_solutions_infos(search_mode)
         
-        if not GROUND:
-            full_option = self.clingo_constant + full_option
-
+        # The instance and encoding are grounded once for all searches
+        session = self.get_session(step == "guess_check_div")
+        time_ground = session.ground(asp_files)
+        timer["Grounding time"] = round(time_ground, 3)
+        if session.cache_status:
+            timer["Ground cache"] = session.cache_status
+        else:
+            timer.pop("Ground cache", None)
         if self.optimum:
             if self.opt_prod_tgt is not None:
                 full_option[-1]=full_option[-1]+f",{self.opt_prod_tgt},{self.opt_size}"
             else:
                 full_option[-1]=full_option[-1]+f",{self.opt_size}"
 
-        str_option = ' '.join(full_option)
         suffix=""
         if step == "filter":
             suffix = " FILTER"
@@ -290,24 +348,13 @@ class Reasoning(Solver):
         match search_mode, step:
             # CLASSIC MODE (NO FILTER, NO GUESS-CHECK)   
             case "minimize-one-model", "classic":
-                time_solve = time()
-                if GROUND:
-                    models = clyngor.solve_from_grounded(self.grounded, options=str_option, 
-                                    time_limit=self.time_limit).discard_quotes.by_predicate
-                else:
-                    models = clyngor.solve(files=asp_files, options=str_option, 
-                                    time_limit=self.time_limit).discard_quotes.by_predicate
-                time_solve = time() - time_solve
-                self.get_message("command")
-                logger.print_log(f'{models.command}', 'debug')
-                for model, opt, optimum_found in models.by_arity.with_optimality:
-                    if optimum_found:
-                        self.optimum_found = True
-                        one_model = model
-                        if one_model.get('seed'):
-                            self.optimum = opt
-                        else:
-                            self.optimum = 0
+                models, self.optimum_found, time_solve = self.solve_classic(full_option, asp_files, search_mode)
+                if self.optimum_found:
+                    one_model, opt = models[-1]
+                    if one_model:
+                        self.optimum = opt
+                    else:
+                        self.optimum = 0
                 if not self.optimum_found:
                     logger.print_log('Optimum not found', "error") 
                 else:
@@ -315,31 +362,14 @@ class Reasoning(Solver):
                     self.network.add_result_seeds('REASONING', search_mode, model_type, len(seeds), seeds)
 
             case "minimize-enumeration" | "submin-enumeration", "classic":
-                time_solve = time()
-                solution_list = self.solve_enumeration(str_option, solution_list, 
-                                                        search_mode, asp_files)
-                time_solve = time() - time_solve
+                solution_list, time_solve = self.solve_enumeration(full_option, solution_list, 
+                                                                   search_mode, asp_files)
 
 
             case _, "classic":
-                time_solve = time()
-                if GROUND:
-                    models = clyngor.solve_from_grounded(self.grounded, options=str_option, 
-                                    time_limit=self.time_limit).discard_quotes.by_predicate
-                else:
-                    models = clyngor.solve(files=asp_files, options=str_option, 
-                                    time_limit=self.time_limit).discard_quotes.by_predicate
-                time_solve = time() - time_solve
-                self.get_message("command")
-                logger.print_log(f'{models.command}', 'debug')
-                has_solution=False
-                for model in models:
-                    has_solution=True
-                    _models = [model]
-                if has_solution:
-                    models = _models
-                    seeds = [args[0] for args in models[0].get('seed', ())]
-                    seeds=list(sorted(seeds))
+                models, _, time_solve = self.solve_classic(full_option, asp_files, search_mode)
+                if models:
+                    seeds, _ = models[-1]
                     size = len(seeds)
                     print(f"Answer: {mode_message} ({size} seeds) \n{', '.join(map(str, seeds))}\n")
                     solution_list[model_type] = ["size", len(seeds)] + \
@@ -354,6 +384,12 @@ class Reasoning(Solver):
                 # api clingo doesn't have time_limit option
                 # to add a time out, it is needed to call the function into a process
                 queue = Queue()
+                # The cobra model is loaded before starting the process
+                # so that every filter or guess-check run shares the same parsing
+                flux_model = self.network.get_flux_model()
+                self.network.flux_cache.reset_counters()
+                if self.network.flux_engine == "lp":
+                    flux_model.reset_counters()
                 start=time()
                 if step == "filter":
                     suffix = " FILTER"
@@ -371,7 +407,7 @@ class Reasoning(Solver):
                 p.start()
                 try:
                     # the time out limit is added here
-                    obj, solution_list, time_ground, time_solve, number_rejected = queue.get(timeout=self.time_limit)
+                    obj, solution_list, time_solve, number_rejected = queue.get(timeout=self.time_limit)
                     # Because of the process, the object is not change (encapsulated and isolated)
                     # it is needed to give get the output object and modify the current object
                     if "minimize" in search_mode:
@@ -379,11 +415,22 @@ class Reasoning(Solver):
                         self.optimum = obj.optimum
                         self.get_separate_optimum()
                     self.network.result_seeds = obj.network.result_seeds 
+                    self.model_threads = obj.model_threads
+                    # Flux checks already done are kept for the next searches
+                    self.network.flux_cache = obj.network.flux_cache
+                    cache_counters = {'hits': self.network.flux_cache.hits,
+                                      'misses': self.network.flux_cache.misses}
+                    logger.print_log(f"Flux cache: {cache_counters['hits']} hits, {cache_counters['misses']} misses", 'debug')
+                    if self.network.flux_engine == "lp":
+                        self.network.flux_model = obj.network.flux_model
+                        lp_counters = self.network.flux_model.get_counters()
+                        logger.print_log(f"LP checks: {lp_counters['checks']} checks, "\
+                                         f"{lp_counters['iterations']} simplex iterations, {lp_counters['time']}s", 'debug')
                     if not is_one_model:
                         delete(full_path)
                 except:
                     time_process=time() - start
-                    time_ground = time_solve = -1
+                    time_solve = -1
                     unsat = False
                     time_out = False
                     if not self.time_limit or time_process < self.time_limit:
@@ -407,22 +454,47 @@ class Reasoning(Solver):
         #TODO: Intersection and union not needed with filter and guess check but 
         # do with python the union and intersection of resulted soluion of filer or guess check
 
-        if step == "filter" or "guess_check" in step:
-            if time_ground != -1:
-                timer["Grounding time"] = round(time_ground, 3)
-            else:
-                timer["Grounding time"] = "Time out"
         if time_solve != -1:
             timer["Solving time"] = round(time_solve, 3)
         else:
             timer["Solving time"] = "Time out"      
         results["Timer"] = timer.copy()
+        results['ground program'] = {'rules': session.rules}
         results['solutions'] = solution_list
         if number_rejected:
             results['rejected'] = number_rejected
+        if cache_counters:
+            results['flux cache'] = cache_counters
+        if lp_counters:
+            results['lp checks'] = lp_counters
+        if self.threads > 1 and self.model_threads:
+            results['parallel solving'] = self.get_thread_statistics()
         self.output[output_type+suffix] = results
 
 
+    def get_thread_statistics(self):
+        """Get which solver configurations found the models of the search.
+        The winner is the configuration of the thread finding the last model,
+        the optimum for the minimize searches.
+
+        Returns:
+            dict: Threads, parallel mode, winning configuration and number of models 
+                  found by each configuration
+        """
+        names = list()
+        for thread_id in self.model_threads:
+            if self.portfolio_names:
+                names.append(self.portfolio_names[thread_id % len(self.portfolio_names)])
+            else:
+                names.append(f"solver.{thread_id}")
+        logger.print_log(f"Winning configuration: {names[-1]}", "info")
+        models = dict()
+        for name in names:
+            models[name] = models.get(name, 0) + 1
+        return {"threads": self.threads, "parallel mode": self.parallel_mode,
+                "winner": names[-1], "models": models}
+
+
     def get_solution_from_temp(self, unsat:bool, is_one_model:bool, full_path:str, suffix:str, search_mode:str):
         """Get the solution written in temporary file during execution fo seed searching while using 
         multiprocessing.
@@ -469,35 +541,69 @@ class Reasoning(Solver):
         return solution_list, number_rejected
 
 
-    def solve_enumeration(self, construct_option:str, solution_list:dict, 
+    def solve_classic(self, full_option:list, asp_files:list, search_mode:str, 
+                      nb_model:int=0, enumeration:bool=False):
+        """Solve with the ground program of the session for Reasoning Classic mode.
+        All models are kept only for enumeration, otherwise only the last one 
+        is kept (optimum, intersection, union).
+
+        Args:
+            full_option (list): Clingo options of the search
+            asp_files (list): List of needed ASP files to solve ASP
+            search_mode (str): Optimization selected for the search
+            nb_model (int, optional): Limit number of solutions to find. Defaults to 0 meaning unlimited.
+            enumeration (bool, optional): Keep all models. Defaults to False.
+
+        Returns:
+            models (list), optimum_found (bool), time_solve (float): List of seeds and costs 
+                                                                     of the models
+        """
+        session = self.get_session()
+        options = full_option + [f'--models={nb_model}']
+        ctrl = session.get_control(asp_files, options, "minimize" in search_mode)
+        self.get_message("command")
+        logger.print_log(session.get_command(options), 'debug')
+
+        models = list()
+        optimality_proven = False
+        def on_model(model:clingo.Model):
+            nonlocal optimality_proven
+            seeds = [atom.arguments[0].string for atom in model.symbols(shown=True) if atom.match("seed", 2)]
+            if not enumeration:
+                models.clear()
+            models.append((list(sorted(seeds)), model.cost))
+            self.model_threads.append(model.thread_id)
+            optimality_proven = model.optimality_proven
+
+        time_solve = time()
+        with ctrl.solve(on_model=on_model, async_=True) as handle:
+            if not handle.wait(self.time_limit):
+                handle.cancel()
+                logger.print_log(f'Time out: {self.time_limit_minute} min expired', "error")
+            result = handle.get()
+        time_solve = time() - time_solve
+        # The last model is optimal once the search space is exhausted
+        optimum_found = bool(models) and (result.exhausted or optimality_proven)
+        return models, optimum_found, time_solve
+
+
+    def solve_enumeration(self, full_option:list, solution_list:dict, 
                           search_mode:str, asp_files:list=None):
-        """Solve enumeration for Reasoning Classic mode using Clyngor
+        """Solve enumeration for Reasoning Classic mode
 
         Args:
-            construct_option (str): Constructed option for clingo
+            full_option (list): Clingo options of the search
             solution_list (dict): A dictionnary of all found solutions
             search_mode (str): Optimization selected for the search (submin-enumeration / minimze-enumeration)
-            asp_files (list, optional): List of needed ASP files to solve ASP with Clyngor
+            asp_files (list, optional): List of needed ASP files to solve ASP
 
         Returns:
-            solution_list (dict): a dictionnary of all found solutions
+            solution_list (dict), time_solve (float): a dictionnary of all found solutions and the solving time
         """
-        if GROUND:
-            models = clyngor.solve_from_grounded(self.grounded, options=construct_option, 
-                                time_limit=self.time_limit, nb_model=self.number_solution).discard_quotes.by_predicate
-        else:
-            models = clyngor.solve(files=asp_files, options=construct_option, 
-                                time_limit=self.time_limit, nb_model=self.number_solution).discard_quotes.by_predicate
-        self.get_message("command")
-        logger.print_log(f'{models.command}', 'debug')
-        idx = 1
-        m = models
-        models_list = list(m).copy()
-        size_answers = len(models_list)
-        if size_answers != 0:
-            for model in models_list:
-                seeds = [args[0] for args in model.get('seed', ())]
-                seeds=list(sorted(seeds))
+        models_list, _, time_solve = self.solve_classic(full_option, asp_files, search_mode, 
+                                                        self.number_solution, True)
+        if models_list:
+            for idx, (seeds, _) in enumerate(models_list, 1):
                 repr_seeds = ', '.join(map(str, seeds))
                 size = len(seeds)
 
@@ -505,18 +611,20 @@ class Reasoning(Solver):
                 solution_list['model_'+str(idx)] = ["size", size] + \
                             ["Set of seeds", seeds]
                 self.network.add_result_seeds('REASONING', search_mode, 'model_'+str(idx), size, seeds)
-                idx += 1
         else:
             logger.print_log('Unsatisfiable problem', "error")
-        return solution_list
+        return solution_list, time_solve
 
 
 
     def guess_check(self, queue:Queue, full_option:list, asp_files:list, search_mode:str, full_path:str, is_one_model:bool=False):
         """Guess and Check mode. Find a solution with Clingo package, check if the solution has flux on objective reaction.
         This function works with multiprocessing in order to manage time limit.
-        Interacts with ASP solver and exclude supersets of the current tested solution.
-        If diversity is asked, the function add_diversity is called.
+        The flux of each candidate is checked by a propagator during a single solve call,
+        rejected candidates and their supersets are excluded by clauses added into the solver.
+        If diversity is asked, the solve is stopped after each solution to call the function add_diversity.
+        For intersection and union, the models are approximations of the consequences,
+        only the last one is kept and its flux is checked once.
 
         Args:
             queue (Queue): Queue for multiprocessing program (managing time limit)
@@ -530,54 +638,48 @@ class Reasoning(Solver):
         solution_list = dict()
         avoided = []
         all_time_solve = 0
-        all_time_ground = 0
 
         # No limit on number of solution
         no_limit_solution = False
         if self.number_solution == 0:
             no_limit_solution = True
         number_solution = self.number_solution
-
-        ctrl = self.control_init(full_option, asp_files, True)
+        # The number of solutions does not limit the search of the consequences
+        is_consequences = "intersection" in search_mode or "union" in search_mode
+        _, mode_message, model_type, _ = self.get_solutions_infos(search_mode)
+
+        def save_rejected(number_rejected:int):
+            if number_rejected%100 == 0:
+                solution_temp = [None, None, None, number_rejected, None]
+                save(full_path, "", solution_temp, "tsv", True)
+
+        ctrl = self.control_init(full_option, asp_files, "minimize" in search_mode, True)
+        propagator = FluxPropagator(self.network, not is_one_model and not is_consequences, save_rejected)
+        ctrl.register_propagator(propagator)
+        if not is_one_model:
+            ctrl.configuration.solve.models = 0
+        mode = 'REASONING GUESS-CHECK'
+        if self.diversity:
+            mode =  'REASONING GUESS-CHECK DIVERSITY'
         solution_idx = 1
-        number_rejected = 0
-        while ((len(solution_list) < number_solution \
-                    and not is_one_model and not no_limit_solution) \
-                    or is_one_model or no_limit_solution )\
-                and \
-                (self.time_limit and float(all_time_ground + all_time_solve) < float(self.time_limit)
-                 or not self.time_limit):
+        while True:
+            start = time()
             with ctrl.solve(yield_=True) as h:
                 seeds = None
                 for model in h:
+                    self.model_threads.append(model.thread_id)
                     atoms = model.symbols(shown=True)
                     seeds = {a.arguments[0].string for a in atoms}
                     seeds=list(sorted(seeds))
                     size = len(seeds)
-                    if not is_one_model:
-                        break
-                    else:
-                        self.optimum=model.cost
-                if not seeds:
                     if is_one_model:
-                        name = 'model_one_solution'
-                        solution_list[name] = ["size", 0] + \
-                                ["Set of seeds", []]
-                        self.optimum_found = True
-                    break
-            # Sum all grounding time together and all solving time together
-            stats = ctrl.statistics
-            total_time = stats["summary"]["times"]["total"]
-            time_solve = stats["summary"]["times"]["solve"]
-            time_ground  = total_time - time_solve
-
-            all_time_solve += float(time_solve)
-            all_time_ground += float(time_ground)
-            res = self.network.check_seeds(seeds)
-            if res[0]:
-                logger.print_log(f'CHECK Solution {size} seeds -> OK\n', 'debug')
-                # valid solution
-                if not is_one_model:
+                        self.optimum=model.cost
+                        continue
+                    if is_consequences:
+                        continue
+                    # valid solution
+                    propagator.exclude(seeds)
+                    flux = self.get_accepted_flux(propagator, seeds)
                     message = f"Answer: {solution_idx} ({size} seeds)\n"
                     for s in seeds:
                         message += f"{s}, "
@@ -585,75 +687,90 @@ class Reasoning(Solver):
                     print(message + "\n")
                     name = 'model_'+str(solution_idx)
                     solution_list[name] = ["size", size] + \
-                                ["Set of seeds", seeds] + ["Cobra flux",  res[1]]
-                    solution_temp = [name, size, seeds, number_rejected, res[1]]
+                                ["Set of seeds", seeds] + ["Cobra flux",  flux]
+                    solution_temp = [name, size, seeds, propagator.number_rejected, flux]
                     save(full_path, "", solution_temp, "tsv", True)
-                    # exclude solutions and its supersets
-                    ctrl.add("skip", [], f":- {','.join(map(str,atoms))}.")
-                    mode = 'REASONING GUESS-CHECK'
-                    if self.diversity:
-                        ctrl, avoided = self.add_diversity(ctrl, seeds, avoided)
-                        mode =  'REASONING GUESS-CHECK DIVERSITY'
-                    ctrl.ground([("skip",[])])
-                    self.network.add_result_seeds(mode, search_mode, name, size, seeds, flux_cobra=res[1])
+                    self.network.add_result_seeds(mode, search_mode, name, size, seeds, flux_cobra=flux)
                     solution_idx +=1
+                    if self.diversity \
+                        or (len(solution_list) >= number_solution and not no_limit_solution):
+                        break
+            # Sum all solving time together, the ground program is shared
+            # so the statistics of the control are cumulative
+            all_time_solve += time() - start
+
+            if is_one_model:
+                if not seeds:
+                    name = 'model_one_solution'
+                    solution_list[name] = ["size", 0] + \
+                            ["Set of seeds", []]
+                    self.optimum_found = True
                 else:
+                    flux = self.get_accepted_flux(propagator, seeds)
                     name = 'model_one_solution'
                     solution_list[name] = ["size", size] + \
-                                ["Set of seeds", seeds] + ["Cobra flux",  res[1]]
+                                ["Set of seeds", seeds] + ["Cobra flux",  flux]
                     logger.print_log(f"Optimum found.", "info") 
                     self.optimum_found = True
-                    if self.diversity: 
-                        ctrl, avoided = self.add_diversity(ctrl, seeds, avoided) 
-                    solution_temp = [name, size, seeds, number_rejected, res[1]]
+                    solution_temp = [name, size, seeds, propagator.number_rejected, flux]
                     save(full_path, self.temp_dir, solution_temp, "tsv", True)
-                    mode = 'REASONING GUESS-CHECK'
-                    if self.diversity:
-                        mode =  'REASONING GUESS-CHECK DIVERSITY'
-                    self.network.add_result_seeds(mode, search_mode, name, size, seeds, flux_cobra=res[1])
+                    self.network.add_result_seeds(mode, search_mode, name, size, seeds, flux_cobra=flux)
                     self.get_separate_optimum()
                     if self.network.is_subseed:
                         logger.print_log(f"Number of producible targets: {- self.opt_prod_tgt}", "info")
                     logger.print_log(f"Minimal size of seed set is {self.opt_size}\n", "info")
-                    break
-                
-            else:
-                logger.print_log(f'CHECK Solution {size} seeds -> KO\n', 'debug')
-                if self.diversity: 
-                    ctrl, avoided = self.add_diversity(ctrl, seeds, avoided) 
+                break
 
-                # exclude solution and its superset
-                ctrl.add("skip", [], f":- {','.join(map(str,atoms))}.")
+            if is_consequences:
+                if seeds is not None:
+                    _, flux = self.network.check_seeds(seeds)
+                    print(f"Answer: {mode_message} ({size} seeds) \n{', '.join(map(str, seeds))}\n")
+                    solution_list[model_type] = ["size", size] + \
+                                ["Set of seeds", seeds] + ["Cobra flux",  flux]
+                    solution_temp = [model_type, size, seeds, propagator.number_rejected, flux]
+                    save(full_path, "", solution_temp, "tsv", True)
+                    self.network.add_result_seeds(mode, search_mode, model_type, size, seeds, flux_cobra=flux)
+                break
+
+            # The diversity heuristics are changed between two solutions,
+            # the solve is started again with the exclusion clauses kept into the solver
+            if not self.diversity or not seeds \
+                or (len(solution_list) >= number_solution and not no_limit_solution) \
+                or (self.time_limit and float(all_time_solve) >= float(self.time_limit)):
+                break
+            ctrl, avoided = self.add_diversity(ctrl, seeds, avoided)
+
+        number_rejected = propagator.number_rejected
+        if number_rejected > 0:
+            logger.print_log(f'Rejected solution during process: {number_rejected} \n', 'info')
 
-                ##################################################
-                # exclude only solution, keep superset
-                # not used because superset are so much that it founds less solutions 
-                # than when we delete the superset (more networks work, more solution
-                # found per network)
-                # code kept in case it is needed
+        queue.put([self, solution_list, all_time_solve, number_rejected])
 
-                #ctrl.add("skip", [], f":- {','.join(map(str,atoms))}, #count{{M: seed(M,_)}} = {len(atoms)}.")
-                ##################################################
 
-                ctrl.ground([("skip",[])])
-                number_rejected +=1
+    def get_accepted_flux(self, propagator:FluxPropagator, seeds:list):
+        """Get the objective flux of a set of seeds given by the solver in guess-check mode.
+        A set of seeds not checked by the propagator (found by another solver thread
+        once the check was skipped) is checked here.
 
-                if number_rejected%100 == 0:
-                    solution_temp = [None, None, None, number_rejected, None]
-                    save(full_path, "", solution_temp, "tsv", True)
-                
-        if number_rejected > 0:
-            logger.print_log(f'Rejected solution during process: {number_rejected} \n', 'info')
+        Args:
+            propagator (FluxPropagator): Propagator checking the candidates
+            seeds (list): Set of seeds of the answer
 
-        ctrl.cleanup()
-        ctrl.interrupt()
-        queue.put([self, solution_list, all_time_ground, all_time_solve, number_rejected])
+        Returns:
+            float: Objective flux of the set of seeds
+        """
+        flux = propagator.accepted.get(frozenset(seeds))
+        if flux is None:
+            _, flux = self.network.check_seeds(seeds)
+        return flux
 
 
     def filter(self, queue:Queue, full_option:list, asp_files:list, search_mode:str, full_path:str, is_one_model:bool=False):
         """Filter mode. Find a solution with Clingo package, check if the solution has flux on objective reaction.
         This function works with multiprocessing in order to manage time limit.
         It does not interact with the solver, only filter the solutions.
+        When more than one flux worker is asked, the solutions are checked by a pool of processes
+        while the solver keeps enumerating. Checks are read back in the order of the solver answers.
 
         Args:
             queue (Queue): Queue for multiprocessing program (managing time limit)
@@ -672,12 +789,20 @@ class Reasoning(Solver):
         full_option.append(f'-n 0')
         number_solution = self.number_solution
 
-        ctrl = self.control_init(full_option, asp_files)
+        ctrl = self.control_init(full_option, asp_files, "minimize" in search_mode)
 
-        solution_idx = 1
-        number_rejected = 0
+        pool = None
+        pending = deque()
+        if self.flux_workers > 1 and not is_one_model:
+            # Each worker keeps its own cobra model
+            pool = Pool(self.flux_workers, initializer=init_flux_worker, initargs=(self.network,))
+            logger.print_log(f'Flux check on {self.flux_workers} workers', 'debug')
+
+        counters = {'solution_idx': 1, 'number_rejected': 0}
+        start = time()
         with ctrl.solve(yield_=True) as h:
             for model in h:
+                self.model_threads.append(model.thread_id)
                 seeds = None
                 if (len(solution_list) < number_solution \
                    and not is_one_model and not no_limit_solution) \
@@ -695,29 +820,21 @@ class Reasoning(Solver):
                     #        self.optimum_found = True
                     #    break
 
-                    if not is_one_model:
-                        res = self.network.check_seeds(seeds)
-                        if res[0]:
-                        # valid solution
-                            logger.print_log(f'CHECK Solution {size} seeds -> OK\n', 'debug')
-                            message = f"Answer: {solution_idx} ({size} seeds)\n"
-                            for s in seeds:
-                                message += f"{s}, "
-                            message=message.rstrip(', ')
-                            print(message + "\n")
-                            name = 'model_'+str(solution_idx)
-                            solution_list[name] = ["size", size] + \
-                                        ["Set of seeds", seeds] + ["Cobra flux",  res[1]]
-                            solution_temp = [name, size, seeds, number_rejected, res[1]]
-                            save(full_path, self.temp_dir, solution_temp, "tsv", True)
-                            self.network.add_result_seeds('REASONING FILTER', search_mode, name, size, seeds, flux_cobra=res[1])
-                            solution_idx +=1
+                    if not is_one_model and pool:
+                        cached = self.network.flux_cache.get(frozenset(seeds))
+                        if cached is None:
+                            pending.append((seeds, pool.apply_async(check_seeds_worker, (seeds,)), None))
                         else:
-                            logger.print_log(f'CHECK Solution {size} seeds -> KO\n', 'debug')
-                            number_rejected +=1
-                            if number_rejected%100 == 0:
-                                solution_temp = [None, None, None, number_rejected, None]
-                                save(full_path, "", solution_temp, "tsv", True)
+                            pending.append((seeds, None, cached))
+                        # Bounded number of checks waiting, the oldest is read back first
+                        while pending and (len(pending) >= 2*self.flux_workers \
+                                           or pending[0][1] is None or pending[0][1].ready()):
+                            self.filter_check(pending.popleft(), solution_list, search_mode,
+                                              full_path, counters, number_solution, no_limit_solution)
+                    elif not is_one_model:
+                        res = self.network.check_seeds(seeds)
+                        self.filter_check((seeds, None, res), solution_list, search_mode,
+                                          full_path, counters, number_solution, no_limit_solution)
                     else:
                         res = self.network.check_seeds(seeds)
                         self.optimum=model.cost
@@ -728,14 +845,19 @@ class Reasoning(Solver):
                         self.optimum_found = True
                 else:
                     break
-                
+
+        if pool:
+            while pending:
+                self.filter_check(pending.popleft(), solution_list, search_mode,
+                                  full_path, counters, number_solution, no_limit_solution)
+            pool.terminate()
+            pool.join()
+
+        number_rejected = counters['number_rejected']
         if number_rejected > 0:
             logger.print_log(f'Rejected solution during process: {number_rejected} \n', "info")
 
-        stats = ctrl.statistics
-        total_time = stats["summary"]["times"]["total"]
-        time_solve = stats["summary"]["times"]["solve"]
-        time_ground = total_time - time_solve
+        time_solve = time() - start
 
         # Because it is needed to get all answers from clingo to have optimum, we save it after
         if is_one_model and self.optimum_found:
@@ -747,32 +869,73 @@ class Reasoning(Solver):
             save(full_path, self.temp_dir, solution_temp, "tsv", True)               
             self.network.add_result_seeds('REASONING FILTER', search_mode, name, size, seeds, flux_cobra=res[1]) 
 
-        ctrl.cleanup()
-        ctrl.interrupt()
-        queue.put([self, solution_list, time_ground, time_solve, number_rejected])
+        queue.put([self, solution_list, time_solve, number_rejected])
+
+
+    def filter_check(self, check:tuple, solution_list:dict, search_mode:str, full_path:str,
+                     counters:dict, number_solution:int, no_limit_solution:bool):
+        """Keep or reject a solution of the filter mode depending on its flux check
+
+        Args:
+            check (tuple): Seeds, pending worker result and result already known (OK, flux)
+            solution_list (dict): A dictionnary of all found solutions
+            search_mode (str): Optimization selected for the search (submin/minmize and enumeration/optimum)
+            full_path (str): Full path for temp file needed to get back solution when time out
+            counters (dict): Index of the next solution and number of rejected solutions
+            number_solution (int): Limit number of solutions to find
+            no_limit_solution (bool): No limit on number of solution
+        """
+        seeds, async_result, res = check
+        if not no_limit_solution and len(solution_list) >= number_solution:
+            return
+        if async_result is not None:
+            ok, objective_flux, check_stat = async_result.get()
+            if check_stat is not None:
+                self.network.flux_model.check_stats.append(check_stat)
+            res = (ok, objective_flux)
+            self.network.flux_cache.add(frozenset(seeds), ok, objective_flux)
+        size = len(seeds)
+        if res[0]:
+        # valid solution
+            logger.print_log(f'CHECK Solution {size} seeds -> OK\n', 'debug')
+            message = f"Answer: {counters['solution_idx']} ({size} seeds)\n"
+            for s in seeds:
+                message += f"{s}, "
+            message=message.rstrip(', ')
+            print(message + "\n")
+            name = 'model_'+str(counters['solution_idx'])
+            solution_list[name] = ["size", size] + \
+                        ["Set of seeds", seeds] + ["Cobra flux",  res[1]]
+            solution_temp = [name, size, seeds, counters['number_rejected'], res[1]]
+            save(full_path, self.temp_dir, solution_temp, "tsv", True)
+            self.network.add_result_seeds('REASONING FILTER', search_mode, name, size, seeds, flux_cobra=res[1])
+            counters['solution_idx'] +=1
+        else:
+            logger.print_log(f'CHECK Solution {size} seeds -> KO\n', 'debug')
+            counters['number_rejected'] +=1
+            if counters['number_rejected']%100 == 0:
+                solution_temp = [None, None, None, counters['number_rejected'], None]
+                save(full_path, "", solution_temp, "tsv", True)
 
 
 
-    def control_init(self, full_option:list, asp_files:list, is_guess_check:bool=False):
-        """Initiate Clingo control for package Clingo
+    def control_init(self, full_option:list, asp_files:list, optimize:bool=True, is_guess_check:bool=False):
+        """Get the Clingo control of the session, holding the ground program, 
+        set for the search. It is called into the process of the search, 
+        the program part of diversity is only added to the copy of the control.
 
         Args:
             full_option (list): All Clingo option 
             asp_files (list): List of needed ASP files to solve ASP (Clingo package)
+            optimize (bool, optional): Use the optimization statements. Defaults to True.
             is_guess_check (bool, optional): Determine if it is a Guess Check (True) or a Filter (Fale). 
                                             Defaults to False.
 
         Returns:
             ctrl (clingo.Control): Return Clingo control for solving
         """
-        full_option.append("--warn=none")
-        ctrl = clingo.Control(full_option)
-
-        for file in asp_files:
-            ctrl.load(file)
-
-
-        ctrl.ground([("base",[])])
+        session = self.get_session(is_guess_check and self.diversity)
+        ctrl = session.get_control(asp_files, full_option, optimize)
         if self.diversity and is_guess_check:
             ctrl.add("diversity", [], """
             #program diversity.
@@ -783,7 +946,7 @@ class Reasoning(Solver):
             ctrl.ground([("diversity",[])])
 
         self.get_message("command")
-        logger.print_log('clingo ' + ' '.join(full_option) + ' ' + ' '.join(asp_files), 'debug')
+        logger.print_log(session.get_command(full_option), 'debug')
         return ctrl
     
 
@@ -823,3 +986,34 @@ class Reasoning(Solver):
         avoided.extend(clues)
 
         return ctrl, avoided
+
+
+
+def init_flux_worker(network:Network):
+    """Initialize a flux check worker process with its own cobra model
+
+    Args:
+        network (Network): Network constructed
+    """
+    global _flux_network
+    _flux_network = network
+    _flux_network.get_flux_model()
+
+
+def check_seeds_worker(seeds:list):
+    """Check flux into objective reaction for a set of seeds in a worker process
+
+    Args:
+        seeds (list): Set of seeds to test
+
+    Returns:
+        bool, float, tuple: Return if the objective reaction has flux (True) or not (False),
+                            the objective flux and, with the lp engine, the simplex iterations 
+                            and solving time of the check (None with cobra)
+    """
+    ok, objective_flux = _flux_network.calculate_seeds_flux(seeds)
+    check_stat = None
+    if _flux_network.flux_engine == "lp":
+        # Counted by the LP of the search, not by the copy of the worker
+        check_stat = _flux_network.flux_model.check_stats.pop()
+    return ok, objective_flux, check_stat
@@ -0,0 +1,140 @@
+# Object ModelRegistry constitued of:
+#   - models (dict): Representations already built for each SBML file (by file key and kind)
+#   - timers (dict): Time spent building each kind of representation
+#   - builds (dict): Number of representations built for each kind
+#   - reuses (dict): Number of requests answered by an already built representation for each kind
+#
+# Each SBML file is parsed once per run, the representation needed by each
+# consumer is then built once and shared:
+#   - sbml: records streamed from the file (see sbml.read_model), used by the
+#           input checks, the Network and the used metabolites of the scope
+#   - cobra: cobra model used by the flux checks, each consumer gets its own copy
+#   - scope: propagation engine of the scope (see ScopeEngine), built from the sbml records
+# The registry is a module state (REGISTRY): the forked processes of the searches
+# inherit the representations already built.
+
+import pickle
+from os import path, stat
+from time import time
+from . import sbml as SBML
+from . import flux
+from .scopeengine import ScopeEngine
+from . import logger
+
+KINDS = {"sbml": "SBML READING", "cobra": "COBRA LOADING", "scope": "SCOPE NETWORK"}
+
+
+class ModelRegistry:
+    def __init__(self):
+        """Initialize Object ModelRegistry
+        """
+        self.models = dict()
+        self.reset_counters()
+
+
+    ######################## METHODS ########################
+    def reset_counters(self):
+        """Reset the timers and counters, the representations already built are kept
+        """
+        self.timers = {kind: 0.0 for kind in KINDS}
+        self.builds = {kind: 0 for kind in KINDS}
+        self.reuses = {kind: 0 for kind in KINDS}
+
+
+    def get_key(self, file:str):
+        """Identify a SBML file by its path and its content version
+
+        Args:
+            file (str): SBML file path
+
+        Returns:
+            tuple: Absolute path, modification time and size of the file
+        """
+        file_stat = stat(file)
+        return path.abspath(file), file_stat.st_mtime_ns, file_stat.st_size
+
+
+    def get(self, file:str, kind:str, build):
+        """Get a representation of a SBML file, built at first request
+
+        Args:
+            file (str): SBML file path
+            kind (str): Kind of representation (see KINDS)
+            build (function): Build the representation from the file path
+
+        Returns:
+            Representation of the SBML file
+        """
+        key = (self.get_key(file), kind)
+        if key in self.models:
+            self.reuses[kind] += 1
+            return self.models[key]
+        start = time()
+        self.models[key] = build(file)
+        self.timers[kind] += time() - start
+        self.builds[kind] += 1
+        logger.log.debug(f"Registry: {kind} representation of {file} built in {round(time() - start, 3)}s")
+        return self.models[key]
+
+
+    def get_sbml_model(self, file:str):
+        """Get the records streamed from a SBML file, shared by all consumers
+        that only read them
+
+        Args:
+            file (str): SBML file path
+
+        Returns:
+            dict: Model read by sbml.read_model()
+        """
+        return self.get(file, "sbml", SBML.read_model)
+
+
+    def get_cobra_model(self, file:str):
+        """Get a cobra model of a SBML file. The file is parsed by cobra once,
+        each call gets an independent copy that can be modified.
+
+        Args:
+            file (str): SBML file path
+
+        Returns:
+            Model: Cobra model
+        """
+        return pickle.loads(self.get(file, "cobra", lambda file: pickle.dumps(flux.get_model(file))))
+
+
+    def get_scope_engine(self, file:str):
+        """Get the propagation engine of the scope, built from the sbml records
+        with the reactions used by menetools menescope
+
+        Args:
+            file (str): SBML file path
+
+        Returns:
+            ScopeEngine: Scope engine of the network
+        """
+        return self.get(file, "scope", lambda file: ScopeEngine(self.get_sbml_model(file)["reactions"]))
+
+
+    def get_timers(self):
+        """Time spent building each kind of representation
+
+        Returns:
+            dict: Time of each built kind, named as the run timers
+        """
+        return {KINDS[kind]: self.timers[kind] for kind in KINDS if self.builds[kind]}
+
+
+    def log_summary(self):
+        """Log the representations built and reused since the last reset
+        """
+        for kind in KINDS:
+            if self.builds[kind] or self.reuses[kind]:
+                logger.print_log(f"Registry: {kind} built {self.builds[kind]} time(s) in "\
+                                 f"{round(self.timers[kind], 3)}s, reused {self.reuses[kind]} time(s)", "info")
+    ########################################################
+
+
+######################## FUNCTIONS ########################
+REGISTRY = ModelRegistry()
+########################################################
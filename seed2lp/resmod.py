@@ -1,5 +1,9 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
 from . import flux
-from cobra.core import Model
+
+if TYPE_CHECKING:
+    from cobra.core import Model
 
 class Resmod:
     def __init__(self, name:str, objectives:list, solver_type:str, search_mode:str, search_type:str,
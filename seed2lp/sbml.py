@@ -1,23 +1,51 @@
 """Routines to extract information from SBML files.
 
+The network is read by read_model() in a single streaming pass: each species,
+parameter and reaction is extracted then removed from the tree, which is never
+held in memory. The whole tree is only built by get_root() to rewrite the file.
+SBML files can be gzip (.gz) or bz2 (.bz2) compressed.
 """
 import xml.etree.ElementTree as ET
-from re import sub
+import gzip
+import bz2
+from io import BytesIO
+from os import path
+from re import compile
 from . import logger
 
-def register_all_namespaces(file):
-    """Get namespaces for rewriting SBML file
+COMPRESSIONS = {".gz": gzip.open, ".bz2": bz2.open}
+DEFAULT_NAMESPACE = compile(rb'\sxmlns="([^"]+)"')
+
+
+def get_uncompressed_path(file:str):
+    """Get the path of a SBML file without its compression extension
 
     Args:
         file (str): SBML file path
+
+    Returns:
+        str: File path without .gz or .bz2 extension
     """
-    namespaces = dict([node for _, node in ET.iterparse(file, events=['start-ns'])])
-    for ns in namespaces:
-        #print(ns,  namespaces[ns])
-        ET.register_namespace(ns, namespaces[ns])
-        
+    root, ext = path.splitext(file)
+    return root if ext in COMPRESSIONS else file
+
+
+def open_sbml(file:str):
+    """Open a SBML file in binary mode, decompressed on the fly when needed
+
+    Args:
+        file (str): SBML file path
+
+    Returns:
+        file object: Binary stream of the SBML document
+    """
+    opener = COMPRESSIONS.get(path.splitext(file)[1], open)
+    return opener(file, "rb")
+
+
 def get_root(file):
-    """Get etree root
+    """Get etree root, used to rewrite the SBML file. The namespaces are 
+    registered while parsing.
 
     Args:
         file (str): SBML file path
@@ -25,19 +53,20 @@ def get_root(file):
     Returns:
         sbml (etree Element), first_line (str) : Return an etree elemnt of the network, and the first line of the sbml file
     """
-    register_all_namespaces(file)
-    with open(file) as f:
-        first_line = f.readline()
+    with open_sbml(file) as f:
+        first_line = f.readline().decode()
         xmlstring = f.read()
-    f.close()
-    
+
     # Remove the default namespace definition (xmlns="http://some/namespace")
-    xmlstring = sub(r'\sxmlns="[^"]+"', '', xmlstring, count=1)
+    default = DEFAULT_NAMESPACE.search(xmlstring)
+    if default:
+        ET.register_namespace('', default.group(1).decode())
+        xmlstring = xmlstring[:default.start()] + xmlstring[default.end():]
 
-    sbml = ET.fromstring(xmlstring)  
-    #tree = ET.parse(file)
-    #sbml = tree.getroot()
-    return sbml, first_line
+    context = ET.iterparse(BytesIO(xmlstring), events=['start-ns'])
+    for _, (prefix, uri) in context:
+        ET.register_namespace(prefix, uri)
+    return context.root, first_line
 
 def get_sbml_tag(element) -> str:
     "Return tag associated with given SBML element"
@@ -60,19 +89,6 @@ def get_model(sbml):
             break
     return model_element
 
-def get_listOfSpecies(model):
-    """
-    return list of species of a SBML model
-    """
-    listOfSpecies = None
-    for e in model:
-        tag = get_sbml_tag(e)
-        if tag == "listOfSpecies":
-            listOfSpecies = e
-            break
-    return listOfSpecies
-
-
 def get_listOfReactions(model) -> list:
     """return list of reactions of a SBML model"""
     listOfReactions = []
@@ -95,18 +111,6 @@ def get_listOfReactants(reaction) -> list:
             break
     return listOfReactants
 
-def get_listOfReactants_from_name(model, reaction_name) -> list:
-    """return list of reactants of a reaction"""
-    reactions_list = get_listOfReactions(model)
-    for reaction in reactions_list:
-        if reaction_name == reaction.attrib['id']:
-            for e in reaction:
-                tag = get_sbml_tag(e)
-                if tag == "listOfReactants":
-                    listOfReactants = e
-                    break
-    return listOfReactants
-
 def get_listOfProducts(reaction) -> list:
     """return list of products of a reaction"""
     listOfProducts = []
@@ -118,107 +122,119 @@ def get_listOfProducts(reaction) -> list:
             break
     return listOfProducts
 
-def get_reaction_from_name(model, fbc, reaction_name) -> list:
-    """return list of reactants of a reaction"""
-    reactions_list = get_listOfReactions(model)
-    for reaction in reactions_list:
-        if reaction_name == reaction.attrib['id']:
-            return reaction
-    raise ValueError(f"ERROR: No reaction {reaction_name} found in list of reactions \n")
+def read_model(file:str):
+    """Read the network from a SBML file in a single streaming pass.
+    Each child of the lists of the model is removed from the tree once read,
+    only one reaction is held in memory at a time.
 
-def get_fbc(sbml):
+    Args:
+        file (str): SBML file path
+
+    Returns:
+        dict: fbc namespace ("fbc"), species IDs ("species"), parameter values by ID 
+              ("parameters"), reactions ("reactions") with their "id", "reversible", 
+              "lowerFluxBound" and "upperFluxBound" attributes and their "reactants" 
+              and "products" as [species, stoichiometry] lists, and flux objectives 
+              of the first objective as [reaction, coefficient] lists ("objectives")
     """
-    return the fbc namespace of a SBML
+    model = {"fbc": None, "species": list(), "parameters": dict(), 
+             "reactions": list(), "objectives": list()}
+    # Elements from the root (sbml) to the current element
+    stack = list()
+    is_objective_read = False
+    with open_sbml(file) as stream:
+        for event, element in ET.iterparse(stream, events=("start-ns", "start", "end")):
+            if event == "start-ns":
+                if model["fbc"] is None and "fbc" in element[1]:
+                    model["fbc"] = element[1]
+                continue
+            if event == "start":
+                stack.append(element)
+                continue
+            stack.pop()
+            depth = len(stack)
+            # sbml > model > listOf* > item
+            if depth == 3:
+                match get_sbml_tag(element):
+                    case "species":
+                        model["species"].append(element.attrib['id'])
+                    case "parameter":
+                        model["parameters"][element.get('id')] = element.get('value')
+                    case "reaction":
+                        fbc = '{'+str(model["fbc"])+'}'
+                        model["reactions"].append({
+                            "id": element.attrib.get("id"),
+                            "reversible": element.attrib.get("reversible"),
+                            "lowerFluxBound": element.attrib.get(fbc+'lowerFluxBound'),
+                            "upperFluxBound": element.attrib.get(fbc+'upperFluxBound'),
+                            "reactants": get_listOfReactants(element),
+                            "products": get_listOfProducts(element)})
+                    case "objective" if not is_objective_read:
+                        # Only the first objective is used
+                        is_objective_read = True
+                        fbc = '{'+str(model["fbc"])+'}'
+                        for flux_objectives in element:
+                            for objective in flux_objectives:
+                                model["objectives"].append([objective.attrib.get(fbc+'reaction'),
+                                                            objective.attrib.get(fbc+'coefficient')])
+            # Items of the lists and other children of the model are not kept
+            if depth in [2, 3]:
+                stack[-1].remove(element)
+    return model
+
+
+def get_reaction(model:dict, reaction_name:str) -> dict:
+    """Get a reaction read by read_model() from its name
+
+    Args:
+        model (dict): Model read by read_model()
+        reaction_name (str): Reaction ID
+
+    Raises:
+        ValueError: No reaction found
+
+    Returns:
+        dict: Reaction
     """
-    fbc = None 
-    for nss in ET._namespaces(sbml):
-        for key in nss:
-            if key is not None and 'fbc' in key:
-                fbc=key
-                break
-    return fbc
-
-def get_listOfParameters(model)-> dict:
-    """return list of reactions of a SBML model"""
-    listOfParameters = dict()
-    for e in model:
-        tag = get_sbml_tag(e)
-        if tag == "listOfParameters":
-            for param in e:
-                listOfParameters[param.get('id')]=param.get('value') 
-            break
-    return listOfParameters
+    for reaction in model["reactions"]:
+        if reaction_name == reaction["id"]:
+            return reaction
+    raise ValueError(f"ERROR: No reaction {reaction_name} found in list of reactions \n")
 
-def get_listOfFluxObjectives(model,fbc)-> list:
-    """return list of reactions of a SBML model"""
-    listOfFluxObjectives = list()
 
-    for e in model:
-        tag = get_sbml_tag(e)
-        if tag == "listOfObjectives":
-            for lo in e[0]:
-                if lo:
-                    for o in lo:
-                        name = o.attrib.get('{'+fbc+'}reaction')
-                        coef = o.attrib.get('{'+fbc+'}coefficient')
-                        reaction = get_reaction_from_name(model, fbc, name)
-                        listOfFluxObjectives.append([name,coef,reaction])
-            break
-    return listOfFluxObjectives
-
-
-def read_SBML_species(filename):
-    """Yield names of species listed in given SBML file"""
-    model_dict = dict()
-    tree = ET.parse(filename)
-    sbml = tree.getroot()
-    model = get_model(sbml)
-    species_list = list()
-    reactions_list = list()
-    
-    for species in get_listOfSpecies(model):
-        species_list.append(species.attrib['id'])
-    for reaction in get_listOfReactions(model):
-        reactions_list.append(f"{reaction.attrib['id']}")
-
-    model_dict['Metabolites'] = species_list
-    model_dict['Reactions'] = reactions_list
-    return model_dict
-
-def get_used_metabolites(filename, call_log=True):
+def read_SBML_species(model:dict):
+    """Get names of species and reactions listed in a SBML model read by read_model()"""
+    return {'Metabolites': model["species"],
+            'Reactions': [reaction["id"] for reaction in model["reactions"]]}
+
+
+def get_used_metabolites(model:dict, call_log=True):
     """Determine from source file the truly used metabolite (and not the list of species)
 
     Args:
-        filename (str): Path to thie SBML file
+        model (dict): SBML model read by read_model()
 
     Returns:
         used_metabolites (set): Set of used metabolites
     """
-    tree = ET.parse(filename)
-    sbml = tree.getroot()
-    model = get_model(sbml)
     # SBML has species that are never used on any reactions 
     # but are present into species list
     # Also, there is some reaction that involves species but 
     # having boundaries to [0,0], so we are not taken into account
     # the species of the species of these reactions into the used metabolites
     used_metabolites = set()
+    parameters = model["parameters"]
 
-    fbc = get_fbc(get_root(filename)[0])
-    parameters = get_listOfParameters(model)
-
-    for reaction in get_listOfReactions(model):
-        ubound =  parameters[reaction.attrib.get('{'+fbc+'}upperFluxBound')]
-        lbound = parameters[reaction.attrib.get('{'+fbc+'}lowerFluxBound')]
+    for reaction in model["reactions"]:
+        ubound = parameters[reaction["upperFluxBound"]]
+        lbound = parameters[reaction["lowerFluxBound"]]
         if float(ubound) == 0 and float(lbound) == 0  and call_log:
-            logger.log.warning(f"Reaction {reaction.attrib['id']} deleted, boudaries [0,0]")
+            logger.log.warning(f"Reaction {reaction['id']} deleted, boudaries [0,0]")
             continue
         else:
-            reactants = get_listOfReactants(reaction)
-            products = get_listOfProducts(reaction)
-            for reactant in reactants:
+            for reactant in reaction["reactants"]:
                 used_metabolites.add(reactant[0])
-            for product in products:
+            for product in reaction["products"]:
                 used_metabolites.add(product[0])
 
     return used_metabolites
@@ -1,46 +1,93 @@
 from .network import Network
-from menetools import run_menescope
-from .file import is_valid_dir, save
+from .file import is_valid_dir, save, load_json
+from os import path
 from os.path import join
+from hashlib import sha256
+from multiprocessing import Pool
+from time import time
 from .sbml import get_used_metabolites
-import libsbml
-from padmet.utils.sbmlPlugin import convert_from_coded_id
-from padmet.utils.connection import sbmlGenerator
+from .registry import REGISTRY
+from .scopeengine import ScopeEngine, WORD_SIZE
 import sys
 from . import logger
 
 
+# Scope engine and network size used by the scope workers
+_scope_engine = None
+_size_all_metabolites = 0
+
+
 class Scope:
-    def __init__(self, file:str, network:Network, output_dir:str):
+    def __init__(self, file:str, network:Network, output_dir:str, workers:int=1):
         """Initialize Object Scope
 
         Args:
             file (str): SBML File (Needed to detect source used metabolites on the network)
             network (Network): Corrected Network
+            output_dir (str): Output directory
+            workers (int, optional): Number of processes computing the scopes. Defaults to 1.
         """
         self.file = file
         self.network = network
         self.output_dir = output_dir
+        self.workers = workers
         self.dir_seeds_sbml = is_valid_dir(join(output_dir,'sbml'))
         self.dir_scope = is_valid_dir(join(output_dir,'scope'))
 
     ######################## METHODS ########################
     def execute(self):
         """Execute the scope from seeds solution for each solution and save it into file.
-        Creates an intermediate seed sbml file.
+        Creates a seed sbml file for each solution. The solutions whose scope file 
+        already exists for the same set of seeds are not computed again.
         """
-        # Get global data on the network
-        set_used_metabolites = get_used_metabolites(self.file)
-
-        # run the scope for each solutions of the result
+        # Get global data on the network, the SBML file is parsed once for all solutions
+        size_all_metabolites = len(get_used_metabolites(REGISTRY.get_sbml_model(self.file)))
+        engine = REGISTRY.get_scope_engine(self.file)
+
+        tasks, nb_skipped = self.get_tasks()
+        if nb_skipped:
+            logger.log.info(f"Scope: {nb_skipped} solutions already computed, skipped")
+        # The solutions of a chunk are propagated at once by a worker
+        chunks = [tasks[index:index+WORD_SIZE] for index in range(0, len(tasks), WORD_SIZE)]
+
+        pool = None
+        if self.workers > 1 and len(chunks) > 1:
+            workers = min(self.workers, len(chunks))
+            pool = Pool(workers, initializer=init_scope_worker, initargs=(engine, size_all_metabolites))
+            logger.print_log(f'Scope on {workers} workers', 'debug')
+            chunk_results = pool.imap_unordered(scope_worker, chunks)
+        else:
+            init_scope_worker(engine, size_all_metabolites)
+            chunk_results = map(scope_worker, chunks)
+
+        logger.log.info(f"Scope running for {len(tasks)} solutions...")
+        nb_done = 0
+        start = time()
+        try:
+            for nb_chunk_done in chunk_results:
+                nb_done += nb_chunk_done
+                duration = time() - start
+                logger.log.info(f"Scope: {nb_done}/{len(tasks)} solutions "\
+                                f"({round(nb_done / duration, 1) if duration else nb_done} solutions/s)")
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+        logger.print_log(f"Scope: {nb_done} solutions computed in {round(time() - start, 3)}s, "\
+                         f"{nb_skipped} already computed", "info")
+
+
+    def get_tasks(self):
+        """List the solutions whose scope has to be computed, with their output files.
+        The output directories are created once.
+
+        Returns:
+            list, int: Tasks of the solutions to compute, number of solutions skipped
+        """
+        tasks = list()
+        nb_skipped = 0
+        directories = dict()
         for result in self.network.result_seeds:
-            #TODO : print better in TABLE
-            print(result.run_mode.upper())
-            print(result.solver_type)
-            print(result.search_mode)
-            print(result.name)
-            print("Accumulation:", result.accu)
-
             if  result.accu == True:
                 accu="accu"
             else:
@@ -49,31 +96,112 @@ class Scope:
             run_mode = result.run_mode.lower().replace(" ","_").replace("-", "_")
             solver = result.solver_type.lower().replace(" ","_").replace("-", "_")
             search_mode = result.search_mode.lower().replace(" ","_").replace("-", "_")
-            seeds=set(result.seeds_list)
+            seeds = sorted(set(result.seeds_list))
+            seeds_hash = get_seeds_hash(seeds)
+
+            sub_dir = (run_mode, solver, search_mode, accu)
+            if sub_dir not in directories:
+                directories[sub_dir] = (is_valid_dir(join(self.dir_seeds_sbml, *sub_dir)),
+                                        is_valid_dir(join(self.dir_scope, *sub_dir)))
+            seeds_sbml_complete_dir_path, scope_dir_path = directories[sub_dir]
+
+            if is_scope_done(join(scope_dir_path, f'{result.name}.json'), seeds_hash):
+                nb_skipped += 1
+                continue
+            #TODO : print better in TABLE
+            header = f"{result.run_mode.upper()}\n{result.solver_type}\n{result.search_mode}\n"\
+                     f"{result.name}\nAccumulation: {result.accu}"
+            tasks.append((result.name, seeds, seeds_hash, header,
+                          join(seeds_sbml_complete_dir_path, f'{result.name}.sbml'), scope_dir_path))
+        return tasks, nb_skipped
+
 
-            seeds_sbml_complete_dir_path = is_valid_dir(join(self.dir_seeds_sbml, run_mode, solver, search_mode, accu))
-            seeds_sbml_path=join(seeds_sbml_complete_dir_path, f'{result.name}.sbml')
-            scope_dir_path = is_valid_dir(join(self.dir_scope, run_mode, solver, search_mode, accu))
 
-            # Write the seed into sbl format for each solutions
-            create_species_sbml(seeds, seeds_sbml_path)
-            logger.log.info(f"Seeds sbml file created: {seeds_sbml_path}")
-            
-            # Run menescope from seed to get the scope
-            logger.log.info(f"Scope running for {seeds_sbml_path}...") 
-            scope_model = run_menescope(self.file, seeds_sbml_path)
-            logger.log.info(f"Scope terminated.") 
-            scope_model["size_scope"] = len(scope_model["scope"])
-            scope_model["size_all_metabolites"] = len(set_used_metabolites)
+######################## FUNCTIONS ########################
+def init_scope_worker(engine:ScopeEngine, size_all_metabolites:int):
+    """Initialize a scope worker process
+
+    Args:
+        engine (ScopeEngine): Scope engine of the network
+        size_all_metabolites (int): Number of metabolites used by the network
+    """
+    global _scope_engine, _size_all_metabolites
+    _scope_engine = engine
+    _size_all_metabolites = size_all_metabolites
+
+
+def scope_worker(tasks:list):
+    """Compute the scopes of a chunk of solutions and write their files
+
+    Args:
+        tasks (list): Tasks of the solutions (see Scope.get_tasks)
+
+    Returns:
+        int: Number of solutions computed
+    """
+    scope_models = _scope_engine.get_scopes([seeds for _, seeds, _, _, _, _ in tasks])
+    for (name, seeds, seeds_hash, header, seeds_sbml_path, scope_dir_path), scope_model \
+        in zip(tasks, scope_models):
+        # Write the seed into sbl format for each solutions
+        create_species_sbml(seeds, seeds_sbml_path)
+        logger.log.info(f"Seeds sbml file created: {seeds_sbml_path}")
 
+        scope_model["size_scope"] = len(scope_model["scope"])
+        scope_model["size_all_metabolites"] = _size_all_metabolites
+        scope_model["seeds_hash"] = seeds_hash
 
-            
-            print("size of scope", scope_model["size_scope"])
-            print("size of all metabolites", scope_model["size_all_metabolites"],"\n\n")
-            save(f'{result.name}', scope_dir_path, scope_model, "json")
-            logger.log.info(f"Scope saved in: {scope_dir_path}/{result.name}.json.") 
+        print(f'{header}\nsize of scope {scope_model["size_scope"]}\n'\
+              f'size of all metabolites {scope_model["size_all_metabolites"]}\n\n')
+        # The scope file is written last, its existence marks the solution as done
+        save(f'{name}', scope_dir_path, scope_model, "json")
+        logger.log.info(f"Scope saved in: {scope_dir_path}/{name}.json.")
+    return len(tasks)
 
 
+def get_seeds_hash(seeds:list):
+    """Hash a set of seeds, independently of its order
+
+    Args:
+        seeds (list): Set of seeds
+
+    Returns:
+        str: Hash of the seeds
+    """
+    return sha256("\n".join(sorted(seed.strip('"') for seed in seeds)).encode()).hexdigest()
+
+
+def is_scope_done(scope_path:str, seeds_hash:str):
+    """Check if the scope file of a solution exists for the same set of seeds
+
+    Args:
+        scope_path (str): Path of the scope json file
+        seeds_hash (str): Hash of the seeds of the solution
+
+    Returns:
+        bool: The scope is already computed
+    """
+    if not path.isfile(scope_path):
+        return False
+    try:
+        return load_json(scope_path).get("seeds_hash") == seeds_hash
+    # Partially written file of an interrupted run
+    except (OSError, ValueError):
+        return False
+
+
+def run_scope(engine:ScopeEngine, seeds:set):
+    """Get the producible metabolites of the network from the seeds, as menetools 
+    menescope does from the network and seeds SBML files
+
+    Args:
+        engine (ScopeEngine): Scope engine of the network (see ModelRegistry.get_scope_engine)
+        seeds (set): Set of seeds
+
+    Returns:
+        dict: scope, produced_seeds, non_produced_seeds and absent_seeds lists
+    """
+    return engine.get_scope(seeds)
+
 
 def create_species_sbml(metabolites, outputfile):
     """Create a SBML files with a list of species containing metabolites of the input set.
@@ -83,6 +211,9 @@ def create_species_sbml(metabolites, outputfile):
         metabolites (set): set of metabolites
         outputfile (str): SBML file to be written
     """
+    import libsbml
+    from padmet.utils.sbmlPlugin import convert_from_coded_id
+    from padmet.utils.connection import sbmlGenerator
     document = libsbml.SBMLDocument(2, 1)
     model = document.createModel("metabolites")
     forbidden_charlist = ['-', '|', '/', '(', ')',
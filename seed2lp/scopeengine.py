@@ -0,0 +1,251 @@
+# Object ScopeEngine constitued of:
+#   - metabolites (list): Metabolites used by the reactions, by index
+#   - metabolite_index (dict): Index of each metabolite
+#   - needed (np.ndarray): Number of distinct reactants needed by each direction
+#   - consumers_indptr, consumers_indices (np.ndarray): CSR index of the directions
+#                       consuming each metabolite (metabolite -> directions)
+#   - reactants_indptr, reactants_indices (np.ndarray): CSR of the distinct reactants
+#                       of each direction (direction -> metabolites)
+#   - products_indptr, products_indices (np.ndarray): CSR of the distinct products
+#                       of each direction (direction -> metabolites)
+#   - producers_indptr, producers_indices (np.ndarray): CSR index of the directions
+#                       producing each metabolite (metabolite -> directions)
+#
+# Forward propagation of the scope, computed from the in-memory sbml records with
+# the semantics of menetools menescope (get_scope.lp):
+#   - every reaction of the SBML file is used, whatever its bounds, and a reaction
+#     is reversible when its SBML reversible attribute is "true"
+#   - a direction (reactants -> products, or products -> reactants for reversible
+#     reactions) is activated once all its reactants are in the scope, a direction
+#     without reactant is always activated
+#   - seeds used by no reaction are absent seeds, the other seeds are in the scope
+#     and are produced seeds if an activated direction produces them
+# A single seed set is propagated with reaction counters, each metabolite entering
+# the scope decreasing the counter of its consumers once. Many seed sets are
+# propagated at once as bitmasks: each metabolite and direction holds one bit per
+# seed set into 64 bits words, a direction being the AND of its reactants and a
+# metabolite the OR of its producers until the fixpoint.
+
+import numpy as np
+
+WORD_SIZE = 64
+
+
+class ScopeEngine:
+    def __init__(self, reactions:list):
+        """Initialize Object ScopeEngine
+
+        Args:
+            reactions (list): Reactions of the sbml records (see sbml.read_model)
+        """
+        self.metabolites = list()
+        self.metabolite_index = dict()
+        reactants = list()
+        products = list()
+        for reaction in reactions:
+            left = self.get_indices(reaction["reactants"])
+            right = self.get_indices(reaction["products"])
+            reactants.append(left)
+            products.append(right)
+            if reaction["reversible"] == "true":
+                reactants.append(right)
+                products.append(left)
+
+        self.needed = np.array([len(direction) for direction in reactants], dtype=np.int64)
+        self.reactants_indptr, self.reactants_indices = to_csr(reactants)
+        self.products_indptr, self.products_indices = to_csr(products)
+        self.consumers_indptr, self.consumers_indices = transpose_csr(
+            self.reactants_indptr, self.reactants_indices, len(self.metabolites))
+        self.producers_indptr, self.producers_indices = transpose_csr(
+            self.products_indptr, self.products_indices, len(self.metabolites))
+
+
+    ######################## METHODS ########################
+    def get_indices(self, species:list):
+        """Index the distinct metabolites of a side of a reaction
+
+        Args:
+            species (list): [species, stoichiometry] lists of the sbml records
+
+        Returns:
+            list: Sorted indices of the metabolites
+        """
+        indices = set()
+        for metabolite, _ in species:
+            if metabolite not in self.metabolite_index:
+                self.metabolite_index[metabolite] = len(self.metabolites)
+                self.metabolites.append(metabolite)
+            indices.add(self.metabolite_index[metabolite])
+        return sorted(indices)
+
+
+    def split_seeds(self, seeds:set):
+        """Separate the seeds used by the network from the absent ones
+
+        Args:
+            seeds (set): Set of seeds
+
+        Returns:
+            list, list: Indices of the seeds used by the network, absent seeds
+        """
+        true_seeds = set()
+        absent_seeds = set()
+        for seed in seeds:
+            seed = seed.strip('"')
+            if seed in self.metabolite_index:
+                true_seeds.add(self.metabolite_index[seed])
+            else:
+                absent_seeds.add(seed)
+        return sorted(true_seeds), sorted(absent_seeds)
+
+
+    def get_results(self, in_scope:np.ndarray, produced:np.ndarray,
+                    true_seeds:list, absent_seeds:list):
+        """Write the scope of a seed set as menescope does
+
+        Args:
+            in_scope (np.ndarray): Metabolites in the scope (bool)
+            produced (np.ndarray): Metabolites produced by an activated direction (bool)
+            true_seeds (list): Indices of the seeds used by the network
+            absent_seeds (list): Seeds not used by the network
+
+        Returns:
+            dict: scope, produced_seeds, non_produced_seeds and absent_seeds lists
+        """
+        metabolites = self.metabolites
+        return {"scope": sorted(metabolites[index] for index in np.flatnonzero(in_scope)),
+                "produced_seeds": sorted(metabolites[index] for index in true_seeds if produced[index]),
+                "non_produced_seeds": sorted(metabolites[index] for index in true_seeds if not produced[index]),
+                "absent_seeds": absent_seeds}
+
+
+    def get_scope(self, seeds:set):
+        """Propagate a seed set with reaction counters
+
+        Args:
+            seeds (set): Set of seeds
+
+        Returns:
+            dict: scope, produced_seeds, non_produced_seeds and absent_seeds lists
+        """
+        true_seeds, absent_seeds = self.split_seeds(seeds)
+        in_scope = np.zeros(len(self.metabolites), dtype=bool)
+        produced = np.zeros(len(self.metabolites), dtype=bool)
+        counters = self.needed.tolist()
+        consumers_indptr = self.consumers_indptr.tolist()
+        consumers_indices = self.consumers_indices.tolist()
+        products_indptr = self.products_indptr.tolist()
+        products_indices = self.products_indices.tolist()
+
+        in_scope[true_seeds] = True
+        queue = list(true_seeds)
+        activated = [direction for direction, count in enumerate(counters) if count == 0]
+        while activated or queue:
+            # Products of the activated directions enter the scope
+            for direction in activated:
+                for metabolite in products_indices[products_indptr[direction]:products_indptr[direction+1]]:
+                    produced[metabolite] = True
+                    if not in_scope[metabolite]:
+                        in_scope[metabolite] = True
+                        queue.append(metabolite)
+            activated = list()
+            # Each metabolite of the scope is counted once by its consumers
+            for metabolite in queue:
+                for direction in consumers_indices[consumers_indptr[metabolite]:consumers_indptr[metabolite+1]]:
+                    counters[direction] -= 1
+                    if counters[direction] == 0:
+                        activated.append(direction)
+            queue = list()
+        return self.get_results(in_scope, produced, true_seeds, absent_seeds)
+
+
+    def get_scopes(self, seed_sets:list):
+        """Propagate many seed sets at once, one bit of a 64 bits word per seed set
+
+        Args:
+            seed_sets (list): List of seed sets
+
+        Returns:
+            list: scope, produced_seeds, non_produced_seeds and absent_seeds lists of each seed set
+        """
+        splitted = [self.split_seeds(seeds) for seeds in seed_sets]
+        nb_words = max(1, -(-len(seed_sets) // WORD_SIZE))
+        seeds_masks = np.zeros((len(self.metabolites), nb_words), dtype=np.uint64)
+        for position, (true_seeds, _) in enumerate(splitted):
+            word, bit = divmod(position, WORD_SIZE)
+            seeds_masks[true_seeds, word] |= np.uint64(1) << np.uint64(bit)
+
+        in_scope, produced = self.propagate(seeds_masks)
+        results = list()
+        for position, (true_seeds, absent_seeds) in enumerate(splitted):
+            word, bit = divmod(position, WORD_SIZE)
+            mask = np.uint64(1) << np.uint64(bit)
+            results.append(self.get_results((in_scope[:, word] & mask) != 0,
+                                            (produced[:, word] & mask) != 0, true_seeds, absent_seeds))
+        return results
+
+
+    def propagate(self, seeds_masks:np.ndarray):
+        """Propagate the bitmasks of the seeds until the fixpoint
+
+        Args:
+            seeds_masks (np.ndarray): Words of the seed sets of each metabolite
+
+        Returns:
+            np.ndarray, np.ndarray: Words of the scope and of the produced
+                                    metabolites of each metabolite
+        """
+        nb_words = seeds_masks.shape[1]
+        # Only non empty rows are reduced, an empty row does not hold any element
+        with_reactants = np.flatnonzero(self.needed)
+        with_producers = np.flatnonzero(np.diff(self.producers_indptr))
+        activated = np.full((len(self.needed), nb_words), np.iinfo(np.uint64).max, dtype=np.uint64)
+        produced = np.zeros_like(seeds_masks)
+        in_scope = seeds_masks.copy()
+        while True:
+            if len(with_reactants):
+                activated[with_reactants] = np.bitwise_and.reduceat(
+                    in_scope[self.reactants_indices], self.reactants_indptr[with_reactants], axis=0)
+            if len(with_producers):
+                produced[with_producers] = np.bitwise_or.reduceat(
+                    activated[self.producers_indices], self.producers_indptr[with_producers], axis=0)
+            next_scope = seeds_masks | produced
+            if np.array_equal(next_scope, in_scope):
+                return in_scope, produced
+            in_scope = next_scope
+    ########################################################
+
+
+######################## FUNCTIONS ########################
+def to_csr(rows:list):
+    """Convert lists of column indices into CSR arrays
+
+    Args:
+        rows (list): Sorted column indices of each row
+
+    Returns:
+        np.ndarray, np.ndarray: indptr and indices arrays
+    """
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    indices = np.fromiter((column for row in rows for column in row), dtype=np.int64, count=indptr[-1])
+    return indptr, indices
+
+
+def transpose_csr(indptr:np.ndarray, indices:np.ndarray, nb_columns:int):
+    """Transpose CSR arrays, rows of the result being the columns of the input
+
+    Args:
+        indptr (np.ndarray): indptr array
+        indices (np.ndarray): indices array
+        nb_columns (int): Number of columns
+
+    Returns:
+        np.ndarray, np.ndarray: indptr and indices arrays of the transposed matrix
+    """
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    transposed_indptr = np.zeros(nb_columns + 1, dtype=np.int64)
+    transposed_indptr[1:] = np.cumsum(np.bincount(indices, minlength=nb_columns))
+    return transposed_indptr, rows[order]
+########################################################
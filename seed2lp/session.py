@@ -0,0 +1,243 @@
+# Object GroundSession constitued of:
+#   - options (list): Clingo options of the control: constants, configuration and strategy
+#   - control (clingo.Control): Control holding the ground program, not sent through
+#                               multiprocessing queues
+#   - files (list): ASP files already grounded, the first ones into the base program
+#                   and each next one into its own program part
+#   - defaults (dict): Value of the search options once the control is created,
+#                      for each solver configuration (one per thread with a portfolio)
+#   - grounding_time (float): Time spent to ground the last added files
+#   - rules (int): Number of rules of the ground program
+#   - cache (GroundCache): On-disk cache of ground programs, None when not used
+#   - cache_status (str): Ground program of the last grounding loaded from the cache ("hit")
+#                         or added to it ("miss"), None when the cache is not used
+#   - symbolic (bool): The ground program is extended by grounding new program parts
+#   - facts (str): Facts of the instance, added from memory into the base program
+#   - theory_class (type): Class of the clingo theory registered on the control
+#                          (clingo-lpx), None without theory
+#   - theory: Theory registered on the current control, None without theory
+#
+# The instance and the encoding are grounded once, then every search
+# (one model, enumeration, intersection, union, for classic, filter and
+# guess-check modes) solves the same ground program. Only the search options
+# are changed between two solves: optimization mode, enumeration mode,
+# projection, domain heuristic and number of models. Solver options are set
+# on the configuration of every solver thread.
+# Additional files (minimize) are grounded as a new program part the first
+# time they are asked for, the ground program is extended without grounding
+# again the base program.
+# A ground program loaded from the cache (aspif) only knows the shown atoms:
+# it can not be extended, the files are then loaded again from the cache
+# as a whole new program.
+# With a theory, the files are rewritten by the theory and the theory is
+# prepared once grounded: the program can not be extended, new files are
+# grounded with the previous ones into a new control.
+
+import clingo
+from clingo import ast
+from time import time
+from .groundcache import GroundCache
+from . import logger
+
+# Command line options changed between two solves, with their clingo configuration key
+SEARCH_OPTIONS = {'--opt-mode': ('solve', 'opt_mode'),
+                  '--enum-mode': ('solve', 'enum_mode'),
+                  '--project': ('solve', 'project'),
+                  '--models': ('solve', 'models'),
+                  '-n': ('solve', 'models'),
+                  '--heuristic': ('solver', 'heuristic'),
+                  '--dom-mod': ('solver', 'dom_mod')}
+
+class GroundSession:
+    def __init__(self, options:list, cache:GroundCache=None, facts:str="", theory_class:type=None):
+        """Initialize Object GroundSession
+
+        Args:
+            options (list): Clingo options of the control: constants, configuration and strategy
+            cache (GroundCache, optional): On-disk cache of ground programs, not used 
+                                           with a theory. Defaults to None.
+            facts (str, optional): Facts of the instance. Defaults to "".
+            theory_class (type, optional): Class of the clingo theory registered on the control 
+                                           (clingo-lpx). Defaults to None.
+        """
+        self.options = list(filter(None, options)) + ["--warn=none"]
+        self.control = None
+        self.files = list()
+        self.defaults = dict()
+        self.grounding_time = 0
+        self.rules = 0
+        self.theory_class = theory_class
+        self.theory = None
+        self.cache = cache if theory_class is None else None
+        self.cache_status = None
+        self.symbolic = self.cache is None and theory_class is None
+        self.facts = facts
+
+
+    def __getstate__(self):
+        # The clingo control can not be sent through multiprocessing queues
+        state = self.__dict__.copy()
+        state['control'] = None
+        state['theory'] = None
+        state['files'] = list()
+        # The facts are only needed to ground, by the process having created the control
+        state['facts'] = ""
+        return state
+
+
+    ######################## METHODS ########################
+    def ground(self, asp_files:list):
+        """Ground the files not grounded yet. The first call grounds the base program,
+        the next ones add a program part for each new file.
+
+        Args:
+            asp_files (list): List of ASP files used for solving
+
+        Returns:
+            float: Grounding time, 0 when the ground program is reused
+        """
+        new_files = [file for file in asp_files if file not in self.files]
+        self.cache_status = None
+        if not new_files:
+            logger.print_log('Ground program reused', 'debug')
+            self.grounding_time = 0
+            return self.grounding_time
+
+        time_ground = time()
+        if self.control is None or not self.symbolic:
+            new_files = self.files + new_files
+            self.files = list()
+            self.rules = 0
+            self.init_control(new_files)
+        else:
+            parts = list()
+            for file in new_files:
+                name = f'part_{len(self.files) + len(parts)}'
+                with open(file) as f:
+                    self.control.add(name, [], f.read())
+                parts.append((name, []))
+            self.control.ground(parts)
+        self.files.extend(new_files)
+        self.grounding_time = time() - time_ground
+        self.rules += int(self.control.statistics['problem']['lpStep']['rules'])
+        logger.print_log(f'Grounded: {", ".join(new_files)} in {round(self.grounding_time, 3)}s, '\
+                         f'{self.rules} rules', 'debug')
+        return self.grounding_time
+
+
+    def init_control(self, asp_files:list):
+        """Create the control and ground the base program, or load it from the cache
+
+        Args:
+            asp_files (list): List of ASP files used for solving
+        """
+        self.control = clingo.Control(self.options)
+        for section, key in SEARCH_OPTIONS.values():
+            self.defaults[section, key] = [getattr(configuration, key) 
+                                           for configuration in self.get_configurations(section)]
+        if self.theory_class is not None:
+            self.theory = self.theory_class()
+            self.theory.register(self.control)
+            # The instance has no theory atom, it does not need to be rewritten
+            self.control.add("base", [], self.facts)
+            with ast.ProgramBuilder(self.control) as builder:
+                ast.parse_files(asp_files, lambda statement: self.theory.rewrite_ast(statement, builder.add))
+        elif self.cache is None:
+            self.control.add("base", [], self.facts)
+            for file in asp_files:
+                self.control.load(file)
+        else:
+            # Constants change the ground program, not the configuration and strategy
+            constants = [option for option in self.options if not option.startswith('--')]
+            key = self.cache.get_key(asp_files, constants, self.facts)
+            aspif_path = self.cache.get(key)
+            self.cache_status = "hit"
+            if aspif_path is None:
+                aspif_path = self.cache.add(key, asp_files, self.options, self.facts)
+                self.cache_status = "miss"
+            logger.print_log(f'Ground cache {self.cache_status}: {aspif_path}', 'debug')
+            self.control.load(aspif_path)
+        self.control.ground([("base", [])])
+        if self.theory is not None:
+            self.theory.prepare(self.control)
+
+
+    def get_control(self, asp_files:list, search_options:list, optimize:bool=True):
+        """Get the control holding the ground program, set with the search options.
+        The options not given are set back to their value at creation.
+
+        Args:
+            asp_files (list): List of ASP files used for solving
+            search_options (list): Command line options of the search (--opt-mode=..., -n 0, ...)
+            optimize (bool, optional): Use the optimization statements, when False a minimize
+                                       statement grounded for a previous search is ignored.
+                                       Defaults to True.
+
+        Returns:
+            clingo.Control: Control ready to solve
+        """
+        self.ground(asp_files)
+        values = dict(self.defaults)
+        for option in filter(None, search_options):
+            name, _, value = option.replace(' ', '=', 1).partition('=')
+            if name in SEARCH_OPTIONS:
+                values[SEARCH_OPTIONS[name]] = value
+            elif option not in self.options:
+                logger.print_log(f'Option {option} ignored: not a search option', 'debug')
+        if not optimize:
+            values['solve', 'opt_mode'] = 'ignore'
+        for (section, key), value in values.items():
+            for index, configuration in enumerate(self.get_configurations(section)):
+                setattr(configuration, key, value[index] if isinstance(value, list) else value)
+        return self.control
+
+
+    def get_configurations(self, section:str):
+        """Get the configurations of a section of the control. The solver section
+        has one configuration per solver thread when a portfolio is used.
+
+        Args:
+            section (str): Section of the configuration (solve or solver)
+
+        Returns:
+            list: Configurations of the section
+        """
+        configuration = getattr(self.control.configuration, section)
+        if section == 'solver':
+            return [configuration[index] for index in range(len(configuration))]
+        return [configuration]
+
+
+    def get_command(self, search_options:list):
+        """Get the clingo command equivalent to the search, for messages
+
+        Args:
+            search_options (list): Command line options of the search
+
+        Returns:
+            str: Clingo command
+        """
+        command = 'clingo-lpx ' if self.theory_class is not None else 'clingo '
+        return command + ' '.join(self.options + list(filter(None, search_options)) + self.files)
+    ########################################################
+
+
+def get_portfolio_names(portfolio_file:str):
+    """Get the name of the configurations of a clasp portfolio file,
+    in the order they are given to the solver threads
+
+    Args:
+        portfolio_file (str): Clasp portfolio file (<name>(<base>): <options> lines)
+
+    Returns:
+        list: Names of the configurations
+    """
+    names = list()
+    with open(portfolio_file) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name = line.split(':', 1)[0].split('(', 1)[0]
+            names.append(name.strip().strip('[]'))
+    return names
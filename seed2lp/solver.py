@@ -17,10 +17,10 @@
 #    - output (dict): List of all solutions
 #    - timer_list (dict): List of all timers to find solution
 #    - verbose (bool): Set debug mode
+#    - instance (str): Facts of the instance, given to clingo without instance file
 
 from os import path
 from .network import  Network
-from .file import write_instance_file
 from dataclasses import dataclass
 from . import logger
 from . import color
@@ -35,6 +35,7 @@ class ASP_CLINGO:
     ASP_SRC_FLUX = path.join(SRC_DIR, 'asp/flux.lp')
     ASP_SRC_MAXIMIZE_FLUX = path.join(SRC_DIR, 'asp/maximize_flux.lp')
     ASP_SRC_MAXIMIZE_PRODUCED_TARGET = path.join(SRC_DIR, 'asp/maximize_produced_target.lp')
+    CLINGO_PORTFOLIO = path.join(SRC_DIR, 'asp/portfolio.cfg')
     CLINGO_CONFIGURATION = {
             'minimize-enumeration': ['--project=show', '--opt-mode=enum'],
             'minimize-union':  ['--enum-mode=brave', '--opt-mode=enum'],
@@ -110,6 +111,7 @@ class Solver:
             self.diversity = False
         self.grounded = str()
         self.temp_result_file = str()
+        self.instance = str()
         
 
     
@@ -145,13 +147,15 @@ class Solver:
         else:
             self.clingo_strategy = ""
 
-    def _set_instance_file(self):
-        """Prepare ASP instance filename for saving into temporary directory file
+    def _set_instance(self, facts:str=None):
+        """Set the facts of the instance. They are added into the clingo control
+        from memory: no instance file is written then parsed back.
+
+        Args:
+            facts (str, optional): Facts of the instance. Defaults to None, the network facts.
         """
-        filename = f'instance_{self.network.name}_{self.short_option}'
-        self.network.instance_file = path.join(self.temp_dir,f'{filename}.lp')
-        write_instance_file(self.network.instance_file, self.network.facts)
-        logger.log.info(f"Instance file written: {self.network.instance_file}")
+        self.instance = facts or self.network.facts
+        logger.log.info(f"Instance: {round(len(self.instance)/1024, 1)} kB of facts")
 
     
     def _set_temp_result_file(self):
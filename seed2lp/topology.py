@@ -0,0 +1,177 @@
+# Object Topology constitued of:
+#   - reactions (dict): Reactants and products of each reaction written as reaction/1 facts,
+#                       a reversible reaction being splitted into its two directions (R and rev_R)
+#   - exchanges (set): Reactions tagged as exchange
+#   - reverses (set): Reverse direction of the reversible reactions (rev_R)
+#   - forwards (set): Forward direction of the reversible reactions (R)
+#   - metabolites (dict): Types of each metabolite (exchange, transport, other)
+#   - producers (dict): Reactions producing each metabolite
+#   - consumers (dict): Reactions consuming each metabolite
+#
+# Graph version of the topological rules of seed-solving.lp that do not depend on the
+# chosen seeds. They are computed in linear time before grounding and given to the solver
+# as facts (constant precomputed=1): transported_meta, impossible_seed, authorized_accu,
+# seed_external, activated_initial and can_reach.
+# Reactions removed with the import reactions (rm_ facts) are not part of the graph,
+# as they are not part of the reasoning.
+
+from collections import deque
+from .core import NetworkCore, METABOLITE_TYPES
+
+
+class Topology:
+    def __init__(self, core:NetworkCore, keep_import_reactions:bool):
+        """Initialize Object Topology
+
+        Args:
+            core (NetworkCore): Indexed arrays of the normalized network
+            keep_import_reactions (bool): Import reactions are not removed
+        """
+        self.reactions = dict()
+        self.exchanges = set()
+        self.reverses = set()
+        self.forwards = set()
+        self.metabolites = dict()
+        self.producers = dict()
+        self.consumers = dict()
+        for direction in core.get_directions(keep_import_reactions):
+            self.add_direction(core, *direction)
+
+
+    ######################## METHODS ########################
+    def add_direction(self, core:NetworkCore, column:int, name:str, is_reversed:bool, is_removed:bool,
+                      reactant_side:str, product_side:str):
+        """Add a direction of a reaction into the graph, as written by NetworkCore.convert_to_facts
+
+        Args:
+            core (NetworkCore): Indexed arrays of the normalized network
+            column (int): Index of the reaction into the core
+            name (str): Name of the direction (R or rev_R)
+            is_reversed (bool): The direction is the reverse of a reversible reaction
+            is_removed (bool): Import reaction removed (rm_ facts)
+            reactant_side (str): Side of the reaction consumed by the direction
+            product_side (str): Side of the reaction produced by the direction
+        """
+        if core.reversible[column]:
+            (self.reverses if is_reversed else self.forwards).add(name)
+        if is_removed:
+            return
+        if core.exchange[column]:
+            self.exchanges.add(name)
+        reactants = core.get_metabolites(column, reactant_side)[0]
+        products = core.get_metabolites(column, product_side)[0]
+        self.reactions[name] = ({core.metabolites[row] for row in reactants},
+                                {core.metabolites[row] for row in products})
+        for rows, links in ((reactants, self.consumers), (products, self.producers)):
+            for row in rows:
+                metabolite = core.metabolites[row]
+                self.metabolites.setdefault(metabolite, set()).add(METABOLITE_TYPES[core.metabolite_types[row]])
+                links.setdefault(metabolite, list()).append(name)
+
+
+    def get_transported(self):
+        """Metabolites involved in a transport reaction (transported_meta)
+
+        Returns:
+            set: Transported metabolites
+        """
+        return {metabolite for metabolite, types in self.metabolites.items() if "transport" in types}
+
+
+    def get_never_consumed(self):
+        """Metabolites only produced, never consumed by a reaction
+        (impossible_seed and authorized_accu)
+
+        Returns:
+            set: Never consumed metabolites
+        """
+        return {metabolite for metabolite in self.producers if metabolite not in self.consumers}
+
+
+    def get_seed_external(self, transported:set):
+        """Metabolites consumed and only produced by exchange reactions or by one direction
+        of reversible reactions, that must be seeds in full network mode (seed_external)
+
+        Args:
+            transported (set): Transported metabolites
+
+        Returns:
+            set: External seeds
+        """
+        seed_external = set()
+        for metabolite in self.consumers:
+            if metabolite in transported:
+                continue
+            producers = [reaction for reaction in self.producers.get(metabolite, list())
+                         if reaction not in self.exchanges]
+            if all(reaction in self.reverses for reaction in producers) \
+              or all(reaction in self.forwards for reaction in producers):
+                seed_external.add(metabolite)
+        return seed_external
+
+
+    def get_activated(self, initial:set):
+        """Forward propagation of the activation from initial metabolites (activated_initial).
+        A reaction is activated once all its reactants are, each reaction is visited once.
+
+        Args:
+            initial (set): Initially activated metabolites
+
+        Returns:
+            set: Activated metabolites
+        """
+        activated = set(initial)
+        missing = dict()
+        queue = deque()
+        for reaction, (reactants, _) in self.reactions.items():
+            missing[reaction] = len(reactants - activated)
+            if missing[reaction] == 0:
+                queue.append(reaction)
+        while queue:
+            for product in self.reactions[queue.popleft()][1]:
+                if product in activated:
+                    continue
+                activated.add(product)
+                for reaction in self.consumers.get(product, list()):
+                    missing[reaction] -= 1
+                    if missing[reaction] == 0:
+                        queue.append(reaction)
+        return activated
+
+
+    def get_can_reach(self, targets:list):
+        """Backward propagation from the targets (can_reach): the reactants of a reaction
+        producing a metabolite reaching a target also reach it.
+
+        Args:
+            targets (list): List of targets
+
+        Returns:
+            set: Metabolites on a path to a target
+        """
+        can_reach = set(targets)
+        queue = deque(can_reach)
+        visited = set()
+        while queue:
+            for reaction in self.producers.get(queue.popleft(), list()):
+                if reaction in visited:
+                    continue
+                visited.add(reaction)
+                for reactant in self.reactions[reaction][0] - can_reach:
+                    can_reach.add(reactant)
+                    queue.append(reactant)
+        return can_reach
+
+
+    def get_reaching_reactions(self, can_reach:set):
+        """Reactions having a product on a path to a target
+
+        Args:
+            can_reach (set): Metabolites on a path to a target
+
+        Returns:
+            set: Reactions on a path to a target
+        """
+        return {reaction for reaction, (_, products) in self.reactions.items()
+                if not products.isdisjoint(can_reach)}
+    ########################################################
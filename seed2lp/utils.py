@@ -1,13 +1,12 @@
 """Utilitaries"""
 import os
-import clyngor
 import re
-from re import findall
 from . import logger
 
 
 def solve(*args, **kwargs):
     "Wrapper around clyngor.solve"
+    import clyngor
     kwargs.setdefault('use_clingo_module', False)
     try:
         return clyngor.solve(*args, **kwargs)
@@ -141,43 +140,9 @@ def unquoted(string:str) -> str:
 
 def quoted_data(asp:str) -> str:
     "Return the same atoms as found in given asp code, but with all arguments quoted"
+    import clyngor
     def gen():
         for model in clyngor.solve(inline=asp):
             for pred, args in model:
                 yield f'{pred}(' + ','.join(quoted(str(arg)) for arg in args) + ').'
     return ' '.join(gen())
-
-
-def repair_json(json_str:str, is_clingo_lpx:bool=False):
-    """Function to add closing ] or } to the json after the process has been killed
-    delete also the last element of the json which can be not finished
-
-    Args:
-        proc_output (str): process output
-
-    Returns:
-        str: complete output on json format
-    """
-    close = {'{': '}', 
-             '[': ']'}
-    if is_clingo_lpx:
-        output = json_str.rsplit('{', 1)[0]
-        output = output.rsplit(',', 1)[0]
-    else:
-        output = json_str.rsplit('\"model', 1)[0]
-    # get the list of caracter "{" "[" "]" "}" in the order of apparition 
-    list_open_close=findall("{|\[|\]|}", output)
-    missing_list=list()
-    for car in list_open_close:
-        size=len(missing_list)
-        # delete the opening element when the closing element  appear right after
-        if size!= 0 and ((missing_list[size -1] == "{" and car == "}") 
-            or (missing_list[size -1] == "[" and car == "]")):
-            missing_list.pop(size -1)
-        else:
-            missing_list.append(car)
-    close_str=""
-    for i, open in reversed(list(enumerate(missing_list))):
-        close_str += "\n" + i * "\t" + close[open]
-    logger.log.warning("Output not totally recovered. Json has been repaired but might miss results")
-    return output+close_str
\ No newline at end of file
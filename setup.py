@@ -22,7 +22,7 @@ setup(
 
       packages=find_packages(),
       package_data={
-          "": ["*.yaml"],
+          "": ["*.yaml", "asp/*"],
       },
       entry_points = {
         'console_scripts': ['seed2lp=seed2lp.__main__:main'],
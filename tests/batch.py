@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp batch searching a directory of networks
+"""
+from os import path, listdir
+from time import sleep
+from shutil import rmtree
+from tests.utils import TMP_DIR
+from seed2lp import argument, logger
+from seed2lp.batch import Batch, SUMMARY_FILE
+from seed2lp.file import load_tsv
+from seed2lp.__main__ import run_seed2lp, PROJECT_DIR
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+SBML_DIR = path.join(TEST_DIR,'network/sbml')
+OUTPUT_DIR = path.join(TMP_DIR, "batch")
+SHORT_OPTION = "rm_rxn_tgt_taf_reas_no_accu"
+########################################################
+
+
+def get_batch(resume:bool=False, time_limit:float=0):
+    args = argument.get_config(argument.parse_args(["batch", "target", SBML_DIR, OUTPUT_DIR]), PROJECT_DIR)
+    args |= {"solve": "reasoning", "mode": "minimize", "number_solution": 1, "temp": TMP_DIR}
+    logger.get_logger(SBML_DIR, "batch")
+    return Batch("target", SBML_DIR, OUTPUT_DIR, args, SHORT_OPTION, workers=2,
+                 time_limit=time_limit, resume=resume)
+
+
+def get_summary():
+    return {row[0]: row[1] for row in load_tsv(path.join(OUTPUT_DIR, SUMMARY_FILE))[1:]}
+
+
+def test_batch():
+    rmtree(OUTPUT_DIR, ignore_errors=True)
+    assert get_batch().execute(run_seed2lp) == get_summary() \
+        == {name: "done" for name in ["toy_paper", "toy_paper_no_rev_rm_R2", "toy_paper_no_reversible"]}
+    assert f"toy_paper_{SHORT_OPTION}_results.json" in listdir(path.join(OUTPUT_DIR, "toy_paper"))
+    # Networks having a result file are not searched again
+    assert set(get_batch(resume=True).execute(run_seed2lp).values()) == {"skipped"}
+
+
+def test_batch_failures():
+    def run(args, run_mode):
+        match path.basename(args['infile']):
+            case "toy_paper.sbml":
+                sleep(60)
+            case "toy_paper_no_rev_rm_R2.sbml":
+                raise MemoryError()
+            case _:
+                exit(1)
+
+    rmtree(OUTPUT_DIR, ignore_errors=True)
+    assert get_batch(time_limit=0.01).execute(run) \
+        == {"toy_paper": "timeout", "toy_paper_no_rev_rm_R2": "memory", "toy_paper_no_reversible": "error"}
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp strongly connected components of the network
+"""
+from os import path
+from tests.utils import get_network
+from seed2lp.reaction import Reaction
+from seed2lp.metabolite import Metabolite
+from seed2lp.core import NetworkCore
+from seed2lp import components
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+########################################################
+
+
+def get_reaction(name:str, reactants:list, products:list, reversible:bool=False):
+    reaction = Reaction(name, reversible, -1000 if reversible else 0, 1000)
+    reaction.reactants = [Metabolite(metabolite, 1.0) for metabolite in reactants]
+    reaction.products = [Metabolite(metabolite, 1.0) for metabolite in products]
+    return reaction
+
+
+def test_components():
+    reactions = [get_reaction("R_1", ["A"], ["B"]),
+                 get_reaction("R_2", ["B"], ["A", "C"]),
+                 get_reaction("R_3", ["D"], ["E"], True),
+                 get_reaction("R_4", ["F"], [])]
+    network_components = components.get_components(NetworkCore(reactions))
+    assert network_components["scc"] == {"A": ["A", "B"], "C": ["C"], "D": ["D", "E"], "F": ["F"]}
+    assert network_components["sccedge"] == [("A", "C")]
+    assert sorted(network_components["noinput"]) == ["A", "D", "F"]
+    facts = components.convert_to_facts(network_components)
+    assert 'scc("A","B").' in facts and 'sccedge("A","C").' in facts and 'noinput("F").' in facts
+
+
+def test_network_components():
+    network = get_network(INFILE, "full", False, False, False)
+    network_components = components.get_components(network.core)
+    metabolites = [metabolite for members in network_components["scc"].values() for metabolite in members]
+    # Each metabolite is into exactly one component, named by its smallest metabolite
+    assert len(metabolites) == len(set(metabolites))
+    assert all(name == min(members) for name, members in network_components["scc"].items())
+    for source, target in network_components["sccedge"]:
+        assert target not in network_components["noinput"]
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp indexed core of the normalized network
+"""
+from os import path
+from tests.utils import get_network
+from seed2lp.core import METABOLITE_TYPES
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+########################################################
+
+
+def test_core():
+    network = get_network(INFILE, "full", False, False, False)
+    core = network.core
+    assert core.reactions == [reaction.name for reaction in network.reactions]
+    stoichiometry = core.get_stoichiometry()
+    for column, reaction in enumerate(network.reactions):
+        assert core.reversible[column] == reaction.reversible
+        assert core.exchange[column] == reaction.is_exchange
+        for side, metabolites in (("reactant", reaction.reactants), ("product", reaction.products)):
+            rows, values = core.get_metabolites(column, side)
+            assert [core.metabolites[row] for row in rows] == [metabolite.name for metabolite in metabolites]
+            assert list(values) == [metabolite.stoichiometry for metabolite in metabolites]
+            assert [METABOLITE_TYPES[core.metabolite_types[row]] for row in rows] \
+                == [metabolite.type for metabolite in metabolites]
+        for metabolite in reaction.reactants:
+            assert stoichiometry[core.metabolite_index[metabolite.name], column] == -metabolite.stoichiometry
+
+
+def test_core_kept():
+    # The core is kept when the network is simplified, facts are written from it
+    network = get_network(INFILE, "full", False, False, False)
+    network.convert_to_facts()
+    network.simplify()
+    assert network.reactions is None
+    facts = network.core.convert_to_facts(network.keep_import_reactions, network.use_topological_injections)
+    assert facts and network.facts.startswith(facts)
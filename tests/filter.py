@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp filter checking the solutions on a pool of flux workers
+"""
+from os import path
+from tests.utils import get_network, TMP_DIR, CLINGO_CONF, CLINGO_STRAT
+from seed2lp.reasoning import Reasoning
+from seed2lp.__main__ import get_reaction_options
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+RUN_MODE = "target"
+########################################################
+
+
+def get_filter_output(number_solution:int, flux_workers:int, flux_engine:str="cobra"):
+    options = get_reaction_options(False, False, False, True, RUN_MODE, False, "filter")
+    network = get_network(INFILE, RUN_MODE, False, False, False, opt_short=options['short'],
+                          flux_engine=flux_engine)
+    network.convert_to_facts()
+    network.simplify()
+    model = Reasoning(RUN_MODE, "filter", network, 0, number_solution, CLINGO_CONF, CLINGO_STRAT,
+                      False, False, True, True, TMP_DIR, options['short'], flux_workers=flux_workers)
+    model.search_seed()
+    return model.output
+
+
+def search_filter(number_solution:int, flux_workers:int):
+    return {output_type: (output['solutions'], output.get('rejected'))
+            for output_type, output in get_filter_output(number_solution, flux_workers).items()}
+
+
+def test_flux_workers():
+    results = search_filter(0, 1)
+    # Solutions rejected by the flux check in both subset minimal and minimize enumerations
+    assert all(rejected for output_type, (_, rejected) in results.items()
+               if "ENUMERATION" in output_type)
+    # Same solutions, numbered in the order of the solver answers
+    assert search_filter(0, 3) == results
+
+
+def test_flux_workers_number_solution():
+    results = search_filter(3, 1)
+    assert all(len(solutions) == 3 for output_type, (solutions, _) in results.items()
+               if "ENUMERATION" in output_type)
+    assert search_filter(3, 2) == results
+
+
+def test_flux_workers_lp_checks():
+    # The LP checks done by the workers are counted by the search
+    output = get_filter_output(0, 2, "lp")["SUBSET MINIMAL ENUMERATION FILTER"]
+    assert output['lp checks']['checks'] == output['flux cache']['misses'] > 0
+    assert output['lp checks']['time'] > 0
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp flux check
+"""
+from os import path
+from random import Random
+from tests.utils import get_network, TMP_DIR
+from seed2lp.fluxcache import FluxCache
+from seed2lp.linear import Hybrid
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+# In This Network, The reaction R2 J + A -> C is deleted
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper_no_rev_rm_R2.sbml')
+TOY_REVERSIBLE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+E_COLI_CORE = path.join(TEST_DIR,'../networks/sbml/e_coli_core.xml')
+########################################################
+
+
+################### FIXED VARIABLES ####################
+RUN_MODE="full"
+########################################################
+
+
+################# EXPECTED SOLUTIONS ###################
+SEEDS_OK = ['M_C_c', 'M_F_c', 'M_S1_e', 'M_S2_e']
+SEEDS_KO = ['M_C_c', 'M_I_c', 'M_S1_e', 'M_S2_e']
+########################################################
+
+
+def test_cache_deduction():
+    cache = FluxCache()
+    cache.add(frozenset({"M_A", "M_B", "M_C"}), False, 0.0)
+    cache.add(frozenset({"M_D"}), True, 10.0)
+
+    assert cache.get(frozenset({"M_D"})) == (True, 10.0)
+    # subset of a rejected set of seeds
+    assert cache.get(frozenset({"M_A", "M_C"})) == (False, None)
+    assert cache.get(frozenset({"M_A", "M_D"})) is None
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+
+def test_check_seeds():
+    network = get_network(INFILE, RUN_MODE, False, False, False)
+    ok, flux = network.check_seeds(SEEDS_OK)
+    assert ok and flux > 0
+    ok, _ = network.check_seeds(SEEDS_KO)
+    assert not ok
+
+    # Results reused from the cache
+    assert network.check_seeds(SEEDS_OK) == (True, flux)
+    assert network.check_seeds(SEEDS_KO[:2])[0] is False
+    assert network.flux_cache.hits == 2
+    assert network.flux_cache.misses == 2
+
+
+def test_lp_engine():
+    # The sparse LP gives the same answers as cobra on the toy networks and E. coli core
+    for infile in [INFILE, TOY_REVERSIBLE, E_COLI_CORE]:
+        network = get_network(infile, RUN_MODE, False, False, False)
+        lp_network = get_network(infile, RUN_MODE, False, False, False, flux_engine="lp")
+        lp_network.simplify()
+        metabolites = sorted(lp_network.flux_model.metabolites)
+        exchanged = sorted(lp_network.flux_model.exchanges)
+        rng = Random(0)
+        seeds_list = [exchanged] + [rng.sample(metabolites, min(size, len(metabolites))) for size in [2, 4, 8, 16, 32]*4]
+        for seeds in seeds_list:
+            ok, flux = network.calculate_seeds_flux(seeds)
+            lp_ok, lp_flux = lp_network.calculate_seeds_flux(seeds)
+            assert ok == lp_ok
+            assert abs(flux - lp_flux) < 1e-6
+
+
+def test_lp_objectives():
+    # As cobra, the first objective reaction having flux stops the calculation
+    # and gives the flux, the next one (R_R1) having none
+    network = get_network(INFILE, RUN_MODE, False, False, False)
+    lp_network = get_network(INFILE, RUN_MODE, False, False, False, flux_engine="lp")
+    lp_network.simplify()
+    for checked in [network, lp_network]:
+        checked.objectives = ["R_BIOMASS", "R_R1"]
+    assert network.calculate_seeds_flux(SEEDS_OK) == lp_network.calculate_seeds_flux(SEEDS_OK) == (True, 1000.0)
+    assert lp_network.calculate_seeds_flux(SEEDS_KO)[0] is False
+    assert lp_network.explain_ko(SEEDS_KO)
+
+
+def test_lp_warm_start():
+    network = get_network(E_COLI_CORE, RUN_MODE, False, False, False, flux_engine="lp")
+    network.simplify()
+    flux_model = network.flux_model
+    exchanged = sorted(flux_model.exchanges)
+    result = flux_model.check(exchanged)
+    # Same bounds: solved again from the optimal basis without any iteration
+    assert flux_model.check(exchanged) == result
+    assert flux_model.check_stats[1][0] == 0
+    # Only the bounds of the removed seed are changed
+    flux_model.check(exchanged[1:])
+    assert flux_model.get_counters()['checks'] == 3
+
+
+def test_lp_cut():
+    network = get_network(INFILE, RUN_MODE, False, False, False, flux_engine="lp")
+    network.simplify()
+    assert network.explain_ko(SEEDS_OK) is None
+    cut = network.explain_ko(SEEDS_KO)
+    assert cut and not set(cut).intersection(SEEDS_KO)
+    # Any set of seeds without metabolite of the cut has no flux
+    others = set(network.flux_model.metabolites).difference(cut)
+    assert not network.calculate_seeds_flux(others)[0]
+    assert network.flux_model.get_counters()['cuts'] == 1
+    # Then rejected by the flux cache without flux calculation
+    assert network.check_seeds(sorted(others)) == (False, None)
+    assert network.flux_cache.hits == 1
+
+
+def test_hybrid_flux_storage():
+    network = get_network(TOY_REVERSIBLE, "target", False, False, False)
+    network.convert_to_facts()
+    network.simplify()
+    stored = dict()
+    for flux_storage, nonzero_flux in [("json", False), ("npz", False), ("npz", True)]:
+        model = Hybrid("target", "hybrid", network, 0, 0, 'jumpy', "none", 
+                       subset_minimal=True, temp_dir=TMP_DIR, short_option="test", 
+                       flux_storage=flux_storage, nonzero_flux=nonzero_flux)
+        model.search_seed()
+        stored[flux_storage, nonzero_flux] = model
+
+    json_solutions = stored["json", False].output['SUBSET MINIMAL ENUMERATION']['solutions']
+    flux_data = stored["npz", False].get_flux_data()
+    npz_solutions = stored["npz", False].output['SUBSET MINIMAL ENUMERATION']['solutions']
+    assert len(flux_data['models']) == len(json_solutions) > 0
+    reactions = list(flux_data['reactions'])
+    for model_name, solution in json_solutions.items():
+        reference = npz_solutions[model_name][5]
+        row = flux_data['flux'][reference['row']]
+        assert {reaction: flux for reaction, flux in solution[5]} == \
+            {reaction: row[index] for index, reaction in enumerate(reactions)}
+        assert dict(reference['objective_flux'])['R_BIOMASS'] > 0
+
+    # Only objective and non-zero fluxes are kept
+    nonzero_data = stored["npz", True].get_flux_data()
+    assert 'R_BIOMASS' in nonzero_data['reactions']
+    assert len(nonzero_data['reactions']) < len(reactions)
+    assert all(nonzero_data['flux'][:, list(nonzero_data['reactions']).index(reaction)].any()
+               for reaction in nonzero_data['reactions'] if reaction != 'R_BIOMASS')
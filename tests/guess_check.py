@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp guess-check checking the candidates from a flux propagator
+"""
+from os import path
+from tests.utils import get_network, TMP_DIR, CLINGO_CONF, CLINGO_STRAT
+from seed2lp.reasoning import Reasoning
+from seed2lp.__main__ import get_reaction_options
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+E_COLI_CORE = path.join(TEST_DIR,'../networks/sbml/e_coli_core.xml')
+RUN_MODE = "target"
+########################################################
+
+
+def search_guess_check(number_solution:int, threads:int=1):
+    options = get_reaction_options(False, False, False, True, RUN_MODE, False, "guess_check")
+    network = get_network(INFILE, RUN_MODE, False, False, False, opt_short=options['short'])
+    network.convert_to_facts()
+    network.simplify()
+    model = Reasoning(RUN_MODE, "guess_check", network, 0, number_solution, CLINGO_CONF, CLINGO_STRAT,
+                      True, True, True, False, TMP_DIR, options['short'], threads=threads)
+    model.search_seed()
+    results = dict()
+    for result in network.result_seeds:
+        results.setdefault(result.search_type, list()).append(set(result.seeds_list))
+    return results
+
+
+def test_consequences():
+    results = search_guess_check(0)
+    enumeration = results["Enumeration"]
+    assert len(enumeration) == 8
+    # One answer each, the last approximation of the consequences
+    assert results["Intersection"] == [set.intersection(*enumeration)]
+    assert results["Union"] == [set.union(*enumeration)]
+
+
+def test_consequences_number_solution():
+    results = search_guess_check(2)
+    assert len(results["Enumeration"]) == 2
+    # The number of solutions does not stop the search of the consequences
+    assert results["Intersection"] == search_guess_check(0)["Intersection"]
+    assert results["Union"] == search_guess_check(0)["Union"]
+
+
+def search_subset_minimal(infile:str, flux_engine:str, number_solution:int):
+    options = get_reaction_options(False, False, False, True, RUN_MODE, False, "guess_check")
+    network = get_network(infile, RUN_MODE, False, False, False, opt_short=options['short'],
+                          flux_engine=flux_engine)
+    network.convert_to_facts()
+    network.simplify()
+    model = Reasoning(RUN_MODE, "guess_check", network, 0, number_solution, CLINGO_CONF, CLINGO_STRAT,
+                      False, False, False, True, TMP_DIR, options['short'])
+    model.search_seed()
+    return sorted(sorted(result.seeds_list) for result in network.result_seeds), network
+
+
+def test_flux_engines():
+    # The lp cuts only answer flux checks, the solutions do not depend on the flux engine
+    lp_solutions, _ = search_subset_minimal(INFILE, "lp", 0)
+    assert lp_solutions == search_subset_minimal(INFILE, "cobra", 0)[0]
+
+
+def test_flux_engines_e_coli_core():
+    lp_solutions, lp_network = search_subset_minimal(E_COLI_CORE, "lp", 50)
+    assert lp_network.flux_cache.cuts
+    assert lp_solutions == search_subset_minimal(E_COLI_CORE, "cobra", 50)[0]
+
+
+def test_threads():
+    # The exclusion clauses are shared by the solver threads
+    results = search_guess_check(0, threads=2)
+    assert sorted(map(sorted, results["Enumeration"])) \
+        == sorted(map(sorted, search_guess_check(0)["Enumeration"]))
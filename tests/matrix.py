@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp option matrix running several searches on one parsed network
+"""
+from os import path, listdir
+from shutil import rmtree
+from tests.utils import TMP_DIR
+from seed2lp import argument
+from seed2lp.network import Network
+from seed2lp.__main__ import run_seed2lp, PROJECT_DIR
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+OUTPUT_DIR = path.join(TMP_DIR, "matrix")
+########################################################
+
+
+def get_args(output_dir:str):
+    args = argument.get_config(argument.parse_args(["target", INFILE, output_dir]), PROJECT_DIR)
+    args |= {"solve": "reasoning", "mode": "minimize", "number_solution": 0, "temp": TMP_DIR}
+    return args
+
+
+def get_solutions(results:dict):
+    return {(solve, search): sorted(sorted(solution[3]) for solution in result["solutions"].values())
+            for solve, searches in results["RESULTS"].items() for search, result in searches.items()}
+
+
+def test_option_matrix():
+    rmtree(OUTPUT_DIR, ignore_errors=True)
+    matrix = argument.get_option_matrix(["accumulation=false,true", "mode=minimize,subsetmin"])
+    assert len(matrix) == 4
+    all_results = run_seed2lp(get_args(OUTPUT_DIR), "target", matrix)
+    # Each combination has its own result file, named after its options
+    assert sorted(name for name in listdir(OUTPUT_DIR) if name.endswith("_results.json")) \
+        == sorted(f"toy_paper_rm_rxn_tgt_taf_reas_{accu}_{mode}_results.json"
+                  for accu in ["no_accu", "accu"] for mode in ["minimize", "subsetmin"])
+    # The searches of the matrix give the results of separate runs
+    for combination, (results, _) in zip(matrix, all_results):
+        output_dir = path.join(OUTPUT_DIR, "single")
+        single, _ = run_seed2lp(get_args(output_dir) | combination, "target")[0]
+        assert get_solutions(results) == get_solutions(single)
+
+
+def test_shared_facts(monkeypatch):
+    calls = list()
+    convert_to_facts = Network.convert_to_facts
+    def counted_convert_to_facts(network, *args):
+        calls.append(network.accumulation)
+        return convert_to_facts(network, *args)
+    monkeypatch.setattr(Network, "convert_to_facts", counted_convert_to_facts)
+
+    rmtree(OUTPUT_DIR, ignore_errors=True)
+    matrix = argument.get_option_matrix(["accumulation=false,true", "solve=reasoning,filter", "mode=minimize,subsetmin"])
+    assert len(run_seed2lp(get_args(OUTPUT_DIR), "target", matrix)) == 8
+    # The facts are computed once for each accumulation
+    assert sorted(calls) == [False, True]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp cache of the normalized networks and their facts
+"""
+import numpy as np
+from os import path, remove
+from glob import glob
+from concurrent.futures import ThreadPoolExecutor
+from tests.utils import get_network, TMP_DIR
+from seed2lp.networkcache import NetworkCache
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+CACHE_DIR = path.join(TMP_DIR, "network_cache")
+########################################################
+
+
+def clear_cache():
+    for file in glob(path.join(CACHE_DIR, "*.npz")):
+        remove(file)
+
+
+def test_network_cache():
+    clear_cache()
+    cache = NetworkCache(CACHE_DIR)
+    network = get_network(INFILE, "target", False, False, False, network_cache=cache)
+    network.convert_to_facts(True)
+    cached_network = get_network(INFILE, "target", False, False, False, network_cache=cache)
+    cached_network.convert_to_facts(True)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # The reactions are not read again, the core is restored from the cache
+    assert not cached_network.reactions
+    assert cached_network.facts == network.facts
+    assert cached_network.preprocessed_facts == network.preprocessed_facts
+    assert cached_network.core.reactions == network.core.reactions
+    assert (cached_network.core.get_stoichiometry() != network.core.get_stoichiometry()).nnz == 0
+    assert np.array_equal(cached_network.core.metabolite_ranks, network.core.metabolite_ranks)
+
+
+def test_network_cache_key():
+    clear_cache()
+    cache = NetworkCache(CACHE_DIR)
+    for options in ((False, False, False), (False, True, False), (False, False, True), (True, False, False)):
+        get_network(INFILE, "target", *options, network_cache=cache)
+    assert (cache.hits, cache.misses) == (0, 4)
+    assert len(glob(path.join(CACHE_DIR, "*.npz"))) == 4
+
+    # Only the most recently used network is kept
+    small_cache = NetworkCache(CACHE_DIR, 0)
+    get_network(INFILE, "target", False, False, False, network_cache=small_cache)
+    assert small_cache.hits == 1
+    assert len(glob(path.join(CACHE_DIR, "*.npz"))) == 4
+    small_cache.evict()
+    assert len(glob(path.join(CACHE_DIR, "*.npz"))) == 1
+
+
+def test_concurrent_evict():
+    # Batch processes share the cache directory and may evict the same files
+    clear_cache()
+    for index in range(500):
+        with open(path.join(CACHE_DIR, f"{index}.npz"), "wb") as f:
+            f.write(bytes(1024))
+    caches = [NetworkCache(CACHE_DIR, 0) for _ in range(4)]
+    with ThreadPoolExecutor(len(caches)) as executor:
+        for evicted in [executor.submit(cache.evict) for cache in caches]:
+            evicted.result()
+    assert len(glob(path.join(CACHE_DIR, "*.npz"))) == 1
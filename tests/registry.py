@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp registry sharing the SBML parsing between consumers
+"""
+from os import path
+from tests.utils import get_network, TMP_DIR
+from menetools import run_menescope
+from seed2lp.registry import REGISTRY
+from seed2lp.scope import run_scope, create_species_sbml
+from seed2lp.__main__ import chek_inputs
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+########################################################
+
+
+def test_shared_sbml():
+    REGISTRY.get_sbml_model(INFILE)
+    REGISTRY.reset_counters()
+    chek_inputs(INFILE, {"Objective": ["R_BIOMASS"]})
+    get_network(INFILE, "target", False, False, False)
+    assert REGISTRY.builds["sbml"] == 0 and REGISTRY.reuses["sbml"] >= 2
+
+
+def test_cobra_copies():
+    model = REGISTRY.get_cobra_model(INFILE)
+    bounds = model.reactions[0].bounds
+    model.reactions[0].bounds = (0, 0)
+    # Each consumer gets its own copy of the model
+    assert REGISTRY.get_cobra_model(INFILE).reactions[0].bounds == bounds != (0, 0)
+
+
+def test_scope_from_memory():
+    seeds = {"M_S_c", "M_F_c"}
+    seeds_file = path.join(TMP_DIR, "registry_seeds.sbml")
+    create_species_sbml(seeds, seeds_file)
+    expected = run_menescope(INFILE, seeds_file)
+    scope = run_scope(REGISTRY.get_scope_engine(INFILE), seeds)
+    assert {key: sorted(value) for key, value in scope.items()} \
+        == {key: sorted(value) for key, value in expected.items()}
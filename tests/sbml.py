@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp streaming SBML reader on plain and compressed files
+"""
+import gzip
+import bz2
+import shutil
+from os import path
+import xml.etree.ElementTree as ET
+from tests.utils import get_network, TMP_DIR
+from seed2lp import sbml
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+########################################################
+
+
+def test_read_model():
+    model = sbml.read_model(INFILE)
+    root = ET.parse(INFILE).getroot()
+    species = [element.attrib['id'] for element in root.iter() if sbml.get_sbml_tag(element) == "species"]
+    reactions = [element for element in root.iter() if sbml.get_sbml_tag(element) == "reaction"]
+    assert model["species"] == species
+    assert [reaction["id"] for reaction in model["reactions"]] == [reaction.attrib['id'] for reaction in reactions]
+    assert model["fbc"] and model["objectives"]
+    assert model["reactions"][0]["reactants"] == sbml.get_listOfReactants(reactions[0])
+    assert set(model["parameters"]) >= {reaction["lowerFluxBound"] for reaction in model["reactions"]}
+
+
+def test_compressed_model():
+    network = get_network(INFILE, "target", False, False, False)
+    network.convert_to_facts()
+    for extension, opener in ((".gz", gzip.open), (".bz2", bz2.open)):
+        compressed = path.join(TMP_DIR, f"{path.basename(INFILE)}{extension}")
+        with open(INFILE, 'rb') as source, opener(compressed, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        compressed_network = get_network(compressed, "target", False, False, False)
+        compressed_network.convert_to_facts()
+        assert compressed_network.name == network.name
+        assert compressed_network.facts == network.facts
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp scope of the solutions, computed by workers and resumed
+"""
+from os import path
+from shutil import rmtree
+from itertools import combinations
+from tests.utils import get_network, TMP_DIR
+from seed2lp.registry import REGISTRY
+from seed2lp.resmod import Resmod
+from seed2lp.scope import Scope, get_seeds_hash
+from seed2lp.file import load_json
+from seed2lp import logger
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+OUTPUT_DIR = path.join(TMP_DIR, "scope")
+SCOPE_DIR = path.join(OUTPUT_DIR, "scope", "target", "reasoning", "minimize", "no_accu")
+########################################################
+
+
+def get_scope(seed_sets:list):
+    network = get_network(INFILE, "target", False, False, False)
+    network.result_seeds = [Resmod(f"model_{index}", ["R_BIOMASS"], "REASONING", "Minimize", "Enumeration",
+                                   len(seeds), list(seeds), None, run_mode="Target")
+                            for index, seeds in enumerate(seed_sets)]
+    return Scope(INFILE, network, OUTPUT_DIR, workers=2)
+
+
+def get_seed_sets():
+    logger.get_logger(INFILE, "test")
+    metabolites = sorted(REGISTRY.get_scope_engine(INFILE).metabolites)
+    # More solutions than a chunk of a worker
+    return [set(seeds) for seeds in combinations(metabolites, 2)][:100]
+
+
+def test_parallel_scope():
+    rmtree(OUTPUT_DIR, ignore_errors=True)
+    seed_sets = get_seed_sets()
+    get_scope(seed_sets).execute()
+    engine = REGISTRY.get_scope_engine(INFILE)
+    for index, seeds in enumerate(seed_sets):
+        scope = load_json(path.join(SCOPE_DIR, f"model_{index}.json"))
+        assert scope["seeds_hash"] == get_seeds_hash(list(seeds))
+        assert scope["scope"] == engine.get_scope(seeds)["scope"]
+        assert path.isfile(path.join(OUTPUT_DIR, "sbml", "target", "reasoning", "minimize", 
+                                     "no_accu", f"model_{index}.sbml"))
+
+
+def test_resumed_scope():
+    rmtree(OUTPUT_DIR, ignore_errors=True)
+    seed_sets = get_seed_sets()
+    get_scope(seed_sets).execute()
+    # Only the solutions with other seeds or without a complete file are computed again
+    seed_sets[0] = seed_sets[1] | seed_sets[2]
+    with open(path.join(SCOPE_DIR, "model_3.json"), 'w') as f:
+        f.write('{"scope": [')
+    tasks, nb_skipped = get_scope(seed_sets).get_tasks()
+    assert [task[0] for task in tasks] == ["model_0", "model_3"]
+    assert nb_skipped == len(seed_sets) - 2
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp scope engine against menetools menescope
+"""
+from os import path
+from tests.utils import TMP_DIR
+from seed2lp import logger
+from menetools import run_menescope
+from seed2lp.registry import REGISTRY
+from seed2lp.scope import create_species_sbml
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+########################################################
+
+SEED_SETS = [{"M_S_c"}, {"M_S_c", "M_F_c"}, {"M_E_c", "M_G_c"}, {"M_B_c", "M_absent_c"}]
+
+
+def get_expected(seeds:set, name:str):
+    seeds_file = path.join(TMP_DIR, f"scopeengine_{name}.sbml")
+    create_species_sbml(seeds, seeds_file)
+    return {key: sorted(value) for key, value in run_menescope(INFILE, seeds_file).items()}
+
+
+def get_engine():
+    logger.get_logger(INFILE, "test")
+    return REGISTRY.get_scope_engine(INFILE)
+
+
+def test_single_scope():
+    engine = get_engine()
+    for index, seeds in enumerate(SEED_SETS):
+        assert engine.get_scope(seeds) == get_expected(seeds, index)
+
+
+def test_batch_scopes():
+    engine = get_engine()
+    # More seed sets than bits into a word
+    seed_sets = SEED_SETS * 20
+    expected = [engine.get_scope(seeds) for seeds in SEED_SETS]
+    assert engine.get_scopes(seed_sets) == expected * 20
+    assert engine.get_scopes(seed_sets)[0] == get_expected(seed_sets[0], "batch")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp ground program shared between searches
+"""
+from os import path, remove
+from glob import glob
+from tests.utils import get_network, TMP_DIR
+from seed2lp.reasoning import Reasoning
+from seed2lp.linear import Hybrid
+from seed2lp.clingo_lpx import get_model_data
+from seed2lp.groundcache import GroundCache
+from seed2lp.__main__ import get_reaction_options
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+########################################################
+
+
+################### FIXED VARIABLES ####################
+RUN_MODE="full"
+########################################################
+
+
+def search_seed(ground_cache:GroundCache=None, **parallel):
+    options = get_reaction_options(False, False, False, True, RUN_MODE, False, "reasoning")
+    network = get_network(INFILE, RUN_MODE, False, False, False)
+    network.convert_to_facts()
+    network.simplify()
+    model = Reasoning(RUN_MODE, "reasoning", network, 0, 0, 'jumpy', 'none', True, True,
+                      True, True, TMP_DIR, options['short'], False, ground_cache=ground_cache, **parallel)
+    model.search_seed()
+    return model, network
+
+
+def test_ground_once():
+    model, network = search_seed()
+
+    # One session for the seed solving: minimize searches extend the program
+    # grounded for subset minimal searches with the minimize statement
+    assert len(model.sessions) == 1
+    session = list(model.sessions.values())[0]
+    assert session.files[-1] == model.asp.ASP_SRC_MINIMIZE
+    assert session.ground(session.files) == 0
+
+    submin = [result.seeds_list for result in network.result_seeds
+              if result.search_mode == "Subset Minimal" and result.search_type == "Enumeration"]
+    minimize = [result.seeds_list for result in network.result_seeds
+              if result.search_mode == "Minimize" and result.search_type == "Enumeration"]
+    assert submin and minimize
+    size = min(len(seeds) for seeds in submin)
+    assert all(len(seeds) == size for seeds in minimize)
+
+
+def test_ground_cache():
+    cache_dir = path.join(TMP_DIR, "ground_cache")
+    for file in glob(path.join(cache_dir, "*.aspif")):
+        remove(file)
+    cache = GroundCache(cache_dir)
+    _, network = search_seed(cache)
+    # Subset minimal and minimize programs
+    assert (cache.hits, cache.misses) == (0, 2)
+    _, cached_network = search_seed(cache)
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert [result.seeds_list for result in network.result_seeds] \
+        == [result.seeds_list for result in cached_network.result_seeds]
+
+    # Only the most recently used program is kept
+    small_cache = GroundCache(cache_dir, 0)
+    small_cache.evict()
+    assert len(glob(path.join(cache_dir, "*.aspif"))) == 1
+
+
+def test_portfolio():
+    _, network = search_seed()
+    model, portfolio_network = search_seed(portfolio="tuned")
+    # By default one thread per configuration of the portfolio
+    assert model.threads == len(model.portfolio_names)
+    submin = [sorted(result.seeds_list) for result in network.result_seeds
+              if result.search_mode == "Subset Minimal" and result.search_type == "Enumeration"]
+    portfolio_submin = [sorted(result.seeds_list) for result in portfolio_network.result_seeds
+                        if result.search_mode == "Subset Minimal" and result.search_type == "Enumeration"]
+    assert sorted(submin) == sorted(portfolio_submin)
+
+    statistics = model.output['MINIMIZE OPTIMUM']['parallel solving']
+    assert statistics['winner'] in model.portfolio_names
+    assert set(statistics['models']).issubset(model.portfolio_names)
+
+
+def test_instance_in_memory():
+    for file in glob(path.join(TMP_DIR, "instance_*.lp")):
+        remove(file)
+    model, _ = search_seed()
+    session = list(model.sessions.values())[0]
+    # The facts are given to clingo from memory, only the encodings are loaded
+    assert model.instance == model.network.facts
+    assert all(file.startswith(path.dirname(model.asp.ASP_SRC_SEED_SOLVING)) for file in session.files)
+    assert not glob(path.join(TMP_DIR, "instance_*.lp"))
+
+
+def test_hybrid_ground_once():
+    options = get_reaction_options(False, False, False, True, RUN_MODE, False, "hybrid")
+    network = get_network(INFILE, RUN_MODE, False, False, False)
+    network.convert_to_facts()
+    network.simplify()
+    model = Hybrid(RUN_MODE, "hybrid", network, 0, 0, 'jumpy', 'none', True, False,
+                   True, True, True, TMP_DIR, options['short'], False)
+    model.search_seed()
+    # The minimize statement is grounded with the previous files into a new
+    # control of the session, each program is grounded once
+    assert len(model.sessions) == 1
+    assert model.output['MINIMIZE OPTIMUM']['Timer']['Grounding time'] > 0
+    assert model.output['SUBSET MINIMAL INTERSECTION']['Timer']['Grounding time'] == 0
+    assert model.output['MINIMIZE ENUMERATION']['Timer']['Grounding time'] == 0
+    assert model.output['MINIMIZE ENUMERATION']['solutions']
+
+
+def test_model_data_without_objectives():
+    flux, seeds, objective_str, _ = get_model_data({'Value': ['seed("M_A_c",exchange)', '__lpx("R_1","3/2")']})
+    assert seeds == ["M_A_c"] and list(flux) == [1.5] and objective_str == ""
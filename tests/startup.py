@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp command line startup, heavy dependencies are imported by the runs using them
+"""
+import sys
+import subprocess
+from os import path
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+PROJECT_DIR = path.dirname(path.dirname(path.abspath(__file__)))
+########################################################
+
+LAZY_MODULES = {"cobra", "pandas", "clyngor", "libsbml", "padmet", "menetools", "biseau", "highspy",
+                "clingo", "clingolpx", "numpy", "scipy"}
+# Cumulative import time of the seed2lp modules, in microseconds
+STARTUP_BUDGET = 1000000
+
+
+def get_import_times():
+    # Each line: "import time: self [us] | cumulative | imported package"
+    process = subprocess.run([sys.executable, "-X", "importtime", "-m", "seed2lp", "--help"],
+                             cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+    import_times = dict()
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("imported package"):
+            _, cumulative, name = line[len("import time:"):].split("|")
+            import_times[name.strip()] = (int(cumulative), name.startswith(" "*2))
+    return import_times
+
+
+def test_lazy_imports():
+    imported = {name.split(".")[0] for name in get_import_times()}
+    assert not imported & LAZY_MODULES
+
+
+def test_startup_budget():
+    import_times = get_import_times()
+    startup = sum(cumulative for name, (cumulative, is_nested) in import_times.items()
+                  if name.startswith("seed2lp") and not is_nested)
+    assert 0 < startup < STARTUP_BUDGET
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Description:
+Test seed2lp topological preprocessing of the network before grounding
+"""
+from os import path
+from tests.utils import get_network, TMP_DIR
+from seed2lp.reasoning import Reasoning
+from seed2lp.topology import Topology
+from seed2lp.__main__ import get_reaction_options
+
+##### ###### ##### DIRECTORIES AND FILES ###################
+TEST_DIR = path.dirname(path.abspath(__file__))
+
+INFILE = path.join(TEST_DIR,'network/sbml/toy_paper.sbml')
+########################################################
+
+
+def search_seed(run_mode:str, accumulation:bool, preprocess:bool):
+    options = get_reaction_options(False, False, False, True, run_mode, accumulation, "reasoning")
+    network = get_network(INFILE, run_mode, False, False, False, accumulation)
+    network.convert_to_facts(preprocess)
+    network.simplify()
+    model = Reasoning(run_mode, "reasoning", network, 0, 0, 'jumpy', 'none', True, True,
+                      False, True, TMP_DIR, options['short'], False)
+    model.search_seed()
+    seeds = sorted(sorted(result.seeds_list) for result in network.result_seeds
+                   if result.search_type == "Enumeration")
+    return seeds, model.output['SUBSET MINIMAL ENUMERATION']['ground program']['rules'], network
+
+
+def test_topology():
+    network = get_network(INFILE, "target", False, False, False, True)
+    topology = Topology(network.core, network.keep_import_reactions)
+    can_reach = topology.get_can_reach(network.targets)
+    assert set(network.targets) <= can_reach
+    reactions = topology.get_reaching_reactions(can_reach)
+    assert reactions and reactions < set(topology.reactions)
+    # Every product of a pruned reaction is out of the paths to the targets
+    for reaction in set(topology.reactions) - reactions:
+        assert topology.reactions[reaction][1].isdisjoint(can_reach)
+    # Nothing is activated without seeds when the import reactions are removed
+    assert topology.get_activated(set()) == set()
+
+
+def test_pruned_target():
+    seeds, rules, _ = search_seed("target", True, False)
+    pruned_seeds, pruned_rules, network = search_seed("target", True, True)
+    assert seeds and seeds == pruned_seeds
+    assert network.preprocessing['kept reactions'] < network.preprocessing['reactions']
+    assert network.preprocessing['preprocessed facts size'] < network.preprocessing['facts size']
+    assert pruned_rules < rules
+
+
+def test_precomputed_full():
+    seeds, _, _ = search_seed("full", False, False)
+    precomputed_seeds, _, network = search_seed("full", False, True)
+    assert seeds and seeds == precomputed_seeds
+    # Without targets nothing is pruned
+    assert network.preprocessing['kept reactions'] == network.preprocessing['reactions']
+    assert 'seed_external(' in network.preprocessed_facts
@@ -166,13 +166,13 @@ def search_seed(infile:str, run_mode:str, solve:str, optim:str, targets_as_seeds
 def get_network(infile:str, run_mode:str, targets_as_seeds:bool,
                  topological_injection:bool, keep_import_reactions:bool, accumulation:bool=False,
                  seeds_file:str=None, forbidden_seeds_file:str=None, possible_seeds_file:str=None, 
-                 opt_short:str="test"):
+                 opt_short:str="test", flux_engine:str="cobra", network_cache=None):
     
     logger.get_logger(infile, opt_short, VERBOSE)
     input_dict = get_input_datas(seeds_file, forbidden_seeds_file, possible_seeds_file)
     network = Network(infile, run_mode, targets_as_seeds, 
                     topological_injection, keep_import_reactions,
-                    input_dict, accumulation)
+                    input_dict, accumulation, flux_engine=flux_engine, network_cache=network_cache)
     
     if not targets_as_seeds:  
         network.forbidden_seeds += network.targets